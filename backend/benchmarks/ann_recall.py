@@ -0,0 +1,97 @@
+"""
+Recall/latency benchmark of the approximate vector index against exact search.
+
+    python -m backend.benchmarks.ann_recall --candidates 200000 --queries 200 --top-k 20
+
+Candidate vectors are synthetic but clustered (like real resume embeddings). Recall is measured
+through rank_candidates (semantic scores only), the path the ranking endpoints take, comparing
+the IVF index with the exact index in three modes: a top_k page, a full listing (top_k=None)
+and a top_k page restricted to an allowed set of half the pool (as the skill filter does).
+"""
+import argparse
+import asyncio
+import json
+import time
+import numpy as np
+from backend.services.keyword_index import KeywordIndex
+from backend.services.llm import rank_candidates
+from backend.services.vector_index import ExactIndex, IVFIndex
+
+
+def synthetic_vectors(n: int, dim: int, clusters: int, rng) -> np.ndarray:
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=n)
+    vectors = centers[labels] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors
+
+
+def run(candidates: int, queries: int, top_k: int, dim: int = 384, nprobe: int = 0, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    vectors = synthetic_vectors(candidates, dim, clusters=max(8, candidates // 500), rng=rng)
+    rows = list(zip(range(1, candidates + 1), vectors))
+
+    exact = ExactIndex(dim=dim)
+    exact.load(rows)
+
+    start = time.perf_counter()
+    ivf = IVFIndex(dim=dim, min_train=0, nprobe=nprobe)
+    ivf.load(rows)
+    build_seconds = time.perf_counter() - start
+
+    query_vectors = vectors[rng.choice(candidates, queries, replace=False)]
+    query_vectors = query_vectors + 0.3 * rng.standard_normal(query_vectors.shape).astype(np.float32)
+
+    allowed = set(rng.choice(np.arange(1, candidates + 1), candidates // 2, replace=False).tolist())
+    modes = {"top_k": (top_k, None), "full": (None, None), "allowed": (top_k, allowed)}
+    keywords = KeywordIndex([])
+
+    async def ranked_ids(index, q, k, candidate_ids):
+        start = time.perf_counter()
+        ranked = await rank_candidates("", candidate_ids, top_k=k, index=index, query_embedding=q, keywords=keywords, fusion="none")
+        return [rank["candidate_id"] for rank in ranked], time.perf_counter() - start
+
+    async def measure() -> dict:
+        results = {}
+        for mode, (k, candidate_ids) in modes.items():
+            recalls, returned, exact_times, ivf_times = [], [], [], []
+            for q in query_vectors:
+                truth, exact_seconds = await ranked_ids(exact, q, k, candidate_ids)
+                approx, ivf_seconds = await ranked_ids(ivf, q, k, candidate_ids)
+                exact_times.append(exact_seconds)
+                ivf_times.append(ivf_seconds)
+                recalls.append(len(set(truth) & set(approx)) / max(1, len(truth)))
+                returned.append(len(approx) / max(1, len(truth)))
+            results[mode] = {
+                "recall_mean": round(float(np.mean(recalls)), 4),
+                "recall_min": round(float(np.min(recalls)), 4),
+                "returned_min": round(float(np.min(returned)), 4),
+                "exact_p50_ms": round(float(np.percentile(exact_times, 50)) * 1000, 3),
+                "ivf_p50_ms": round(float(np.percentile(ivf_times, 50)) * 1000, 3),
+                "ivf_p99_ms": round(float(np.percentile(ivf_times, 99)) * 1000, 3),
+            }
+        return results
+
+    return {
+        "candidates": candidates,
+        "queries": queries,
+        "top_k": top_k,
+        "nlist": int(ivf._centroids.shape[0]) if ivf.trained else 0,
+        "build_seconds": round(build_seconds, 3),
+        "modes": asyncio.run(measure()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--nprobe", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    result = run(args.candidates, args.queries, args.top_k, nprobe=args.nprobe, seed=args.seed)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
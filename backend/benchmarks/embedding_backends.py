@@ -0,0 +1,106 @@
+"""
+Parity and throughput of the embedding backends (EMBEDDING_BACKEND) against a reference backend.
+
+    python -m backend.benchmarks.embedding_backends --model ./models/all-MiniLM-L6-v2 --backends torch-int8 onnx onnx-int8
+
+For every backend: load time, texts per second at the given batch size, the cosine similarity
+between its vector and the reference vector of each text, and how many of the reference's top-k
+neighbours it returns for a set of queries. Exits with status 1 when any backend's minimum cosine
+is below --min-cosine, so it doubles as a parity check before switching backends.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import numpy as np
+from backend.services.embedding_backends import load_embedding_model, EMBEDDING_BACKENDS
+from backend.services.llm import EMBEDDING_MODEL_NAME
+from backend.services.taxonomy import load_taxonomy
+
+
+def synthetic_texts(count: int, words: int, seed: int = 0) -> list:
+    """Resume-like texts: skill names from the taxonomy mixed with common resume wording."""
+    rng = random.Random(seed)
+    taxonomy = load_taxonomy()
+    vocabulary = (
+        "engineer developer senior lead team built designed scalable platform services data pipeline "
+        "years experience project customers production migrated improved latency cloud deployed tested "
+        "managed mentored architecture api backend frontend analytics reporting automation"
+    ).split()
+    texts = []
+    for _ in range(count):
+        chosen = rng.sample(taxonomy.skills, k=min(6, len(taxonomy.skills)))
+        body = [rng.choice(vocabulary) for _ in range(words)]
+        for skill in chosen:
+            body.insert(rng.randrange(len(body)), skill)
+        texts.append(" ".join(body))
+    return texts
+
+
+def encode(model, texts: list, batch_size: int) -> tuple:
+    model.encode(texts[:batch_size], batch_size=batch_size)  # warm-up (graph optimization, caches)
+    start = time.perf_counter()
+    vectors = np.asarray(model.encode(texts, batch_size=batch_size), dtype=np.float32)
+    seconds = time.perf_counter() - start
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms, seconds
+
+
+def top_k_overlap(reference: np.ndarray, vectors: np.ndarray, queries: int, top_k: int) -> float:
+    overlaps = []
+    for q in range(min(queries, len(vectors))):
+        expected = set(np.argsort(-(reference @ reference[q]))[:top_k])
+        found = set(np.argsort(-(vectors @ vectors[q]))[:top_k])
+        overlaps.append(len(expected & found) / top_k)
+    return float(np.mean(overlaps)) if overlaps else 1.0
+
+
+def run(model_name: str, backends: list, reference: str, texts: int, words: int, batch_size: int, queries: int, top_k: int) -> list:
+    corpus = synthetic_texts(texts, words)
+    results = []
+    ref_vectors = None
+    for backend in [reference] + [b for b in backends if b != reference]:
+        start = time.perf_counter()
+        model = load_embedding_model(model_name, backend)
+        load_seconds = time.perf_counter() - start
+        vectors, seconds = encode(model, corpus, batch_size)
+        if ref_vectors is None:
+            ref_vectors = vectors
+        cosines = np.sum(vectors * ref_vectors, axis=1)
+        results.append({
+            "backend": backend,
+            "dim": int(vectors.shape[1]),
+            "load_seconds": round(load_seconds, 3),
+            "texts_per_second": round(len(corpus) / seconds, 1),
+            "cosine_mean": round(float(cosines.mean()), 5),
+            "cosine_min": round(float(cosines.min()), 5),
+            f"top{top_k}_overlap": round(top_k_overlap(ref_vectors, vectors, queries, top_k), 4),
+        })
+        del model
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME, help="Hub name or local model directory")
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS), choices=EMBEDDING_BACKENDS)
+    parser.add_argument("--reference", default="torch", choices=EMBEDDING_BACKENDS)
+    parser.add_argument("--texts", type=int, default=500)
+    parser.add_argument("--words", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    args = parser.parse_args()
+    results = run(args.model, args.backends, args.reference, args.texts, args.words, args.batch_size, args.queries, args.top_k)
+    print(json.dumps(results, indent=2))
+    failed = [r["backend"] for r in results if r["cosine_min"] < args.min_cosine or r["dim"] != results[0]["dim"]]
+    if failed:
+        print(f"Backends below parity (cosine < {args.min_cosine} or different size): {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""
+Load test of ingestion and ranking, run in-process (TestClient) against a temporary SQLite database.
+
+    python -m backend.benchmarks.load --candidates 1000 100000 --documents 200 --output bench.json
+    python -m backend.benchmarks.load --candidates 1000 100000 --baseline bench.json --max-regression 0.25
+
+Every pool size runs in a fresh interpreter with a new database holding that many synthetic
+candidates (clustered random embeddings, skills from the taxonomy). Measured per pool:
+  startup   - import of backend.main, time until /health answers and until /ready
+  upload    - POST /api/v1/upload throughput for synthetic resumes rendered as PDF and DOCX
+  latency   - p50/p95/p99 of GET /api/v1/jobs/{id}/candidates and GET /api/v1/candidates,
+              with and without a skill filter
+  memory    - peak RSS of the API process and of its largest worker process
+Everything is seeded, so runs are comparable between commits. With --baseline the results are
+compared to an earlier output file and the exit status is 1 when any metric got worse by more
+than --max-regression (relative; tiny absolute changes are ignored as noise).
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from backend.benchmarks.parsing import pdf_document, docx_document
+from backend.benchmarks.startup import ROOT
+from backend.services.taxonomy import load_taxonomy
+
+WORDS = (
+    "engineer developer senior lead team built designed scalable platform services data pipeline "
+    "years experience project customers production migrated improved latency cloud deployed tested "
+    "managed mentored architecture api backend frontend analytics reporting automation"
+).split()
+
+# Changes smaller than these are noise, whatever the relative change
+NOISE_FLOOR = {"_ms": 1.0, "_seconds": 0.05, "_mb": 5.0, "per_second": 0.5}
+
+
+def _percentiles(values: list) -> dict:
+    values = np.asarray(values) * 1000
+    return {
+        "requests": int(values.size),
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+        "max_ms": round(float(values.max()), 2),
+    }
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _peak_worker_rss_mb() -> float:
+    """Largest peak RSS of the live worker processes (process pool); Linux only."""
+    peaks = []
+    for process in multiprocessing.active_children():
+        try:
+            with open(f"/proc/{process.pid}/status") as f:
+                peaks.extend(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+        except OSError:
+            pass
+    return round(max(peaks) / 1024, 1) if peaks else None
+
+
+def build_pool(candidates: int, dim: int, seed: int = 0, chunk: int = 5000) -> float:
+    """Bulk-insert synthetic candidates (and their skill rows) into the configured database."""
+    from sqlalchemy import insert
+    from sqlmodel import Session
+    from backend.database import init_db, engine
+    from backend.models import Candidate, CandidateSkill, encode_embedding
+
+    start = time.perf_counter()
+    init_db()
+    taxonomy = load_taxonomy()
+    rng = np.random.default_rng(seed)
+    text_rng = random.Random(seed)
+    centers = rng.standard_normal((max(8, candidates // 500), dim)).astype(np.float32)
+    created = datetime(2025, 1, 1)
+    with Session(engine) as session:
+        for first in range(1, candidates + 1, chunk):
+            count = min(chunk, candidates + 1 - first)
+            vectors = centers[rng.integers(0, len(centers), size=count)]
+            vectors = vectors + 0.6 * rng.standard_normal(vectors.shape).astype(np.float32)
+            rows, skill_rows = [], []
+            for offset, vector in enumerate(vectors):
+                candidate_id = first + offset
+                skills = text_rng.sample(taxonomy.skills, k=min(len(taxonomy.skills), text_rng.randint(3, 8)))
+                soft = text_rng.sample(taxonomy.soft_skills, k=min(len(taxonomy.soft_skills), 2))
+                words = " ".join(text_rng.choice(WORDS) for _ in range(60))
+                rows.append({
+                    "id": candidate_id,
+                    "name": f"Candidate {candidate_id}",
+                    "email": f"candidate{candidate_id}@example.com",
+                    "resume_text": f"{words} Skills: {', '.join(skills)}. {', '.join(soft)}.",
+                    "skills": json.dumps(skills),
+                    "soft_skills": json.dumps(soft),
+                    "experience_summary": words[:200],
+                    "embedding": encode_embedding(vector),
+                    "created_at": created + timedelta(minutes=candidate_id),
+                })
+                skill_rows.extend({"skill": s.lower(), "candidate_id": candidate_id} for s in set(skills + soft))
+            session.execute(insert(Candidate), rows)
+            session.execute(insert(CandidateSkill), skill_rows)
+            session.commit()
+    return time.perf_counter() - start
+
+
+def resume_lines(number: int, rng: random.Random, skills: list, pages: int) -> list:
+    """Pages of lines of a plausible resume (contact, summary, skills, experience, projects)."""
+    chosen = rng.sample(skills, k=min(len(skills), rng.randint(3, 8)))
+    first = [
+        f"Applicant {number}",
+        f"applicant{number}@example.org | +1 555 {number % 10000000:07d}",
+        "Summary",
+        " ".join(rng.choice(WORDS) for _ in range(14)),
+        "Skills",
+        ", ".join(chosen),
+        "Experience",
+    ] + [" ".join(rng.choice(WORDS) for _ in range(12)) for _ in range(20)]
+    rest = [["Projects"] + [" ".join(rng.choice(WORDS) for _ in range(12)) for _ in range(40)] for _ in range(pages - 1)]
+    return [first] + rest
+
+
+def synthetic_documents(count: int, page_counts: list, docx_share: float, seed: int = 0) -> list:
+    rng = random.Random(seed + 1)
+    skills = load_taxonomy().skills
+    documents = []
+    for i in range(count):
+        pages = resume_lines(i, rng, skills, page_counts[i % len(page_counts)])
+        if rng.random() < docx_share:
+            documents.append((f"applicant{i}.docx", docx_document([line for page in pages for line in page])))
+        else:
+            documents.append((f"applicant{i}.pdf", pdf_document(pages)))
+    return documents
+
+
+def _mime(filename: str) -> str:
+    if filename.endswith(".pdf"):
+        return "application/pdf"
+    return "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+def _timed_requests(client, paths: list) -> dict:
+    latencies = []
+    for path in paths:
+        start = time.perf_counter()
+        response = client.get(path)
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return _percentiles(latencies)
+
+
+def run_pool(args) -> dict:
+    """One pool size in this process; expects DATABASE_URL etc. to point at a scratch directory."""
+    from backend.services.vector_index import candidate_store
+
+    pool_seconds = build_pool(args.pool, candidate_store.dim, args.seed)
+    documents = synthetic_documents(args.documents, args.pages, args.docx_share, args.seed)
+
+    start = time.perf_counter()
+    import backend.main
+    from fastapi.testclient import TestClient
+    import_seconds = time.perf_counter() - start
+
+    result = {"candidates": args.pool, "pool_build_seconds": round(pool_seconds, 2)}
+    start = time.perf_counter()
+    with TestClient(backend.main.app) as client:
+        client.get("/health").raise_for_status()
+        health_seconds = time.perf_counter() - start
+        while client.get("/ready").status_code != 200:
+            if time.perf_counter() - start > args.timeout:
+                raise RuntimeError(f"Not ready after {args.timeout}s: {client.get('/ready').json()}")
+            time.sleep(0.02)
+        result["startup"] = {
+            "import_seconds": round(import_seconds, 3),
+            "health_seconds": round(health_seconds, 3),
+            "ready_seconds": round(time.perf_counter() - start, 3),
+        }
+
+        # Ingestion: batches of files per request, as the frontend uploads them
+        succeeded = 0
+        start = time.perf_counter()
+        for first in range(0, len(documents), args.upload_batch):
+            batch = documents[first:first + args.upload_batch]
+            response = client.post("/api/v1/upload", files=[("files", (name, content, _mime(name))) for name, content in batch])
+            if response.status_code == 200:
+                succeeded += sum(1 for r in response.json() if r.get("status") == "success")
+        seconds = time.perf_counter() - start
+        result["upload"] = {
+            "documents": len(documents),
+            "succeeded": succeeded,
+            "seconds": round(seconds, 3),
+            "docs_per_second": round(len(documents) / seconds, 2) if documents else None,
+        }
+
+        # Ranking and listing
+        rng = random.Random(args.seed + 2)
+        skill = load_taxonomy().skills[0]
+        jobs = []
+        for i in range(args.jobs):
+            description = " ".join(rng.sample(load_taxonomy().skills, k=4) + [rng.choice(WORDS) for _ in range(30)])
+            jobs.append(client.post("/api/v1/jobs", data={"title": f"Job {i}", "description": description}).json()["job_id"])
+        ranked = [f"/api/v1/jobs/{jobs[i % len(jobs)]}/candidates?top_k={args.top_k}" for i in range(args.requests)]
+        listing = [f"/api/v1/candidates?limit=50&cursor={rng.randrange(max(1, args.pool))}" for _ in range(args.requests)]
+        result["latency"] = {
+            "ranked": _timed_requests(client, ranked),
+            "ranked_skill_filter": _timed_requests(client, [f"{path}&skill={skill}" for path in ranked]),
+            "candidates": _timed_requests(client, listing),
+            "candidates_skill_filter": _timed_requests(client, [f"{path}&skill={skill}" for path in listing]),
+        }
+        # Before shutdown stops the worker processes
+        peak_worker_rss_mb = _peak_worker_rss_mb()
+    result["memory"] = {"peak_rss_mb": _peak_rss_mb(), "peak_worker_rss_mb": peak_worker_rss_mb}
+    return result
+
+
+def _child(pool: int, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env.update({
+            "PYTHONPATH": os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")])),
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'hirex.db')}",
+            "VECTOR_INDEX_PATH": os.path.join(tmp, "hirex_index.npz"),
+            "QUEUE_SPOOL_DIR": os.path.join(tmp, "hirex_queue"),
+            "QUEUE_WORKERS": "0",  # the sample-candidate seed task would run during the measurement
+        })
+        command = [
+            sys.executable, "-m", "backend.benchmarks.load", "--pool", str(pool),
+            "--documents", str(args.documents), "--pages", *map(str, args.pages), "--docx-share", str(args.docx_share),
+            "--upload-batch", str(args.upload_batch), "--jobs", str(args.jobs), "--requests", str(args.requests),
+            "--top-k", str(args.top_k), "--seed", str(args.seed), "--timeout", str(args.timeout),
+        ]
+        out = subprocess.run(command, cwd=tmp, env=env, capture_output=True, text=True)
+        if out.returncode != 0:
+            raise RuntimeError(f"Pool {pool} failed:\n{out.stderr[-4000:]}")
+        line = next(line for line in reversed(out.stdout.splitlines()) if line.startswith("RESULT "))
+        return json.loads(line[len("RESULT "):])
+
+
+def _flatten(data: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in data.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[prefix + key] = value
+    return flat
+
+
+def regressions(results: dict, baseline: dict, max_regression: float) -> list:
+    """Metrics of the same pool sizes that got worse than the baseline by more than max_regression."""
+    previous = {run["candidates"]: _flatten(run) for run in baseline.get("runs", [])}
+    found = []
+    for run in results["runs"]:
+        old = previous.get(run["candidates"])
+        if old is None:
+            continue
+        for name, value in _flatten(run).items():
+            suffix = next((s for s in NOISE_FLOOR if name.endswith(s)), None)
+            if suffix is None or name.endswith("pool_build_seconds") or not old.get(name):
+                continue
+            higher_is_better = suffix == "per_second"
+            change = (old[name] - value) if higher_is_better else (value - old[name])
+            if change > NOISE_FLOOR[suffix] and change / old[name] > max_regression:
+                found.append({"candidates": run["candidates"], "metric": name, "baseline": old[name], "current": value})
+    return found
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, nargs="+", default=[1000, 10000], help="Synthetic pool sizes")
+    parser.add_argument("--documents", type=int, default=100, help="Resumes uploaded per pool")
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 2, 4], help="Page counts of the PDF resumes (cycled)")
+    parser.add_argument("--docx-share", type=float, default=0.3, help="Share of the resumes rendered as DOCX")
+    parser.add_argument("--upload-batch", type=int, default=10, help="Files per upload request")
+    parser.add_argument("--jobs", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=200, help="Timed requests per endpoint")
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds to wait for /ready")
+    parser.add_argument("--output", help="Write the JSON results to this file (default: stdout)")
+    parser.add_argument("--baseline", help="Earlier output file to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    parser.add_argument("--pool", type=int, help=argparse.SUPPRESS)  # one pool in this process (child run)
+    args = parser.parse_args()
+
+    if args.pool is not None:
+        print("RESULT " + json.dumps(run_pool(args)))
+        return
+
+    results = {
+        "commit": _commit(),
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "settings": {key: value for key, value in vars(args).items() if key not in ("output", "baseline", "pool")},
+        "runs": [],
+    }
+    for pool in args.candidates:
+        print(f"Running pool of {pool} candidates...", file=sys.stderr)
+        results["runs"].append(_child(pool, args))
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.max_regression)
+        for item in found:
+            print(f"Regression at {item['candidates']} candidates: {item['metric']} {item['baseline']} -> {item['current']}", file=sys.stderr)
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Document parsing throughput and tail latency: the page-level engine (parallel page chunks,
+page cap, early stop, timeouts) against reading every page serially in one task.
+
+    python -m backend.benchmarks.parsing --pdfs 40 --pages 2 10 60 --docx 20 --concurrency 4
+    python -m backend.benchmarks.parsing --corpus ./sample_resumes
+
+Without --corpus a synthetic corpus is generated: text-only PDFs of the given page counts and
+DOCX files. Every document is parsed by both modes through the CPU process pool (the pool is
+warmed up first), `--concurrency` documents at a time.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import time
+import docx
+from backend.services import parser
+from backend.services.executor import run_cpu, shutdown_executors
+
+WORDS = (
+    "python java kubernetes docker aws react sql engineer led team built platform services data "
+    "pipeline migrated improved latency deployed designed mentored project customers analytics"
+).split()
+
+
+def _lines(rng: random.Random, count: int) -> list:
+    return [" ".join(rng.choice(WORDS) for _ in range(12)) for _ in range(count)]
+
+
+def pdf_document(pages: list) -> bytes:
+    """A minimal text-only PDF (Helvetica, one content stream per page) from a list of pages of lines."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        escaped = (line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in lines)
+        stream = "BT /F1 10 Tf 12 TL 50 780 Td " + " ".join(f"({line}) '" for line in escaped) + " ET"
+        stream = stream.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id)
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % k for k in kids), len(pages))
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def docx_document(lines: list) -> bytes:
+    document = docx.Document()
+    for line in lines:
+        document.add_paragraph(line)
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+
+def synthetic_pdf(pages: int, rng: random.Random, lines_per_page: int = 45) -> bytes:
+    return pdf_document([_lines(rng, lines_per_page) for _ in range(pages)])
+
+
+def synthetic_docx(paragraphs: int, rng: random.Random) -> bytes:
+    return docx_document(_lines(rng, paragraphs))
+
+
+def load_corpus(directory: str) -> list:
+    documents = []
+    for name in sorted(os.listdir(directory)):
+        if parser.is_supported(name):
+            with open(os.path.join(directory, name), "rb") as f:
+                documents.append((name, f.read()))
+    return documents
+
+
+def synthetic_corpus(pdfs: int, page_counts: list, docx_files: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    documents = [(f"resume{i}_{page_counts[i % len(page_counts)]}p.pdf", synthetic_pdf(page_counts[i % len(page_counts)], rng)) for i in range(pdfs)]
+    documents += [(f"resume{i}.docx", synthetic_docx(60, rng)) for i in range(docx_files)]
+    return documents
+
+
+async def _serial(filename: str, content: bytes) -> str:
+    # What parsing did before: every page in one task, no limits
+    if filename.lower().endswith(".pdf"):
+        return await run_cpu(parser.read_pdf_text, content)
+    return await run_cpu(parser.read_docx_text, content)
+
+
+def _percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def measure(documents: list, parse, concurrency: int) -> dict:
+    slots = asyncio.Semaphore(concurrency)
+    latencies, chars = [], []
+
+    async def one(filename, content):
+        async with slots:
+            start = time.perf_counter()
+            text = await parse(filename, content)
+            latencies.append(time.perf_counter() - start)
+            chars.append(len(text))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(name, content) for name, content in documents))
+    total = time.perf_counter() - start
+    return {
+        "documents": len(documents),
+        "seconds": round(total, 3),
+        "docs_per_second": round(len(documents) / total, 2),
+        "p50_ms": round(_percentile(latencies, 0.5) * 1000, 1),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 1),
+        "max_ms": round(max(latencies) * 1000, 1),
+        "mean_chars": round(sum(chars) / len(chars)),
+    }
+
+
+async def run(documents: list, concurrency: int) -> dict:
+    # Start the process pool before timing (spawned workers import the parser)
+    await asyncio.gather(*(run_cpu(len, b"") for _ in range(4)))
+    try:
+        return {
+            "serial": await measure(documents, _serial, concurrency),
+            "engine": await measure(documents, parser.parse_document, concurrency),
+            "settings": {
+                "PDF_MAX_PAGES": parser.PDF_MAX_PAGES,
+                "PDF_PAGES_PER_TASK": parser.PDF_PAGES_PER_TASK,
+                "PDF_PARALLEL_TASKS": parser.PDF_PARALLEL_TASKS,
+                "PARSE_EARLY_STOP_CHARS": parser.PARSE_EARLY_STOP_CHARS,
+                "PARSE_TIMEOUT_SECONDS": parser.PARSE_TIMEOUT_SECONDS,
+            },
+        }
+    finally:
+        shutdown_executors()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--corpus", help="Directory of PDF/DOCX files (default: synthetic corpus)")
+    arg_parser.add_argument("--pdfs", type=int, default=40)
+    arg_parser.add_argument("--pages", type=int, nargs="+", default=[2, 10, 60], help="Page counts of the synthetic PDFs (cycled)")
+    arg_parser.add_argument("--docx", type=int, default=20)
+    arg_parser.add_argument("--concurrency", type=int, default=4)
+    args = arg_parser.parse_args()
+    documents = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.pdfs, args.pages, args.docx)
+    print(json.dumps(asyncio.run(run(documents, args.concurrency)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Skill extraction time as the taxonomy grows: the compiled taxonomy (one pass over the
+resume tokens) against the old approach of one substring scan per skill.
+
+    python -m backend.benchmarks.skill_extraction --sizes 20 200 2000 20000 --resumes 200
+
+Taxonomies are synthetic (one- to three-word skill names, plus the bundled taxonomy's
+skills so real matches happen) and resumes are ~600 words of random vocabulary.
+"""
+import argparse
+import json
+import random
+import string
+import time
+from backend.services.taxonomy import Taxonomy, load_taxonomy
+
+
+def synthetic_taxonomy(size: int, rng: random.Random) -> dict:
+    base = load_taxonomy()
+    skills = {skill: base.aliases[skill][1:] for skill in base.skills}
+    while len(skills) < size:
+        words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(rng.choice((1, 1, 2, 3)))]
+        skills.setdefault(" ".join(words), [])
+    return {"skills": skills, "soft_skills": {s: [] for s in base.soft_skills}, "sections": base.sections}
+
+
+def synthetic_resume(taxonomy: Taxonomy, words: int, rng: random.Random) -> str:
+    filler = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 10))) for _ in range(words)]
+    for _ in range(words // 30):
+        filler.insert(rng.randrange(len(filler)), rng.choice(taxonomy.skills))
+    return " ".join(filler)
+
+
+def naive_extract(taxonomy: Taxonomy, text: str) -> list:
+    # What the extractor did before: one scan of the text per skill
+    lower_text = text.lower()
+    return [skill for skill in taxonomy.skills + taxonomy.soft_skills if skill in lower_text]
+
+
+def run(sizes: list, resumes: int, words: int, seed: int = 0, naive_limit: int = 20000) -> list:
+    results = []
+    for size in sizes:
+        rng = random.Random(seed)
+        start = time.perf_counter()
+        taxonomy = Taxonomy.from_dict(synthetic_taxonomy(size, rng))
+        compile_seconds = time.perf_counter() - start
+        texts = [synthetic_resume(taxonomy, words, rng) for _ in range(resumes)]
+
+        start = time.perf_counter()
+        for text in texts:
+            taxonomy.extract_skills(text)
+            taxonomy.section_starts(text)
+        compiled = (time.perf_counter() - start) / resumes
+
+        result = {
+            "taxonomy_size": len(taxonomy.skills) + len(taxonomy.soft_skills),
+            "compile_seconds": round(compile_seconds, 4),
+            "compiled_ms_per_resume": round(compiled * 1000, 4),
+        }
+        if size <= naive_limit:
+            start = time.perf_counter()
+            for text in texts:
+                naive_extract(taxonomy, text)
+            result["naive_ms_per_resume"] = round((time.perf_counter() - start) / resumes * 1000, 4)
+        results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 200, 2000, 20000])
+    parser.add_argument("--resumes", type=int, default=200)
+    parser.add_argument("--words", type=int, default=600)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.sizes, args.resumes, args.words, seed=args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Import and startup time of the API: how long `import backend.main` takes, how long until
+/health answers (startup hook done) and until /ready reports the model and indexes loaded.
+
+    python -m backend.benchmarks.startup --runs 3 --candidates 0 20000
+
+Every run is a fresh interpreter. With --candidates N the run uses a temporary working
+directory whose database holds N synthetic candidates (random embeddings), so the numbers
+show how startup scales with the pool; without it the current directory's database is used.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Runs inside the child interpreter; prints one JSON line
+CHILD = """
+import json, time
+start = time.perf_counter()
+import backend.main
+imported = time.perf_counter() - start
+result = {"import_seconds": imported}
+if PHASE == "startup":
+    from fastapi.testclient import TestClient
+    start = time.perf_counter()
+    with TestClient(backend.main.app) as client:
+        assert client.get("/health").status_code == 200
+        result["health_seconds"] = time.perf_counter() - start
+        while client.get("/ready").status_code != 200:
+            if time.perf_counter() - start > TIMEOUT:
+                result["ready_seconds"] = None
+                break
+            time.sleep(0.02)
+        else:
+            result["ready_seconds"] = time.perf_counter() - start
+        result["readiness"] = client.get("/ready").json()
+print("RESULT " + json.dumps(result))
+"""
+
+
+def synthetic_database(workdir: str, candidates: int, dim: int = 384, seed: int = 0):
+    """Create hirex.db in workdir with the given number of candidates."""
+    code = f"""
+import numpy as np
+from sqlmodel import Session
+from backend.database import init_db, engine
+from backend.models import Candidate, encode_embedding
+init_db()
+rng = np.random.default_rng({seed})
+with Session(engine) as session:
+    for start in range(0, {candidates}, 1000):
+        vectors = rng.standard_normal((min(1000, {candidates} - start), {dim})).astype(np.float32)
+        session.add_all(
+            Candidate(name=f"Candidate {{start + i}}", email=f"candidate{{start + i}}@example.com",
+                      resume_text="python sql docker kubernetes react aws communication",
+                      skills='["python", "sql"]', soft_skills='["communication"]', embedding=encode_embedding(vector))
+            for i, vector in enumerate(vectors)
+        )
+        session.commit()
+"""
+    subprocess.run([sys.executable, "-c", code], cwd=workdir, env=_env(), check=True, stdout=subprocess.DEVNULL)
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))
+    env.setdefault("QUEUE_WORKERS", "0")  # the seed task would otherwise run during the measurement
+    return env
+
+
+def measure(phase: str, workdir: str, timeout: float) -> dict:
+    code = f"PHASE = {phase!r}\nTIMEOUT = {timeout}\n" + CHILD
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", code], cwd=workdir, env=_env(), capture_output=True, text=True, check=True).stdout
+    total = time.perf_counter() - start
+    line = next(line for line in reversed(out.splitlines()) if line.startswith("RESULT "))
+    result = json.loads(line[len("RESULT "):])
+    result["process_seconds"] = total
+    return result
+
+
+def _summary(values: list) -> dict:
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    return {"min": round(values[0], 4), "median": round(values[len(values) // 2], 4), "max": round(values[-1], 4)}
+
+
+def run(pool_sizes: list, runs: int, timeout: float) -> list:
+    results = []
+    for pool in pool_sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            workdir = os.getcwd()
+            if pool is not None:
+                workdir = tmp
+                synthetic_database(workdir, pool)
+            imports = [measure("import", workdir, timeout) for _ in range(runs)]
+            startups = [measure("startup", workdir, timeout) for _ in range(runs)]
+        results.append({
+            "candidates": pool,
+            "import_seconds": _summary([r["import_seconds"] for r in imports]),
+            "health_seconds": _summary([r["health_seconds"] for r in startups]),
+            "ready_seconds": _summary([r["ready_seconds"] for r in startups]),
+            "readiness": startups[-1]["readiness"],
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, nargs="*", default=None, help="Synthetic pool sizes (default: the current database)")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds to wait for /ready")
+    args = parser.parse_args()
+    print(json.dumps(run(args.candidates or [None], args.runs, args.timeout), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,36 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException
-from typing import List
+from typing import List, Optional
 from fastapi.middleware.cors import CORSMiddleware
-from backend.services.parser import parse_resume
-from backend.services.llm import extract_resume_data, get_embedding, rank_candidates
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
+from backend.services.ingestion import ingest_documents
+from backend.services.uploads import UploadSpool, UploadLimitMiddleware, RequestTooLarge
+from backend.services.llm import get_embedding, rank_candidates
+from backend.services.vector_index import candidate_store
+from backend.services.keyword_index import keyword_index
+from backend.services.lexical_index import lexical_index
+from backend.services.job_scores import materialize_enabled, materialize_job, read_job_scores, remove_candidate_scores
+from backend.services.batch_ranking import rank_jobs_batch, load_job_index, rank_candidate_jobs, BATCH_RANK_MAX_JOBS
+from backend.services.reranker import rerank_candidates, rerank_cache, rerank_enabled, RERANK_TOP_N
+from backend.services.candidates import save_candidate_store, sync_candidate_store, sync_text_indexes
+from backend.services.warmup import start_warmup, stop_warmup, wait_for_indexes, readiness
+from backend.services.metrics import timer, render_metrics, start_profile, stop_profile, server_timing, request_seconds, requests_total, METRICS_ENABLED, PROFILE_HEADER
+from backend.services.task_queue import enqueue_upload, enqueue_job, batch_status, start_queue_workers, stop_queue_workers
+from backend.services.executor import run_io, shutdown_executors
+from backend.services.resume_cache import resume_cache
 from backend.database import get_session, init_db, engine, engine
-from backend.models import Candidate, Job, JobCreate
+from backend.models import Candidate, CandidateSkill, CandidateChange, Job, JobCreate, encode_embedding, decode_embedding, candidate_to_dict, CANDIDATE_FIELDS, DEFAULT_CANDIDATE_FIELDS
 from sqlmodel import Session, select
-from fastapi import Depends, Body, Form
+from sqlalchemy import delete, func
+from datetime import datetime
+from fastapi import Depends, Body, Form, Query, Request
 import json
+import time
 
 app = FastAPI(title="HireX API", version="1.0.0")
 
+# Oversized upload requests are turned away before their body is read
+app.add_middleware(UploadLimitMiddleware)
+
 # CORS Setup (Allowing all for development, restrict in production)
 app.add_middleware(
     CORSMiddleware,
@@ -20,136 +40,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-async def seed_fake_data(session: Session):
-    candidates = session.exec(select(Candidate)).all()
-    
-    # First, fix any existing candidates with empty embeddings
-    for candidate in candidates:
-        try:
-            emb = json.loads(candidate.embedding)
-            if not emb or not isinstance(emb, list) or len(emb) == 0:
-                # Regenerate embedding for existing candidate
-                embedding_text = f"""
-                Name: {candidate.name}
-                Skills: {candidate.skills or 'N/A'}
-                Soft Skills: {candidate.soft_skills or 'N/A'}
-                Experience: {candidate.experience_summary or 'N/A'}
-                Projects: {candidate.projects or 'N/A'}
-                Certifications: {candidate.certifications or 'N/A'}
-                """
-                embedding = await get_embedding(embedding_text)
-                candidate.embedding = json.dumps(embedding)
-        except:
-            # If parsing fails, regenerate
-            embedding_text = f"""
-            Name: {candidate.name}
-            Skills: {candidate.skills or 'N/A'}
-            Soft Skills: {candidate.soft_skills or 'N/A'}
-            Experience: {candidate.experience_summary or 'N/A'}
-            Projects: {candidate.projects or 'N/A'}
-            Certifications: {candidate.certifications or 'N/A'}
-            """
-            embedding = await get_embedding(embedding_text)
-            candidate.embedding = json.dumps(embedding)
-    
-    # Always ensure the 5 dummy candidates exist
-    print("Ensuring dummy candidates exist...")
-    fake_candidates_data = [
-        {
-            "name": "Alice Johnson",
-            "email": "alice@example.com",
-            "phone": "123-456-7890",
-            "resume_text": "Experienced Software Engineer with a focus on full-stack development. Proficient in Python, React, and cloud technologies.",
-            "skills": ["Python", "React", "FastAPI", "Docker", "AWS"],
-            "soft_skills": ["Leadership", "Problem Solving"],
-            "experience_summary": "5 years as a Senior Software Engineer at Tech Corp. Led a team of 4 developers.",
-            "projects": "Built a scalable e-commerce platform.",
-            "certifications": "AWS Certified Solutions Architect"
-        },
-        {
-            "name": "Bob Smith",
-            "email": "bob@example.com",
-            "phone": "987-654-3210",
-            "resume_text": "Business Analyst with strong data analysis skills. Expert in SQL, Tableau, and financial modeling.",
-            "skills": ["SQL", "Tableau", "Excel", "Data Analysis"],
-            "soft_skills": ["Communication", "Strategic Thinking"],
-            "experience_summary": "3 years as a Business Analyst at Finance Inc. Improved reporting efficiency by 40%.",
-            "projects": "Financial forecasting dashboard.",
-            "certifications": "Google Data Analytics Professional Certificate"
-        },
-        {
-            "name": "David Kim",
-            "email": "david@example.com",
-            "phone": "555-987-6543",
-            "resume_text": "Full-stack developer specializing in React and Node.js. Strong background in fintech applications and security.",
-            "skills": ["React", "Node.js", "TypeScript", "PostgreSQL", "Security"],
-            "soft_skills": ["Team Collaboration", "Agile"],
-            "experience_summary": "4 years developing secure financial applications. Expert in React and backend APIs.",
-            "projects": "Payment processing system with fraud detection.",
-            "certifications": "Certified Secure Software Developer"
-        },
-        {
-            "name": "Emma Rodriguez",
-            "email": "emma@example.com",
-            "phone": "555-234-5678",
-            "resume_text": "Data Scientist with expertise in machine learning and statistical analysis. Proficient in Python, TensorFlow, and data visualization.",
-            "skills": ["Python", "Machine Learning", "TensorFlow", "Pandas", "Data Visualization"],
-            "soft_skills": ["Analytical Thinking", "Research"],
-            "experience_summary": "5 years in data science roles. Built predictive models for business intelligence.",
-            "projects": "Customer churn prediction model with 85% accuracy.",
-            "certifications": "Google Machine Learning Engineer Certificate"
-        },
-        {
-            "name": "Michael Chen",
-            "email": "michael@example.com",
-            "phone": "555-345-6789",
-            "resume_text": "DevOps Engineer with extensive experience in cloud infrastructure, CI/CD pipelines, and container orchestration.",
-            "skills": ["Kubernetes", "Docker", "AWS", "Terraform", "Jenkins"],
-            "soft_skills": ["Problem Solving", "Automation"],
-            "experience_summary": "6 years managing cloud infrastructure. Reduced deployment time by 70%.",
-            "projects": "Multi-cloud infrastructure automation platform.",
-            "certifications": "AWS Certified DevOps Engineer"
-        }
-    ]
-    
-    # Check which dummy candidates already exist (by email)
-    existing_emails = {c.email for c in candidates if c.email}
-    added_count = 0
-    
-    for data in fake_candidates_data:
-        # Only add if this email doesn't exist
-        if data["email"] not in existing_emails:
-            # Generate embedding from rich profile (same format as upload endpoint)
-            embedding_text = f"""
-            Name: {data['name']}
-            Skills: {', '.join(data['skills'])}
-            Soft Skills: {', '.join(data['soft_skills'])}
-            Experience: {data['experience_summary']}
-            Projects: {data['projects']}
-            Certifications: {data['certifications']}
-            """
-            embedding = await get_embedding(embedding_text)
-            
-            candidate = Candidate(
-                name=data["name"],
-                email=data["email"],
-                phone=data["phone"],
-                resume_text=data["resume_text"],
-                skills=json.dumps(data["skills"]),
-                soft_skills=json.dumps(data["soft_skills"]),
-                experience_summary=data["experience_summary"],
-                projects=data["projects"],
-                certifications=data["certifications"],
-                embedding=json.dumps(embedding)
-            )
-            session.add(candidate)
-            added_count += 1
-    
-    session.commit()
-    if added_count > 0:
-        print(f"Added {added_count} new dummy candidates. Total candidates: {len(candidates) + added_count}")
-    else:
-        print(f"All 5 dummy candidates already exist. Total candidates: {len(candidates)}")
+@app.middleware("http")
+async def measure_requests(request: Request, call_next):
+    """Request latency/count metrics; requests with the profile header get a Server-Timing header."""
+    profile = token = None
+    if request.headers.get(PROFILE_HEADER):
+        profile, token = start_profile()
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        if token is not None:
+            stop_profile(token)
+    elapsed = time.perf_counter() - start
+    # Route template (not the raw path) keeps the label set small
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    request_seconds.observe(elapsed, method=request.method, route=route)
+    requests_total.inc(method=request.method, route=route, status=response.status_code)
+    if profile is not None:
+        profile["total"] = [elapsed, 1]
+        response.headers["Server-Timing"] = server_timing(profile)
+    return response
 
 @app.on_event("startup")
 async def on_startup():
@@ -157,60 +68,32 @@ async def on_startup():
         init_db()
         print("Database initialized.")
         
-        # Seed fake data if empty
-        with Session(engine) as session:
-            await seed_fake_data(session)
+        start_queue_workers()
+        # Model, indexes and seeding happen in the background (see /ready)
+        start_warmup()
         print("Startup complete.")
     except Exception as e:
         print(f"Error during startup: {e}")
         import traceback
         traceback.print_exc()
 
-@app.post("/api/v1/seed")
-async def seed_db_endpoint(session: Session = Depends(get_session)):
-    await seed_fake_data(session)
-    candidates = session.exec(select(Candidate)).all()
-    return {"message": f"Database seeded. Total candidates: {len(candidates)}"}
+@app.on_event("shutdown")
+async def on_shutdown():
+    await stop_warmup()
+    await stop_queue_workers()
+    save_candidate_store()
+    shutdown_executors()
 
-@app.post("/api/v1/candidates/regenerate-embeddings")
-async def regenerate_embeddings(session: Session = Depends(get_session)):
-    """Regenerate embeddings for candidates that have empty or invalid embeddings."""
-    candidates = session.exec(select(Candidate)).all()
-    updated_count = 0
-    
-    for candidate in candidates:
-        try:
-            emb = json.loads(candidate.embedding)
-            # Check if embedding is empty or invalid
-            if not emb or not isinstance(emb, list) or len(emb) == 0:
-                # Generate embedding from rich profile
-                embedding_text = f"""
-                Name: {candidate.name}
-                Skills: {candidate.skills or 'N/A'}
-                Soft Skills: {candidate.soft_skills or 'N/A'}
-                Experience: {candidate.experience_summary or 'N/A'}
-                Projects: {candidate.projects or 'N/A'}
-                Certifications: {candidate.certifications or 'N/A'}
-                """
-                embedding = await get_embedding(embedding_text)
-                candidate.embedding = json.dumps(embedding)
-                updated_count += 1
-        except:
-            # If parsing fails, regenerate
-            embedding_text = f"""
-            Name: {candidate.name}
-            Skills: {candidate.skills or 'N/A'}
-            Soft Skills: {candidate.soft_skills or 'N/A'}
-            Experience: {candidate.experience_summary or 'N/A'}
-            Projects: {candidate.projects or 'N/A'}
-            Certifications: {candidate.certifications or 'N/A'}
-            """
-            embedding = await get_embedding(embedding_text)
-            candidate.embedding = json.dumps(embedding)
-            updated_count += 1
-    
-    session.commit()
-    return {"message": f"Regenerated embeddings for {updated_count} candidates"}
+@app.post("/api/v1/seed", status_code=202)
+async def seed_db_endpoint():
+    batch_id = await run_io(enqueue_job, "seed")
+    return {"message": "Seeding queued", "batch_id": batch_id}
+
+@app.post("/api/v1/candidates/regenerate-embeddings", status_code=202)
+async def regenerate_embeddings():
+    """Queue regeneration of embeddings for candidates that have empty or invalid embeddings."""
+    batch_id = await run_io(enqueue_job, "regenerate")
+    return {"message": "Embedding regeneration queued", "batch_id": batch_id}
 
 @app.get("/")
 def read_root():
@@ -220,59 +103,62 @@ def read_root():
 def health_check():
     return {"status": "ok"}
 
-@app.post("/api/v1/upload")
-async def upload_resume(files: List[UploadFile] = File(...), session: Session = Depends(get_session)):
-    results = []
-    
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text format (this process only)."""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/ready")
+def readiness_check():
+    """200 once the embedding model and the in-memory indexes are loaded, 503 while warming up."""
+    state = readiness()
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
+async def read_uploads(files: List[UploadFile], spool: UploadSpool) -> tuple:
+    """
+    Stream uploaded files into the spool as (filename, path) documents, expanding ZIP archives.
+    Files over the size limit or whose contents don't match their type are reported as errors.
+    Returns (documents, errors, slots): errors carry their "index" in upload order and slots[i]
+    is the upload-order index of documents[i] (archive entries take consecutive indexes).
+    """
+    documents = []
+    errors = []
+    slots = []
     for file in files:
         try:
-            text = await parse_resume(file)
-            if not text:
-                results.append({"filename": file.filename, "status": "error", "detail": "Could not extract text"})
-                continue
-            
-            extracted_data = await extract_resume_data(text)
-            
-            # Generate embedding from a Rich Profile
-            embedding_text = f"""
-            Name: {extracted_data.get('name')}
-            Skills: {', '.join(extracted_data.get('skills', []))}
-            Soft Skills: {', '.join(extracted_data.get('soft_skills', []))}
-            Experience: {extracted_data.get('experience_summary', '')}
-            Projects: {extracted_data.get('projects', '')}
-            Certifications: {extracted_data.get('certifications', '')}
-            """
-            embedding = await get_embedding(embedding_text)
-            
-            candidate = Candidate(
-                name=extracted_data.get("name", "Unknown"),
-                email=extracted_data.get("email"),
-                phone=extracted_data.get("phone"),
-                resume_text=text,
-                skills=json.dumps(extracted_data.get("skills", [])),
-                soft_skills=json.dumps(extracted_data.get("soft_skills", [])),
-                projects=extracted_data.get("projects"),
-                certifications=extracted_data.get("certifications"),
-                experience_summary=extracted_data.get("experience_summary"),
-                embedding=json.dumps(embedding)
-            )
-            
-            session.add(candidate)
-            session.commit()
-            session.refresh(candidate)
-            
-            results.append({
-                "filename": file.filename, 
-                "status": "success", 
-                "candidate_id": candidate.id, 
-                "parsed_data": extracted_data
-            })
-            
+            saved, rejected = await spool.save(file)
+        except RequestTooLarge:
+            raise
         except Exception as e:
-            print(f"Error processing {file.filename}: {e}")
-            import traceback
-            traceback.print_exc()
-            results.append({"filename": file.filename, "status": "error", "detail": str(e)})
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            print(f"Error reading {file.filename}: {detail}")
+            saved, rejected = [], [{"filename": file.filename, "status": "error", "detail": detail}]
+        finally:
+            await file.close()
+        for document in saved:
+            slots.append(len(documents) + len(errors))
+            documents.append(document)
+        for error in rejected:
+            errors.append({"index": len(documents) + len(errors), **error})
+    return documents, errors, slots
+
+@app.post("/api/v1/upload")
+async def upload_resume(files: List[UploadFile] = File(...), merge_duplicates: Optional[bool] = Query(None)):
+    spool = UploadSpool()
+    try:
+        documents, errors, slots = await read_uploads(files, spool)
+        
+        # Parse, extract, embed and store concurrently; report in upload order, rejected files included
+        by_index = {error.pop("index"): error for error in errors}
+        async for result in ingest_documents(documents, merge_duplicates=merge_duplicates):
+            # retryable is for the task queue only
+            result.pop("retryable", None)
+            by_index[slots[result.pop("index")]] = result
+        results = [by_index[i] for i in sorted(by_index)]
+    finally:
+        spool.close()
     
     # If all files failed, raise an error
     if all(r.get("status") == "error" for r in results):
@@ -280,6 +166,63 @@ async def upload_resume(files: List[UploadFile] = File(...), session: Session =
     
     return results
 
+@app.post("/api/v1/upload/stream")
+async def upload_resume_stream(files: List[UploadFile] = File(...), merge_duplicates: Optional[bool] = Query(None)):
+    """Same as /upload, but streams one NDJSON line per file as soon as it is processed."""
+    spool = UploadSpool()
+    try:
+        documents, errors, slots = await read_uploads(files, spool)
+    except BaseException:
+        spool.close()
+        raise
+    
+    async def stream():
+        try:
+            succeeded = 0
+            for result in errors:
+                yield json.dumps(result) + "\n"
+            async for result in ingest_documents(documents, merge_duplicates=merge_duplicates):
+                if result["status"] == "success":
+                    succeeded += 1
+                # Same upload-order index as the rejected files; retryable is for the task queue only
+                result["index"] = slots[result["index"]]
+                result.pop("retryable", None)
+                yield json.dumps(result) + "\n"
+            yield json.dumps({"status": "done", "processed": len(documents) + len(errors), "succeeded": succeeded}) + "\n"
+        finally:
+            # The spooled files are parsed by now (or the client went away)
+            spool.close()
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@app.post("/api/v1/batches", status_code=202)
+async def upload_resume_batch(files: List[UploadFile] = File(...)):
+    """Queue uploaded resumes for background ingestion and return immediately with a batch id."""
+    spool = UploadSpool()
+    try:
+        documents, errors, _ = await read_uploads(files, spool)
+        for error in errors:
+            error.pop("index")
+        if not documents:
+            raise HTTPException(status_code=400, detail=f"No resumes to process: {errors}")
+        # The spooled files are moved into the queue's spool directory
+        batch_id, total = await run_io(enqueue_upload, documents)
+    finally:
+        spool.close()
+    return {"batch_id": batch_id, "total": total, "rejected": errors}
+
+@app.get("/api/v1/batches/{batch_id}")
+async def get_batch_status(batch_id: int):
+    status = await run_io(batch_status, batch_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return status
+
+@app.get("/api/v1/cache/stats")
+async def get_resume_cache_stats():
+    """Hit rate and size of the parsed-resume cache (hit/miss counters are per process)."""
+    return await run_io(resume_cache.stats)
+
 @app.delete("/api/v1/candidates/{candidate_id}")
 async def delete_candidate(candidate_id: int, session: Session = Depends(get_session)):
     try:
@@ -287,7 +230,15 @@ async def delete_candidate(candidate_id: int, session: Session = Depends(get_ses
         if not candidate:
             raise HTTPException(status_code=404, detail="Candidate not found")
         session.delete(candidate)
+        session.exec(delete(CandidateSkill).where(CandidateSkill.candidate_id == candidate_id))
+        session.add(CandidateChange(candidate_id=candidate_id))
+        resume_cache.unlink(session, [candidate_id])
+        remove_candidate_scores(session, [candidate_id])
         session.commit()
+        candidate_store.remove(candidate_id)
+        keyword_index.remove(candidate_id)
+        lexical_index.remove(candidate_id)
+        rerank_cache.invalidate_candidate(candidate_id)
         return {"message": "Candidate deleted successfully", "candidate_id": candidate_id}
     except HTTPException:
         raise
@@ -299,11 +250,17 @@ async def delete_candidate(candidate_id: int, session: Session = Depends(get_ses
 
 @app.delete("/api/v1/candidates")
 async def delete_all_candidates(session: Session = Depends(get_session)):
-    statement = select(Candidate)
-    results = session.exec(statement).all()
-    for candidate in results:
-        session.delete(candidate)
+    # Set-based: one DELETE per table instead of loading and deleting every row
+    session.exec(delete(Candidate))
+    session.exec(delete(CandidateSkill))
+    session.add(CandidateChange(candidate_id=None))  # other processes reload (an empty table)
+    resume_cache.unlink(session)
+    remove_candidate_scores(session)
     session.commit()
+    candidate_store.clear()
+    keyword_index.clear()
+    lexical_index.clear()
+    rerank_cache.clear()
     return {"message": "All candidates deleted"}
 
 @app.post("/api/v1/jobs")
@@ -318,57 +275,236 @@ async def create_job(
     job = Job(
         title=title,
         description=description,
-        embedding=json.dumps(embedding)
+        embedding=encode_embedding(embedding)
     )
     
     session.add(job)
     session.commit()
     session.refresh(job)
     
+    # Score the pool once now; views of the job then read the stored ranking
+    if materialize_enabled() and len(embedding) > 0:
+        await wait_for_indexes()
+        await run_io(sync_candidate_store, session)
+        await run_io(sync_text_indexes, session)
+        await materialize_job(job, len(candidate_store))
+    
     return {"job_id": job.id}
 
+def parse_fields(fields: Optional[str]) -> list:
+    """Comma-separated projection from the query string (id is always included)."""
+    if not fields:
+        return DEFAULT_CANDIDATE_FIELDS
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in CANDIDATE_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return ["id"] + [f for f in requested if f != "id"]
+
+def candidate_filters(skill: Optional[List[str]], created_after: Optional[datetime], created_before: Optional[datetime]) -> list:
+    """SQL conditions for the listing filters (skills must all match)."""
+    conditions = []
+    for name in skill or []:
+        with_skill = select(CandidateSkill.candidate_id).where(CandidateSkill.skill == name.strip().lower())
+        conditions.append(Candidate.id.in_(with_skill))
+    if created_after is not None:
+        conditions.append(Candidate.created_at >= created_after)
+    if created_before is not None:
+        conditions.append(Candidate.created_at < created_before)
+    return conditions
+
 @app.get("/api/v1/candidates")
-async def get_candidates(session: Session = Depends(get_session)):
-    candidates = session.exec(select(Candidate)).all()
-    return candidates
+async def get_candidates(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[int] = Query(None, description="next_cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields; resume_text and embedding are left out by default"),
+    skill: Optional[List[str]] = Query(None),
+    created_after: Optional[datetime] = Query(None),
+    created_before: Optional[datetime] = Query(None),
+    session: Session = Depends(get_session)
+):
+    """Keyset-paginated candidate listing (ordered by id)."""
+    columns = parse_fields(fields)
+    statement = select(*[getattr(Candidate, f) for f in columns]).where(*candidate_filters(skill, created_after, created_before))
+    if cursor is not None:
+        statement = statement.where(Candidate.id > cursor)
+    # Fetch one extra row to know whether another page exists
+    statement = statement.order_by(Candidate.id).limit(limit + 1)
+    rows = await run_io(lambda: session.exec(statement).all())
+    
+    items = [candidate_to_dict(row, columns) for row in rows[:limit]]
+    next_cursor = items[-1]["id"] if len(rows) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
+
+@app.get("/api/v1/candidates/count")
+async def count_candidates(
+    skill: Optional[List[str]] = Query(None),
+    created_after: Optional[datetime] = Query(None),
+    created_before: Optional[datetime] = Query(None),
+    session: Session = Depends(get_session)
+):
+    statement = select(func.count(Candidate.id)).where(*candidate_filters(skill, created_after, created_before))
+    count = await run_io(lambda: session.exec(statement).one())
+    return {"count": count}
 
 @app.get("/api/v1/jobs/{job_id}/candidates")
-async def get_ranked_candidates(job_id: int, session: Session = Depends(get_session)):
+async def get_ranked_candidates(
+    job_id: int,
+    top_k: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
+    min_score: Optional[float] = Query(None, ge=0, le=100),
+    fields: Optional[str] = Query(None, description="Comma-separated candidate fields; resume_text and embedding are left out by default"),
+    skill: Optional[List[str]] = Query(None, description="Only rank candidates that mention all of these skills"),
+    rerank: Optional[bool] = Query(None, description="Rerank the top results with the cross-encoder (default: on when RERANK_MODEL is set)"),
+    session: Session = Depends(get_session)
+):
+    """Ranked candidates for a job; top_k and offset page through the ranking."""
+    columns = parse_fields(fields)
+    if rerank and not rerank_enabled():
+        raise HTTPException(status_code=400, detail="Reranking is not configured (set RERANK_MODEL to a local model directory)")
+    use_rerank = rerank_enabled() if rerank is None else rerank
     job = session.get(Job, job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    # 1. Fetch all candidates (SQLite doesn't do vector search efficiently, so we do in-memory)
-    statement = select(Candidate)
-    results = session.exec(statement).all()
+    # Use the embedding stored at job creation (no model inference per view)
+    with timer("rank_decode"):
+        job_embedding = decode_embedding(job.embedding)
+    if job_embedding.size == 0:
+        job_embedding = await get_embedding(job.description)
+        job.embedding = encode_embedding(job_embedding)
+        session.add(job)
+        session.commit()
     
-    # 2. Rank in-memory
-    candidates_for_ranking = []
-    for c in results:
-        try:
-            emb = json.loads(c.embedding)
-            # Skip if embedding is empty or invalid
-            if not emb or not isinstance(emb, list) or len(emb) == 0:
-                continue
-            candidates_for_ranking.append({
-                "id": c.id,
-                "text": c.resume_text, # Pass full text for keyword boosting
-                "embedding": emb
-            })
-        except:
-            continue
+    # Pick up candidates added by queue workers in other processes
+    await wait_for_indexes()
+    with timer("rank_load"):
+        await run_io(sync_candidate_store, session)
+        await run_io(sync_text_indexes, session)
     
-    ranked_data = await rank_candidates(job.description, candidates_for_ranking)
+    # 1. Must-have skills are an intersection of posting lists in the keyword index
+    candidate_ids = keyword_index.candidates_with_all(skill) if skill else None
     
-    # Merge results
+    # 2. Rank (first stage) from the materialized scores or in-memory. When reranking, retrieve
+    # at least the rerank window so the order within it does not depend on the page size
+    retrieve = offset + top_k if top_k is not None else None
+    if use_rerank and retrieve is not None:
+        retrieve = max(retrieve, RERANK_TOP_N)
+    ranked_data = None
+    if materialize_enabled() and candidate_ids is None:
+        # Repeat views: an indexed read of the materialized scores
+        with timer("rank_materialized"):
+            ranked_data = await read_job_scores(job, retrieve, min_score, len(candidate_store))
+    if ranked_data is None:
+        ranked_data = await rank_candidates(
+            job.description,
+            candidate_ids,
+            top_k=retrieve,
+            min_score=min_score,
+            query_embedding=job_embedding
+        )
+    
+    # 3. Optional second stage: cross-encoder over the top RERANK_TOP_N only
+    if use_rerank:
+        head_ids = [rank['candidate_id'] for rank in ranked_data[:RERANK_TOP_N]]
+        statement = select(Candidate.id, Candidate.resume_text).where(Candidate.id.in_(head_ids))
+        head_texts = dict(await run_io(lambda: session.exec(statement).all()))
+        ranked_data = await rerank_candidates(job.id, job.description, ranked_data, head_texts)
+    ranked_data = ranked_data[offset:offset + top_k] if top_k is not None else ranked_data[offset:]
+    
+    # 4. Load only the candidates on this page
+    page_ids = [rank['candidate_id'] for rank in ranked_data]
+    candidates_by_id = await load_candidates(session, page_ids, columns)
+    return merge_ranked(ranked_data, candidates_by_id, columns)
+
+async def load_candidates(session: Session, candidate_ids: list, columns: list) -> dict:
+    """Projected candidate rows by id."""
+    candidates_by_id = {}
+    for start in range(0, len(candidate_ids), 500):
+        # Chunked to stay under the database's bound-parameter limit
+        statement = select(*[getattr(Candidate, f) for f in columns]).where(Candidate.id.in_(candidate_ids[start:start + 500]))
+        rows = await run_io(lambda: session.exec(statement).all())
+        candidates_by_id.update((row.id, row) for row in rows)
+    return candidates_by_id
+
+def merge_ranked(ranked_data: list, candidates_by_id: dict, columns: list) -> list:
     final_response = []
     for rank in ranked_data:
-        cand = next((c for c in results if c.id == rank['candidate_id']), None)
+        cand = candidates_by_id.get(rank['candidate_id'])
         if cand:
             final_response.append({
-                "candidate": cand,
+                "candidate": candidate_to_dict(cand, columns),
                 "match_score": rank["score"],
                 "reasoning": rank["reasoning"]
             })
-            
     return final_response
+
+@app.get("/api/v1/jobs/top-candidates")
+async def get_top_candidates_for_jobs(
+    job_id: List[int] = Query(..., description="Repeat for every job: job_id=1&job_id=2"),
+    top_k: int = Query(10, ge=1, le=500),
+    fields: Optional[str] = Query(None, description="Comma-separated candidate fields; resume_text and embedding are left out by default"),
+    session: Session = Depends(get_session)
+):
+    """Best candidates for many jobs in one call, by semantic similarity (one matrix-matrix product per candidate chunk)."""
+    columns = parse_fields(fields)
+    job_ids = list(dict.fromkeys(job_id))
+    if len(job_ids) > BATCH_RANK_MAX_JOBS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_RANK_MAX_JOBS} jobs per request")
+    statement = select(Job).where(Job.id.in_(job_ids))
+    jobs = {job.id: job for job in await run_io(lambda: session.exec(statement).all())}
+    missing = [jid for jid in job_ids if jid not in jobs]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Jobs not found: {missing}")
+    
+    # 1. Stored job embeddings (jobs created before embeddings were stored get one now)
+    embeddings = {}
+    backfilled = False
+    for jid in job_ids:
+        embedding = decode_embedding(jobs[jid].embedding)
+        if embedding.size == 0:
+            embedding = await get_embedding(jobs[jid].description)
+            jobs[jid].embedding = encode_embedding(embedding)
+            session.add(jobs[jid])
+            backfilled = True
+        embeddings[jid] = embedding
+    if backfilled:
+        await run_io(session.commit)
+    
+    # 2. Pick up candidates added by other processes, then rank every job at once
+    await wait_for_indexes()
+    with timer("rank_load"):
+        await run_io(sync_candidate_store, session)
+    with timer("rank_batch"):
+        ranked = await run_io(rank_jobs_batch, embeddings, top_k)
+    
+    # 3. Load each candidate once, however many jobs it appears in
+    candidate_ids = list(dict.fromkeys(rank["candidate_id"] for jid in job_ids for rank in ranked[jid]))
+    candidates_by_id = await load_candidates(session, candidate_ids, columns)
+    return {"results": [{"job_id": jid, "candidates": merge_ranked(ranked[jid], candidates_by_id, columns)} for jid in job_ids]}
+
+@app.get("/api/v1/candidates/{candidate_id}/jobs")
+async def get_best_jobs_for_candidate(
+    candidate_id: int,
+    top_k: int = Query(10, ge=1, le=500),
+    session: Session = Depends(get_session)
+):
+    """Best matching jobs for a candidate, by semantic similarity."""
+    candidate = await run_io(session.get, Candidate, candidate_id)
+    if not candidate:
+        raise HTTPException(status_code=404, detail="Candidate not found")
+    embedding = decode_embedding(candidate.embedding)
+    if embedding.size == 0:
+        raise HTTPException(status_code=409, detail="Candidate has no embedding (regenerate embeddings first)")
+    
+    job_index = await run_io(load_job_index, session, embedding.size)
+    ranked = await run_io(rank_candidate_jobs, embedding, top_k, job_index)
+    
+    job_ids = [rank["job_id"] for rank in ranked]
+    statement = select(Job.id, Job.title, Job.created_at).where(Job.id.in_(job_ids))
+    jobs = {job.id: job for job in await run_io(lambda: session.exec(statement).all())}
+    return [
+        {"job": {"id": rank["job_id"], "title": jobs[rank["job_id"]].title, "created_at": jobs[rank["job_id"]].created_at},
+         "match_score": rank["score"], "reasoning": rank["reasoning"]}
+        for rank in ranked if rank["job_id"] in jobs
+    ]
@@ -1,11 +1,41 @@
 from typing import Optional, List
 from datetime import datetime
-from sqlmodel import SQLModel, Field, Column, JSON
+from sqlmodel import SQLModel, Field, Column, JSON, LargeBinary, Index
+import json
+import os
+import numpy as np
+
+# Embeddings are stored as a one-byte dtype tag followed by the raw little-endian vector.
+# Set EMBEDDING_STORAGE_DTYPE=float16 to halve the column size at a small precision cost.
+_DTYPE_TAGS = {b"\x04": np.dtype("<f4"), b"\x02": np.dtype("<f2")}
+_TAG_FOR_DTYPE = {"float32": b"\x04", "float16": b"\x02"}
+
+def encode_embedding(embedding) -> bytes:
+    """Pack an embedding (list or array) into the compact binary column format."""
+    if embedding is None or len(embedding) == 0:
+        return b""
+    tag = _TAG_FOR_DTYPE.get(os.getenv("EMBEDDING_STORAGE_DTYPE", "float32"), b"\x04")
+    return tag + np.asarray(embedding, dtype=_DTYPE_TAGS[tag]).tobytes()
+
+def decode_embedding(value) -> np.ndarray:
+    """
+    Unpack a stored embedding into a float32 array (empty if missing or invalid).
+    Legacy JSON strings are still understood so unmigrated rows keep working.
+    """
+    try:
+        if not value:
+            return np.zeros(0, dtype=np.float32)
+        if isinstance(value, str):
+            return np.asarray(json.loads(value), dtype=np.float32).reshape(-1)
+        dtype = _DTYPE_TAGS[bytes(value[:1])]
+        return np.frombuffer(value, dtype=dtype, offset=1).astype(np.float32)
+    except Exception:
+        return np.zeros(0, dtype=np.float32)
 
 class Candidate(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
-    email: Optional[str] = None
+    email: Optional[str] = Field(default=None, index=True)
     phone: Optional[str] = None
     resume_text: str  # Raw text from PDF
     skills: Optional[str] = None # JSON string or comma-separated
@@ -14,10 +44,58 @@ class Candidate(SQLModel, table=True):
     certifications: Optional[str] = None
     soft_skills: Optional[str] = None
     
-    # Store embedding as JSON string for SQLite
-    embedding: str = Field(default="[]")
+    # Store embedding as a compact binary blob (see encode_embedding)
+    embedding: bytes = Field(default=b"", sa_column=Column(LargeBinary))
     
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+class CandidateSkill(SQLModel, table=True):
+    """One row per (candidate, lowercased skill or soft skill), indexed for skill filters."""
+    skill: str = Field(primary_key=True)
+    candidate_id: int = Field(primary_key=True, index=True)
+
+# Listings leave out the raw resume text and the embedding unless asked for them
+CANDIDATE_FIELDS = list(Candidate.model_fields)
+DEFAULT_CANDIDATE_FIELDS = [f for f in CANDIDATE_FIELDS if f not in ("resume_text", "embedding")]
+
+def candidate_to_dict(candidate, fields: list = None) -> dict:
+    """
+    JSON-friendly view of a candidate (ORM object or projected row) limited to `fields`,
+    with the embedding expanded back into a list of floats.
+    """
+    fields = fields or CANDIDATE_FIELDS
+    data = {field: getattr(candidate, field) for field in fields}
+    if "embedding" in data:
+        data["embedding"] = decode_embedding(data["embedding"]).tolist()
+    return data
+
+def _json_list(value) -> list:
+    try:
+        items = json.loads(value) if value else []
+        return items if isinstance(items, list) else []
+    except Exception:
+        return [item.strip() for item in value.split(",") if item.strip()]
+
+class CandidateChange(SQLModel, table=True):
+    """
+    Append-only log of candidates inserted, updated or deleted, written in the same transaction as
+    the change. Every process applies just those rows to its in-memory indexes.
+    candidate_id None means every candidate was deleted.
+    """
+    id: Optional[int] = Field(default=None, primary_key=True)
+    candidate_id: Optional[int] = None
+
+def candidate_change_rows(candidate_ids) -> list:
+    return [CandidateChange(candidate_id=candidate_id) for candidate_id in candidate_ids]
+
+def skill_names(skills, soft_skills) -> list:
+    """Lowercased names in a candidate's skill lists (stored JSON strings), as CandidateSkill holds them."""
+    names = {str(s).strip().lower() for s in _json_list(skills) + _json_list(soft_skills)}
+    return [name for name in sorted(names) if name]
+
+def candidate_skill_rows(candidate_id: int, skills, soft_skills) -> list:
+    """CandidateSkill rows for a candidate's skills and soft skills (stored JSON strings)."""
+    return [CandidateSkill(skill=name, candidate_id=candidate_id) for name in skill_names(skills, soft_skills)]
 
 class Job(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -25,10 +103,71 @@ class Job(SQLModel, table=True):
     description: str
     requirements: Optional[str] = None
     
-    embedding: str = Field(default="[]")
+    embedding: bytes = Field(default=b"", sa_column=Column(LargeBinary))
     
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 class JobCreate(SQLModel):
     title: str
     description: str
+
+class IngestBatch(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str  # "upload", "regenerate" or "seed"
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class IngestTask(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    batch_id: int = Field(foreign_key="ingestbatch.id", index=True)
+    kind: str  # "resume", "regenerate" or "seed"
+    filename: Optional[str] = None
+    payload_path: Optional[str] = None  # spooled upload bytes for resume tasks
+    status: str = Field(default="pending", index=True)  # pending, running, succeeded, failed
+    attempts: int = 0
+    detail: Optional[str] = None
+    candidate_id: Optional[int] = None
+    worker: Optional[str] = None
+    # Set for tasks that must not be queued twice (e.g. "seed"); cleared once the task is done
+    unique_key: Optional[str] = Field(default=None, index=True, unique=True)
+    available_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class ParsedResume(SQLModel, table=True):
+    """Content-addressed cache of parse/extract/embed results, keyed by the SHA-256 of the file bytes."""
+    sha256: str = Field(primary_key=True)
+    resume_text: str
+    extracted_data: str  # JSON
+    embedding: bytes = Field(default=b"", sa_column=Column(LargeBinary))
+    candidate_id: Optional[int] = None  # candidate first created from this file
+    size_bytes: int = 0
+    hits: int = 0
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    last_used_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+class JobCandidateScore(SQLModel, table=True):
+    """Materialized match scores: the best MATERIALIZED_TOP_N candidates of each job."""
+    __table_args__ = (Index("ix_jobcandidatescore_job_score", "job_id", "score"),)
+
+    job_id: int = Field(primary_key=True)
+    candidate_id: int = Field(primary_key=True, index=True)
+    score: float
+    reasoning: str = ""
+
+class JobScoreState(SQLModel, table=True):
+    """
+    What a job's materialized scores were computed with, so new candidates can be scored
+    without the in-memory indexes (e.g. by a queue worker process).
+    """
+    job_id: int = Field(primary_key=True)
+    fusion: str
+    lexical_weights: str = "{}"  # JSON term -> BM25 idf for the job description's terms
+    avgdl: float = 1.0
+    lexical_max: float = 0.0  # best raw BM25 score at computation, mapped to 100
+    pool_size: int = 0  # candidates in the pool at the last full computation
+    complete: bool = True  # every candidate of the pool has a row (pool <= MATERIALIZED_TOP_N)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class SchemaMigration(SQLModel, table=True):
+    """One-time data migrations already applied to this database (skipped at later startups)."""
+    name: str = Field(primary_key=True)
+    applied_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,38 @@
+import os
+from sqlmodel import Session, select
+from backend.models import Job
+from backend.services.llm import match_reasoning
+from backend.services.vector_index import candidate_store, ExactIndex
+
+# Dashboards rank many jobs at once. Their stored embeddings are scored against the candidate
+# matrix together, one matrix-matrix product per block of BATCH_RANK_CHUNK_ROWS candidates (so
+# memory is jobs x chunk scores), instead of one full ranking per job. The ranking is by
+# semantic similarity only (no keyword fusion or boosts). The reverse query ranks the stored
+# jobs for a candidate on the same engine.
+BATCH_RANK_MAX_JOBS = int(os.getenv("BATCH_RANK_MAX_JOBS", "100"))
+BATCH_RANK_CHUNK_ROWS = int(os.getenv("BATCH_RANK_CHUNK_ROWS", "16384"))
+
+
+def _ranked(matches: list, key: str) -> list:
+    ranked = []
+    for match_id, similarity in matches:
+        score = round(similarity * 100, 2)
+        ranked.append({key: match_id, "score": score, "reasoning": match_reasoning(score, 0, [], "none")})
+    return ranked
+
+def rank_jobs_batch(job_embeddings: dict, top_k: int, index=None) -> dict:
+    """Top_k candidates ({"candidate_id", "score", "reasoning"}) for each job id in job_embeddings."""
+    index = index if index is not None else candidate_store
+    job_ids = list(job_embeddings)
+    matches = index.search_many([job_embeddings[job_id] for job_id in job_ids], top_k, BATCH_RANK_CHUNK_ROWS)
+    return {job_id: _ranked(found, "candidate_id") for job_id, found in zip(job_ids, matches)}
+
+def load_job_index(session: Session, dim: int = None) -> ExactIndex:
+    """Every job with a stored embedding in an exact index keyed by job id."""
+    index = ExactIndex(dim=dim or candidate_store.dim)
+    index.load(session.exec(select(Job.id, Job.embedding).where(Job.embedding != b"")).all())
+    return index
+
+def rank_candidate_jobs(embedding, top_k: int, job_index: ExactIndex) -> list:
+    """Top_k jobs ({"job_id", "score", "reasoning"}) for one candidate embedding."""
+    return _ranked(job_index.search_many([embedding], top_k, BATCH_RANK_CHUNK_ROWS)[0], "job_id")
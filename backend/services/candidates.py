@@ -0,0 +1,340 @@
+import json
+import os
+from sqlalchemy import delete, func, not_, or_, update
+from sqlmodel import Session, select
+from backend.database import engine
+from backend.models import Candidate, CandidateChange, encode_embedding, decode_embedding, candidate_skill_rows, candidate_change_rows, skill_names
+from backend.services.llm import encode_many
+from backend.services.ingestion import profile_text
+from backend.services.vector_index import candidate_store, VECTOR_INDEX_PATH
+from backend.services.keyword_index import keyword_index, keyword_text
+from backend.services.lexical_index import lexical_index
+from backend.services.job_scores import score_new_candidates
+
+# Change log rows kept for processes that sync late (pruned to this many once twice as many exist);
+# a process that falls further behind reloads its indexes in full
+CANDIDATE_CHANGE_RETENTION = int(os.getenv("CANDIDATE_CHANGE_RETENTION", "100000"))
+SYNC_CHUNK_SIZE = 1000
+
+# Newest change log id applied to the vector store and to the text indexes (None = not loaded)
+_synced = {"vectors": None, "text": None}
+
+def change_position(session: Session) -> int:
+    return session.exec(select(func.max(CandidateChange.id))).one() or 0
+
+def _changes_since(session: Session, position: int) -> tuple:
+    """
+    (ids of candidates changed since position, newest change id). ids is None when only a full
+    reload will do: nothing loaded yet, every candidate deleted, or the log pruned past position.
+    """
+    if position is None:
+        return None, change_position(session)
+    rows = session.exec(
+        select(CandidateChange.id, CandidateChange.candidate_id).where(CandidateChange.id > position).order_by(CandidateChange.id)
+    ).all()
+    if not rows:
+        return set(), position
+    oldest = session.exec(select(func.min(CandidateChange.id))).one()
+    ids = {candidate_id for _, candidate_id in rows}
+    if position < oldest - 1 or None in ids:
+        return None, rows[-1][0]
+    return ids, rows[-1][0]
+
+def _changed_rows(session: Session, columns: list, ids: set):
+    """Current rows of the changed candidates (deleted ones are missing), in chunks."""
+    ids = sorted(ids)
+    for start in range(0, len(ids), SYNC_CHUNK_SIZE):
+        chunk = ids[start:start + SYNC_CHUNK_SIZE]
+        yield chunk, session.exec(select(*columns).where(Candidate.id.in_(chunk))).all()
+
+def prune_changes():
+    """Drop the oldest change log rows once more than twice CANDIDATE_CHANGE_RETENTION exist."""
+    with Session(engine) as session:
+        oldest, newest = session.exec(select(func.min(CandidateChange.id), func.max(CandidateChange.id))).one()
+        if newest is None or newest - oldest < 2 * CANDIDATE_CHANGE_RETENTION:
+            return
+        session.exec(delete(CandidateChange).where(CandidateChange.id <= newest - CANDIDATE_CHANGE_RETENTION))
+        session.commit()
+
+def load_candidate_store(session: Session):
+    """
+    Fill the shared vector index. The persisted index file is reused when it holds exactly the
+    candidates that have embeddings; otherwise every embedding is decoded once and the index rebuilt.
+    """
+    if candidate_store.kind == "pgvector":
+        filled = candidate_store.sync(session)
+        print(f"Vector column (pgvector) holds {len(candidate_store)} candidates ({filled} filled).")
+        return
+    # Taken first: changes committed while loading are applied again by the next sync
+    position = change_position(session)
+    ids = session.exec(select(Candidate.id).where(not_(missing_embedding()))).all()
+    if candidate_store.load_file(VECTOR_INDEX_PATH, expected_ids=ids):
+        _synced["vectors"] = position
+        print(f"Loaded vector index ({candidate_store.kind}) with {len(candidate_store)} candidates from {getattr(candidate_store, 'directory', VECTOR_INDEX_PATH)}.")
+        return
+    rows = session.exec(select(Candidate.id, Candidate.embedding)).all()
+    candidate_store.load(rows)
+    _synced["vectors"] = position
+    save_candidate_store()
+    print(f"Built vector index ({candidate_store.kind}) with {len(candidate_store)} candidates.")
+
+def sync_candidate_store(session: Session):
+    """
+    Pick up candidates inserted, updated or deleted by any process (uvicorn workers, queue
+    workers) since the last sync: the change log names them, and only those rows are re-read.
+    """
+    if candidate_store.kind == "pgvector":
+        # The database is the index; just fill vectors of rows written since the last sync
+        candidate_store.sync(session)
+        return
+    ids, position = _changes_since(session, _synced["vectors"])
+    if ids is None:
+        rows = session.exec(select(Candidate.id, Candidate.embedding)).all()
+        candidate_store.load(rows)
+    elif ids:
+        for chunk, rows in _changed_rows(session, [Candidate.id, Candidate.embedding], ids):
+            found = dict(rows)
+            for candidate_id in chunk:
+                if candidate_id in found:
+                    candidate_store.upsert(candidate_id, decode_embedding(found[candidate_id]))
+                else:
+                    candidate_store.remove(candidate_id)
+    _synced["vectors"] = position
+    if ids:
+        prune_changes()
+
+def _keyword_rows(rows):
+    for candidate_id, resume_text, skills, soft_skills in rows:
+        yield candidate_id, keyword_text(resume_text, skills, soft_skills), skill_names(skills, soft_skills)
+
+TEXT_COLUMNS = [Candidate.id, Candidate.resume_text, Candidate.skills, Candidate.soft_skills]
+
+def load_text_indexes(session: Session):
+    """Build the keyword and BM25 indexes from every candidate's resume text and skill lists."""
+    position = change_position(session)
+    rows = session.exec(select(*TEXT_COLUMNS).execution_options(yield_per=1000))
+    keyword_index.clear()
+    lexical_index.clear()
+    for candidate_id, text, skills in _keyword_rows(rows):
+        keyword_index.add(candidate_id, text, skills)
+        lexical_index.add(candidate_id, text)
+    keyword_index.loaded = lexical_index.loaded = True
+    _synced["text"] = position
+    print(f"Built keyword indexes with {len(keyword_index)} candidates.")
+
+def sync_text_indexes(session: Session):
+    """Same change log sync as sync_candidate_store, for the keyword and BM25 indexes."""
+    ids, position = _changes_since(session, _synced["text"])
+    if ids is None:
+        load_text_indexes(session)
+        _synced["text"] = position
+        return
+    for chunk, rows in _changed_rows(session, TEXT_COLUMNS, ids):
+        for candidate_id, text, skills in _keyword_rows(rows):
+            keyword_index.add(candidate_id, text, skills)
+            lexical_index.add(candidate_id, text)
+        for candidate_id in set(chunk) - {row[0] for row in rows}:
+            keyword_index.remove(candidate_id)
+            lexical_index.remove(candidate_id)
+    _synced["text"] = position
+
+def save_candidate_store():
+    if not candidate_store.loaded:
+        # Never overwrite a good index file with a store that was not loaded yet
+        return
+    try:
+        candidate_store.save(VECTOR_INDEX_PATH)
+    except Exception as e:
+        print(f"Error saving vector index: {e}")
+
+def stored_profile_text(candidate: Candidate) -> str:
+    return profile_text(
+        candidate.name,
+        candidate.skills or 'N/A',
+        candidate.soft_skills or 'N/A',
+        candidate.experience_summary or 'N/A',
+        candidate.projects or 'N/A',
+        candidate.certifications or 'N/A',
+    )
+
+def missing_embedding():
+    """
+    SQL predicate for candidates without a usable embedding: NULL, empty, or a blob whose size
+    is not one vector of the index dimension (float32 or float16 plus the dtype tag).
+    """
+    valid_sizes = [1 + itemsize * candidate_store.dim for itemsize in (4, 2)]
+    return or_(Candidate.embedding.is_(None), func.length(Candidate.embedding).not_in(valid_sizes))
+
+# Candidates embedded and committed per round of regenerate_missing_embeddings
+REGENERATE_CHUNK_SIZE = int(os.getenv("REGENERATE_CHUNK_SIZE", "256"))
+
+async def regenerate_missing_embeddings(session: Session, chunk_size: int = REGENERATE_CHUNK_SIZE) -> int:
+    """
+    Regenerate embeddings for candidates that have empty or invalid embeddings.
+    Walks the matching ids in chunks (keyset on id), so memory stays bounded by one chunk:
+    each chunk is embedded in batched model calls and written back in one bulk UPDATE.
+    """
+    updated_count = 0
+    last_id = 0
+    while True:
+        rows = session.exec(
+            select(
+                Candidate.id, Candidate.name, Candidate.resume_text, Candidate.skills, Candidate.soft_skills,
+                Candidate.experience_summary, Candidate.projects, Candidate.certifications,
+            )
+            .where(missing_embedding(), Candidate.id > last_id)
+            .order_by(Candidate.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        embeddings = await encode_many([stored_profile_text(row) for row in rows])
+        done = [(row, embedding) for row, embedding in zip(rows, embeddings) if len(embedding) > 0]
+        if done:
+            session.execute(update(Candidate), [{"id": row.id, "embedding": encode_embedding(embedding)} for row, embedding in done])
+            session.add_all(candidate_change_rows(row.id for row, _ in done))
+            session.commit()
+            score_new_candidates([
+                (row.id, embedding, keyword_text(row.resume_text, row.skills, row.soft_skills)) for row, embedding in done
+            ])
+            for row, embedding in done:
+                candidate_store.upsert(row.id, embedding)
+            updated_count += len(done)
+        if len(rows) < chunk_size:
+            break
+    if updated_count:
+        candidate_store.rebuild()
+        save_candidate_store()
+    return updated_count
+
+# The 5 dummy candidates the app is seeded with
+FAKE_CANDIDATES = [
+    {
+        "name": "Alice Johnson",
+        "email": "alice@example.com",
+        "phone": "123-456-7890",
+        "resume_text": "Experienced Software Engineer with a focus on full-stack development. Proficient in Python, React, and cloud technologies.",
+        "skills": ["Python", "React", "FastAPI", "Docker", "AWS"],
+        "soft_skills": ["Leadership", "Problem Solving"],
+        "experience_summary": "5 years as a Senior Software Engineer at Tech Corp. Led a team of 4 developers.",
+        "projects": "Built a scalable e-commerce platform.",
+        "certifications": "AWS Certified Solutions Architect"
+    },
+    {
+        "name": "Bob Smith",
+        "email": "bob@example.com",
+        "phone": "987-654-3210",
+        "resume_text": "Business Analyst with strong data analysis skills. Expert in SQL, Tableau, and financial modeling.",
+        "skills": ["SQL", "Tableau", "Excel", "Data Analysis"],
+        "soft_skills": ["Communication", "Strategic Thinking"],
+        "experience_summary": "3 years as a Business Analyst at Finance Inc. Improved reporting efficiency by 40%.",
+        "projects": "Financial forecasting dashboard.",
+        "certifications": "Google Data Analytics Professional Certificate"
+    },
+    {
+        "name": "David Kim",
+        "email": "david@example.com",
+        "phone": "555-987-6543",
+        "resume_text": "Full-stack developer specializing in React and Node.js. Strong background in fintech applications and security.",
+        "skills": ["React", "Node.js", "TypeScript", "PostgreSQL", "Security"],
+        "soft_skills": ["Team Collaboration", "Agile"],
+        "experience_summary": "4 years developing secure financial applications. Expert in React and backend APIs.",
+        "projects": "Payment processing system with fraud detection.",
+        "certifications": "Certified Secure Software Developer"
+    },
+    {
+        "name": "Emma Rodriguez",
+        "email": "emma@example.com",
+        "phone": "555-234-5678",
+        "resume_text": "Data Scientist with expertise in machine learning and statistical analysis. Proficient in Python, TensorFlow, and data visualization.",
+        "skills": ["Python", "Machine Learning", "TensorFlow", "Pandas", "Data Visualization"],
+        "soft_skills": ["Analytical Thinking", "Research"],
+        "experience_summary": "5 years in data science roles. Built predictive models for business intelligence.",
+        "projects": "Customer churn prediction model with 85% accuracy.",
+        "certifications": "Google Machine Learning Engineer Certificate"
+    },
+    {
+        "name": "Michael Chen",
+        "email": "michael@example.com",
+        "phone": "555-345-6789",
+        "resume_text": "DevOps Engineer with extensive experience in cloud infrastructure, CI/CD pipelines, and container orchestration.",
+        "skills": ["Kubernetes", "Docker", "AWS", "Terraform", "Jenkins"],
+        "soft_skills": ["Problem Solving", "Automation"],
+        "experience_summary": "6 years managing cloud infrastructure. Reduced deployment time by 70%.",
+        "projects": "Multi-cloud infrastructure automation platform.",
+        "certifications": "AWS Certified DevOps Engineer"
+    }
+]
+
+def dummy_candidates_missing(session: Session) -> bool:
+    """Indexed lookup of the dummy emails, so startup can decide without scanning candidates."""
+    emails = [data["email"] for data in FAKE_CANDIDATES]
+    found = session.exec(select(func.count(Candidate.id)).where(Candidate.email.in_(emails))).one()
+    return found < len(emails)
+
+async def seed_fake_data(session: Session):
+    # First, fix any existing candidates with empty or invalid embeddings
+    repaired = await regenerate_missing_embeddings(session)
+    if repaired:
+        print(f"Regenerated embeddings for {repaired} candidates.")
+    
+    # Always ensure the 5 dummy candidates exist
+    print("Ensuring dummy candidates exist...")
+    fake_candidates_data = FAKE_CANDIDATES
+    
+    # Check which dummy candidates already exist (by email)
+    existing_emails = set(session.exec(
+        select(Candidate.email).where(Candidate.email.in_([data["email"] for data in fake_candidates_data]))
+    ).all())
+    # Only add if this email doesn't exist
+    new_candidates = [data for data in fake_candidates_data if data["email"] not in existing_emails]
+    
+    # Generate embeddings from rich profiles (same format as upload endpoint) in one batch
+    embeddings = await encode_many([
+        profile_text(
+            data['name'],
+            ', '.join(data['skills']),
+            ', '.join(data['soft_skills']),
+            data['experience_summary'],
+            data['projects'],
+            data['certifications'],
+        )
+        for data in new_candidates
+    ])
+    
+    added = []
+    added_skills = []
+    for data, embedding in zip(new_candidates, embeddings):
+        candidate = Candidate(
+            name=data["name"],
+            email=data["email"],
+            phone=data["phone"],
+            resume_text=data["resume_text"],
+            skills=json.dumps(data["skills"]),
+            soft_skills=json.dumps(data["soft_skills"]),
+            experience_summary=data["experience_summary"],
+            projects=data["projects"],
+            certifications=data["certifications"],
+            embedding=encode_embedding(embedding)
+        )
+        session.add(candidate)
+        session.flush()
+        session.add_all(candidate_skill_rows(candidate.id, candidate.skills, candidate.soft_skills))
+        session.add_all(candidate_change_rows([candidate.id]))
+        added.append((candidate.id, embedding, keyword_text(candidate.resume_text, candidate.skills, candidate.soft_skills)))
+        added_skills.append(skill_names(candidate.skills, candidate.soft_skills))
+    added_count = len(new_candidates)
+    
+    session.commit()
+    score_new_candidates(added)
+    # Add just the new rows to the in-memory indexes instead of reloading them
+    for (candidate_id, embedding, text), skills in zip(added, added_skills):
+        candidate_store.upsert(candidate_id, embedding)
+        keyword_index.add(candidate_id, text, skills)
+        lexical_index.add(candidate_id, text)
+    total = session.exec(select(func.count(Candidate.id))).one()
+    if added_count > 0:
+        print(f"Added {added_count} new dummy candidates. Total candidates: {total}")
+    else:
+        print(f"All 5 dummy candidates already exist. Total candidates: {total}")
@@ -0,0 +1,52 @@
+import os
+
+# How the embedding model is executed on CPU. All backends load the same model
+# (EMBEDDING_MODEL, a hub name or a local directory) and return vectors of the same size:
+#   torch      - fp32 PyTorch (default)
+#   torch-int8 - PyTorch with dynamic int8 quantization of the Linear layers
+#   onnx       - ONNX Runtime (EMBEDDING_ONNX_FILE picks a specific file inside the model directory)
+#   onnx-int8  - ONNX Runtime with a dynamically int8-quantized export; created on first use
+#                next to the model (or under EMBEDDING_EXPORT_DIR for hub names)
+EMBEDDING_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "")
+EMBEDDING_QUANTIZATION = os.getenv("EMBEDDING_QUANTIZATION", "avx2")  # arm64, avx2, avx512 or avx512_vnni
+EMBEDDING_EXPORT_DIR = os.getenv("EMBEDDING_EXPORT_DIR", "./hirex_models")
+
+
+def _export_dir(name: str) -> str:
+    if os.path.isdir(name):
+        return name
+    return os.path.join(EMBEDDING_EXPORT_DIR, name.replace("/", "__"))
+
+def _load_onnx_int8(name: str, quantization: str):
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    directory = _export_dir(name)
+    file_name = f"onnx/model_qint8_{quantization}.onnx"
+    if not os.path.isfile(os.path.join(directory, file_name)):
+        print(f"Exporting int8 ONNX model ({quantization}) to {directory}...")
+        model = SentenceTransformer(name, device="cpu", backend="onnx")
+        if directory != name:
+            model.save(directory)
+        export_dynamic_quantized_onnx_model(model, quantization, directory)
+    return SentenceTransformer(directory, device="cpu", backend="onnx", model_kwargs={"file_name": file_name})
+
+def load_embedding_model(name: str, backend: str = EMBEDDING_BACKEND):
+    """A SentenceTransformer for the model running on the given backend (see EMBEDDING_BACKENDS)."""
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND {backend!r} (expected one of {', '.join(EMBEDDING_BACKENDS)})")
+    # sentence_transformers pulls in torch, which alone takes seconds to import
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        return SentenceTransformer(name)
+    if backend == "torch-int8":
+        import torch
+
+        model = SentenceTransformer(name, device="cpu")
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if backend == "onnx":
+        model_kwargs = {"file_name": EMBEDDING_ONNX_FILE} if EMBEDDING_ONNX_FILE else None
+        return SentenceTransformer(name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+    return _load_onnx_int8(name, EMBEDDING_QUANTIZATION)
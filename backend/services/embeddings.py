@@ -0,0 +1,57 @@
+import asyncio
+
+class MicroBatcher:
+    """
+    Merges single embedding requests that arrive within a short window into one batched
+    model call. A batch is flushed when it reaches max_batch_size or when the oldest
+    request has waited max_wait_ms.
+    runner (e.g. an executor's run coroutine) keeps the model call off the event loop.
+    """
+
+    def __init__(self, encode_fn, max_batch_size: int = 32, max_wait_ms: float = 5.0, runner=None):
+        self.encode_fn = encode_fn  # list[str] -> list[list[float]]
+        self.runner = runner
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._pending = []  # (text, future)
+        self._timer = None
+        self._tasks = set()  # in-flight batches (kept referenced until done)
+
+    async def submit(self, text: str) -> list:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch = self._pending[:self.max_batch_size]
+        self._pending = self._pending[self.max_batch_size:]
+        if self._pending:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+        if batch:
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: list):
+        texts = [text for text, _ in batch]
+        try:
+            if self.runner is not None:
+                vectors = await self.runner(self.encode_fn, texts)
+            else:
+                vectors = self.encode_fn(texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
@@ -0,0 +1,92 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+# Worker counts and how many extra tasks may queue per pool before callers have to wait
+IO_WORKERS = int(os.getenv("IO_WORKERS", "8"))
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "1"))
+EXECUTOR_QUEUE_SIZE = int(os.getenv("EXECUTOR_QUEUE_SIZE", "64"))
+
+
+class BoundedExecutor:
+    """
+    Runs blocking callables on a pool without blocking the event loop.
+    At most workers + queue_size tasks are in flight; further callers wait for a slot,
+    which pushes back on request handlers instead of piling up unbounded work.
+    """
+
+    def __init__(self, name: str, factory, workers: int, queue_size: int = EXECUTOR_QUEUE_SIZE):
+        self.name = name
+        self.workers = max(1, workers)
+        self.limit = self.workers + max(0, queue_size)
+        self._factory = factory
+        self._pool = None
+        self._slots = None
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            self._pool = self._factory(self.workers)
+        return self._pool
+
+    async def run(self, fn, *args, **kwargs):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.limit)
+        slots = self._slots
+        await slots.acquire()
+        try:
+            future = self.pool.submit(functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            slots.release()
+            raise
+        # The slot is held until the work itself is done: a cancelled caller stops waiting, but a
+        # task already running in a worker keeps it busy (a queued one is cancelled with the caller)
+        loop = asyncio.get_running_loop()
+        future.add_done_callback(lambda _: _release(loop, slots))
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self._slots = None
+
+
+def _release(loop, slots: asyncio.Semaphore):
+    # Called from the worker thread that finished the task
+    try:
+        loop.call_soon_threadsafe(slots.release)
+    except RuntimeError:
+        pass  # the loop is closed (shutdown)
+
+def _process_pool(workers: int) -> ProcessPoolExecutor:
+    # spawn (not fork): the parent holds torch threads and sockets that must not be forked
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+def _thread_pool(prefix: str):
+    return lambda workers: ThreadPoolExecutor(max_workers=workers, thread_name_prefix=prefix)
+
+
+# Thread pool for blocking I/O (database, files), process pool for document parsing and
+# text extraction, and a dedicated thread pool for model inference (torch releases the GIL,
+# so threads share one copy of the model instead of loading it in every process).
+io_executor = BoundedExecutor("io", _thread_pool("hirex-io"), IO_WORKERS)
+cpu_executor = BoundedExecutor("cpu", _process_pool, CPU_WORKERS)
+inference_executor = BoundedExecutor("inference", _thread_pool("hirex-inference"), INFERENCE_WORKERS)
+
+async def run_io(fn, *args, **kwargs):
+    return await io_executor.run(fn, *args, **kwargs)
+
+async def run_cpu(fn, *args, **kwargs):
+    """fn and its arguments must be picklable (module-level functions, bytes, str)."""
+    return await cpu_executor.run(fn, *args, **kwargs)
+
+async def run_inference(fn, *args, **kwargs):
+    return await inference_executor.run(fn, *args, **kwargs)
+
+def shutdown_executors():
+    for executor in (io_executor, cpu_executor, inference_executor):
+        executor.shutdown()
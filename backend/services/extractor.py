@@ -0,0 +1,71 @@
+import re
+from backend.services.taxonomy import taxonomy
+
+def extract_resume_fields(text: str) -> dict:
+    """
+    Heuristic/Regex based extraction since we don't have an LLM key.
+    """
+    data = {}
+    
+    # 1. Email
+    email_match = re.search(r'[\w\.-]+@[\w\.-]+\.\w+', text)
+    data["email"] = email_match.group(0) if email_match else None
+    
+    # 2. Phone
+    phone_match = re.search(r'(\+\d{1,2}\s)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}', text)
+    data["phone"] = phone_match.group(0) if phone_match else None
+    
+    # 3. Name (Skip headers like RESUME, CV, look for actual name patterns)
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    skip_words = ["resume", "cv", "curriculum vitae", "personal details", "contact", "profile", "summary"]
+    
+    name = "Unknown"
+    for line in lines[:10]:  # Check first 10 lines
+        line_lower = line.lower()
+        # Skip lines that are just headers
+        if any(skip in line_lower for skip in skip_words):
+            continue
+        # Skip lines that look like section headers (all caps or have colons)
+        if line.isupper() and len(line) > 15:
+            continue
+        if ":" in line or "@" in line or "phone" in line_lower or "email" in line_lower:
+            continue
+        # Skip lines with URLs
+        if "http" in line_lower or "www" in line_lower or ".com" in line_lower:
+            continue
+        # This might be a name - should be 2-4 words, mostly letters
+        words = line.split()
+        if 1 <= len(words) <= 5 and all(w.replace('.', '').replace(',', '').isalpha() for w in words):
+            name = line.title()  # Capitalize properly
+            break
+    
+    data["name"] = name
+    
+    # 4. Skills and 5. Soft Skills (whole-word matching against the taxonomy, one pass over the text)
+    lower_text = text.lower()
+    data["skills"], data["soft_skills"] = taxonomy.extract_skills(text)
+
+    # 6. Robust Section Extraction with Synonyms
+    # Every synonym from the taxonomy is located in one scan; a section starts at its
+    # highest-priority synonym and we take the next few lines
+    section_starts = taxonomy.section_starts(lower_text)
+
+    def extract_section(name, max_lines=15):
+        start_idx = section_starts.get(name)
+        if start_idx is None:
+            return None
+        # Extract next N lines
+        lines = text[start_idx:].split('\n')[1:max_lines+1]
+        return "\n".join(lines).strip()
+
+    data["projects"] = extract_section("projects")
+    data["certifications"] = extract_section("certifications")
+    
+    # 7. Experience Summary (Try to extract actual section first, fallback to first 800 chars)
+    extracted_exp = extract_section("experience", max_lines=20)
+    if extracted_exp:
+        data["experience_summary"] = extracted_exp.replace("\n", " ") + "..."
+    else:
+        data["experience_summary"] = text[:800].replace("\n", " ") + "..."
+    
+    return data
@@ -0,0 +1,229 @@
+import asyncio
+import json
+import os
+from fastapi import HTTPException
+from sqlmodel import Session
+from backend.database import engine
+from backend.models import Candidate, encode_embedding, candidate_skill_rows, candidate_change_rows, skill_names
+from backend.services.parser import parse_document, source_size
+from backend.services.llm import extract_resume_data, get_embedding
+from backend.services.executor import run_io, CPU_WORKERS
+from backend.services.vector_index import candidate_store
+from backend.services.keyword_index import keyword_index, keyword_text
+from backend.services.lexical_index import lexical_index
+from backend.services.job_scores import score_new_candidates
+from backend.services.resume_cache import resume_cache, content_hash, RESUME_DEDUP_MODE
+from backend.services.metrics import timer, candidates_written_total, documents_total
+
+# Files processed concurrently, and how many finished resumes are written per commit
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", str(max(2, CPU_WORKERS * 2))))
+INGEST_WRITE_BATCH = int(os.getenv("INGEST_WRITE_BATCH", "50"))
+
+
+def profile_text(name, skills, soft_skills, experience, projects, certifications) -> str:
+    """Rich profile text that candidate embeddings are generated from."""
+    return f"""
+            Name: {name}
+            Skills: {skills}
+            Soft Skills: {soft_skills}
+            Experience: {experience}
+            Projects: {projects}
+            Certifications: {certifications}
+            """
+
+def extracted_profile_text(extracted_data: dict) -> str:
+    return profile_text(
+        extracted_data.get('name'),
+        ', '.join(extracted_data.get('skills', [])),
+        ', '.join(extracted_data.get('soft_skills', [])),
+        extracted_data.get('experience_summary', ''),
+        extracted_data.get('projects', ''),
+        extracted_data.get('certifications', ''),
+    )
+
+def candidate_from_extracted(text: str, extracted_data: dict, embedding) -> Candidate:
+    return Candidate(
+        name=extracted_data.get("name", "Unknown"),
+        email=extracted_data.get("email"),
+        phone=extracted_data.get("phone"),
+        resume_text=text,
+        skills=json.dumps(extracted_data.get("skills", [])),
+        soft_skills=json.dumps(extracted_data.get("soft_skills", [])),
+        projects=extracted_data.get("projects"),
+        certifications=extracted_data.get("certifications"),
+        experience_summary=extracted_data.get("experience_summary"),
+        embedding=encode_embedding(embedding)
+    )
+
+
+
+def _write_batch(batch: list) -> list:
+    """
+    Insert a batch of candidates in one transaction, together with cache entries for
+    freshly parsed files. Returns the new ids.
+    """
+    with Session(engine, expire_on_commit=False) as session:
+        candidates = [item["candidate"] for item in batch]
+        session.add_all(candidates)
+        session.flush()
+        for candidate in candidates:
+            session.add_all(candidate_skill_rows(candidate.id, candidate.skills, candidate.soft_skills))
+        session.add_all(candidate_change_rows(candidate.id for candidate in candidates))
+        if resume_cache.enabled:
+            for item, candidate in zip(batch, candidates):
+                if item["cached"]:
+                    resume_cache.link(session, item["digest"], candidate.id)
+                    continue
+                if len(item["embedding"]) == 0:
+                    # Embedding failed; regeneration fills the candidate, the file is parsed again next time
+                    continue
+                # merge: the same file may have been cached concurrently by another worker
+                session.merge(resume_cache.entry(
+                    item["digest"], candidate.resume_text, item["extracted_data"],
+                    item["embedding"], candidate.id, item["size_bytes"],
+                ))
+            resume_cache.evict(session)
+        session.commit()
+        return [candidate.id for candidate in candidates]
+
+def _index_batch(batch: list, ids: list, update_indexes: bool = True) -> list:
+    """
+    Add written candidates to the in-memory vector, keyword and BM25 indexes (blocking: run via
+    run_io). Returns their (candidate_id, embedding, text) for scoring against the jobs.
+    """
+    scores = []
+    for item, candidate_id in zip(batch, ids):
+        candidate = item["candidate"]
+        text = keyword_text(candidate.resume_text, candidate.skills, candidate.soft_skills)
+        if update_indexes:
+            candidate_store.upsert(candidate_id, item["embedding"])
+            keyword_index.add(candidate_id, text, skill_names(candidate.skills, candidate.soft_skills))
+            lexical_index.add(candidate_id, text)
+        scores.append((candidate_id, item["embedding"], text))
+    return scores
+
+def _existing_candidate(candidate_id: int) -> bool:
+    if candidate_id is None:
+        return False
+    with Session(engine) as session:
+        return session.get(Candidate, candidate_id) is not None
+
+
+async def ingest_documents(documents: list, concurrency: int = INGEST_CONCURRENCY, write_batch: int = INGEST_WRITE_BATCH, merge_duplicates: bool = None, update_indexes: bool = True):
+    """
+    Run parse -> extract -> embed concurrently across documents and write finished resumes in
+    bulk commits. Yields one result dict per document as soon as it is done (completion order).
+    documents is a list of (filename, bytes or spooled file path). Files seen before are served from the resume cache;
+    with merge_duplicates they resolve to the existing candidate instead of a new row.
+    update_indexes=False skips the in-memory indexes (processes that never rank, e.g. standalone
+    queue workers; the API picks the new rows up from the database).
+    """
+    if merge_duplicates is None:
+        merge_duplicates = RESUME_DEDUP_MODE == "merge"
+    results = asyncio.Queue()
+    to_write = asyncio.Queue()
+    slots = asyncio.Semaphore(max(1, concurrency))
+
+    async def process(index: int, filename: str, content):
+        async with slots:
+            try:
+                digest = await run_io(content_hash, content)
+                cached = await run_io(resume_cache.lookup, digest)
+                if cached is not None:
+                    if merge_duplicates and await run_io(_existing_candidate, cached["candidate_id"]):
+                        await results.put({
+                            "index": index,
+                            "filename": filename,
+                            "status": "success",
+                            "candidate_id": cached["candidate_id"],
+                            "parsed_data": cached["extracted_data"],
+                            "duplicate": True
+                        })
+                        return
+                    text, extracted_data, embedding = cached["text"], cached["extracted_data"], cached["embedding"]
+                else:
+                    text = await parse_document(filename, content)
+                    if not text:
+                        await results.put({"index": index, "filename": filename, "status": "error", "detail": "Could not extract text", "retryable": False})
+                        return
+                    extracted_data = await extract_resume_data(text)
+                    # Concurrent calls are merged into batched model calls by the micro-batcher
+                    embedding = await get_embedding(extracted_profile_text(extracted_data))
+                candidate = candidate_from_extracted(text, extracted_data, embedding)
+                await to_write.put({
+                    "index": index,
+                    "filename": filename,
+                    "extracted_data": extracted_data,
+                    "embedding": embedding,
+                    "candidate": candidate,
+                    "digest": digest,
+                    "size_bytes": source_size(content),
+                    "cached": cached is not None,
+                })
+            except Exception as e:
+                print(f"Error processing {filename}: {e}")
+                # Rejected input (e.g. unsupported format) will fail the same way again
+                retryable = not isinstance(e, HTTPException)
+                await results.put({"index": index, "filename": filename, "status": "error", "detail": str(e), "retryable": retryable})
+
+    async def writer():
+        done = False
+        while not done:
+            item = await to_write.get()
+            if item is None:
+                break
+            batch = [item]
+            # Take whatever else is already finished, up to the batch size
+            while len(batch) < write_batch and not to_write.empty():
+                item = to_write.get_nowait()
+                if item is None:
+                    done = True
+                    break
+                batch.append(item)
+            try:
+                with timer("db_commit"):
+                    ids = await run_io(_write_batch, batch)
+                candidates_written_total.inc(len(ids))
+            except Exception as e:
+                print(f"Error saving candidates: {e}")
+                for item in batch:
+                    await results.put({"index": item["index"], "filename": item["filename"], "status": "error", "detail": str(e), "retryable": True})
+                continue
+            # Tokenizing and index updates are CPU work, kept off the event loop
+            scores = await run_io(_index_batch, batch, ids, update_indexes)
+            try:
+                # Only the new candidates are scored against the jobs' materialized rankings
+                await run_io(score_new_candidates, scores)
+            except Exception as e:
+                print(f"Error updating job scores: {e}")
+            for item, candidate_id in zip(batch, ids):
+                await results.put({
+                    "index": item["index"],
+                    "filename": item["filename"],
+                    "status": "success",
+                    "candidate_id": candidate_id,
+                    "parsed_data": item["extracted_data"],
+                    "duplicate": item["cached"]
+                })
+
+    async def run_all():
+        try:
+            await asyncio.gather(*(process(i, name, content) for i, (name, content) in enumerate(documents)))
+        finally:
+            await to_write.put(None)
+            await writer_task
+            await results.put(None)
+
+    writer_task = asyncio.create_task(writer())
+    runner = asyncio.create_task(run_all())
+    try:
+        while True:
+            result = await results.get()
+            if result is None:
+                break
+            documents_total.inc(status="duplicate" if result.get("duplicate") else result["status"])
+            yield result
+    finally:
+        # The client went away or we finished: stop any remaining work
+        runner.cancel()
+        writer_task.cancel()
@@ -0,0 +1,199 @@
+import json
+import os
+from datetime import datetime
+import numpy as np
+from sqlalchemy import func, delete, update
+from sqlmodel import Session, select
+from backend.database import engine
+from backend.models import Job, JobCandidateScore, JobScoreState, decode_embedding
+from backend.services.executor import run_io
+from backend.services.keyword_index import keyword_index
+from backend.services.lexical_index import lexical_index, bm25_score, HYBRID_FUSION
+from backend.services.llm import rank_candidates, fuse_scores, boost_terms, match_reasoning
+
+# Job -> candidate scores are materialized so repeat views of a job are an indexed
+# ORDER BY score LIMIT k. Only the best MATERIALIZED_TOP_N candidates of each job are kept;
+# deeper pages are ranked live with the BM25 statistics and normalization stored with the job, so
+# every page is on one scale. A job is fully recomputed once the pool has grown or shrunk by
+# SCORE_REFRESH_RATIO since its last computation (BM25 statistics drift with the pool).
+MATERIALIZE_SCORES = os.getenv("MATERIALIZE_SCORES", "true").lower() != "false"
+MATERIALIZED_TOP_N = int(os.getenv("MATERIALIZED_TOP_N", "1000"))
+SCORE_REFRESH_RATIO = float(os.getenv("SCORE_REFRESH_RATIO", "0.2"))
+
+
+def _fusion() -> str:
+    return HYBRID_FUSION if HYBRID_FUSION in ("weighted", "rrf") else "none"
+
+def materialize_enabled() -> bool:
+    # Reciprocal-rank fusion scores depend on every other candidate, so they can't be kept incrementally
+    return MATERIALIZE_SCORES and _fusion() != "rrf"
+
+
+def _replace_scores(job_id: int, ranked: list, state: JobScoreState):
+    with Session(engine) as session:
+        session.exec(delete(JobCandidateScore).where(JobCandidateScore.job_id == job_id))
+        session.add_all(
+            JobCandidateScore(job_id=job_id, candidate_id=rank["candidate_id"], score=rank["score"], reasoning=rank["reasoning"])
+            for rank in ranked
+        )
+        session.merge(state)
+        session.commit()
+
+async def materialize_job(job: Job, pool_size: int):
+    """(Re)compute and store the best MATERIALIZED_TOP_N scores of a job from the in-memory indexes."""
+    fusion = _fusion()
+    job_embedding = decode_embedding(job.embedding)
+    weights, avgdl = lexical_index.query_weights(job.description)
+    lexical_max = 0.0
+    if fusion != "none":
+        _, lex_scores = await run_io(lexical_index.score, job.description)
+        lexical_max = float(lex_scores.max()) if len(lex_scores) else 0.0
+    ranked = await rank_candidates(
+        job.description,
+        top_k=MATERIALIZED_TOP_N,
+        query_embedding=job_embedding,
+        fusion=fusion,
+        lexical_max=lexical_max or None,
+    )
+    state = JobScoreState(
+        job_id=job.id,
+        fusion=fusion,
+        lexical_weights=json.dumps(weights),
+        avgdl=avgdl,
+        lexical_max=lexical_max,
+        pool_size=pool_size,
+        complete=len(ranked) < MATERIALIZED_TOP_N,
+        updated_at=datetime.utcnow(),
+    )
+    await run_io(_replace_scores, job.id, ranked, state)
+
+
+def _read_scores(job_id: int, limit: int, min_score: float, pool_size: int):
+    """
+    Stored ranking of a job. None when the job has to be (re)computed first, False when the
+    stored top N can't answer the request.
+    """
+    with Session(engine) as session:
+        state = session.get(JobScoreState, job_id)
+        if state is None or state.fusion != _fusion():
+            return None
+        if abs(pool_size - state.pool_size) > SCORE_REFRESH_RATIO * max(state.pool_size, 1):
+            return None
+        statement = select(JobCandidateScore.candidate_id, JobCandidateScore.score, JobCandidateScore.reasoning).where(JobCandidateScore.job_id == job_id)
+        if not state.complete:
+            # Only the stored prefix is exact; anything deeper has to be ranked live
+            stored = session.exec(select(func.count()).where(JobCandidateScore.job_id == job_id)).one()
+            if limit is None or limit > stored:
+                return False
+        if min_score is not None:
+            statement = statement.where(JobCandidateScore.score >= min_score)
+        statement = statement.order_by(JobCandidateScore.score.desc(), JobCandidateScore.candidate_id)
+        if limit is not None:
+            statement = statement.limit(limit)
+        rows = session.exec(statement).all()
+    if not state.complete and len(rows) < limit:
+        # min_score reaches below the stored prefix, where unstored candidates may qualify
+        return False
+    return [{"candidate_id": cid, "score": score, "reasoning": reasoning} for cid, score, reasoning in rows]
+
+def _score_state(job_id: int) -> JobScoreState:
+    with Session(engine) as session:
+        return session.get(JobScoreState, job_id)
+
+async def read_job_scores(job: Job, limit: int, min_score: float, pool_size: int) -> list:
+    """
+    The first `limit` ranked candidates of a job (all when None) from the materialized table,
+    computing it first if the job has no fresh scores. Requests deeper than the stored top
+    MATERIALIZED_TOP_N are ranked live, normalized like the stored scores.
+    """
+    ranked = await run_io(_read_scores, job.id, limit, min_score, pool_size)
+    if ranked is None:
+        await materialize_job(job, pool_size)
+        ranked = await run_io(_read_scores, job.id, limit, min_score, pool_size)
+    if isinstance(ranked, list):
+        return ranked
+    state = await run_io(_score_state, job.id)
+    return await rank_candidates(
+        job.description,
+        top_k=limit,
+        min_score=min_score,
+        query_embedding=decode_embedding(job.embedding),
+        fusion=state.fusion,
+        lexical_max=state.lexical_max,
+        lexical_stats=(json.loads(state.lexical_weights or "{}"), state.avgdl),
+    )
+
+
+def score_new_candidates(items: list):
+    """
+    Add (or refresh) materialized scores for candidates given as (candidate_id, embedding, text),
+    for every job with materialized scores. Only the stored state of each job is used, so any
+    process that writes candidates (API or queue worker) can call this.
+    """
+    if not MATERIALIZE_SCORES or not items:
+        return
+    candidate_ids = [candidate_id for candidate_id, _, _ in items]
+    vectors = np.asarray([np.asarray(embedding, dtype=np.float32).reshape(-1) for _, embedding, _ in items if len(embedding)], dtype=np.float32)
+    with Session(engine) as session:
+        jobs = session.exec(
+            select(Job.id, Job.description, Job.embedding, JobScoreState).join(JobScoreState, JobScoreState.job_id == Job.id)
+        ).all()
+        if not jobs:
+            return
+        session.exec(delete(JobCandidateScore).where(JobCandidateScore.candidate_id.in_(candidate_ids)))
+        scored = [(cid, text) for cid, embedding, text in items if len(embedding)]
+        if len(scored) == 0:
+            session.commit()
+            return
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        vectors = vectors / norms
+        candidate_terms = [keyword_index.extract(text) for _, text in scored]
+
+        for job_id, description, job_embedding, state in jobs:
+            query = decode_embedding(job_embedding)
+            if query.size != vectors.shape[1] or state.fusion == "rrf":
+                continue
+            query = query / (np.linalg.norm(query) or 1.0)
+            sims = vectors @ query * 100
+            weights = json.loads(state.lexical_weights or "{}")
+            lexical = np.zeros(len(scored), dtype=np.float32)
+            if state.fusion != "none" and state.lexical_max > 0:
+                raw = np.array([bm25_score(weights, state.avgdl, text) for _, text in scored], dtype=np.float32)
+                lexical = np.minimum(raw / state.lexical_max * 100, 100)
+            base = fuse_scores(sims, lexical, state.fusion)
+            active = boost_terms(description)
+
+            floor = None
+            if not state.complete:
+                floor = session.exec(select(func.min(JobCandidateScore.score)).where(JobCandidateScore.job_id == job_id)).one()
+            for i, (cid, _) in enumerate(scored):
+                matched = [term for term in active if term in candidate_terms[i]]
+                score = round(float(min(100, base[i] + 5 * len(matched))), 2)
+                # Below the stored prefix of an incomplete job the candidate would not be in its top N
+                if floor is not None and score <= floor:
+                    continue
+                session.add(JobCandidateScore(
+                    job_id=job_id, candidate_id=cid, score=score,
+                    reasoning=match_reasoning(float(sims[i]), float(lexical[i]), matched, state.fusion),
+                ))
+            session.flush()
+
+            overflow = select(JobCandidateScore.candidate_id).where(JobCandidateScore.job_id == job_id).order_by(
+                JobCandidateScore.score.desc(), JobCandidateScore.candidate_id
+            ).offset(MATERIALIZED_TOP_N)
+            trimmed = session.exec(
+                delete(JobCandidateScore).where(JobCandidateScore.job_id == job_id, JobCandidateScore.candidate_id.in_(overflow))
+            ).rowcount
+            if trimmed and state.complete:
+                session.exec(update(JobScoreState).where(JobScoreState.job_id == job_id).values(complete=False))
+        session.commit()
+
+def remove_candidate_scores(session: Session, candidate_ids: list = None):
+    """Drop materialized scores of deleted candidates (all when None) in the caller's transaction."""
+    if candidate_ids is None:
+        session.exec(delete(JobCandidateScore))
+        # The pool is empty now: every job's (empty) list is complete
+        session.exec(update(JobScoreState).values(complete=True, pool_size=0))
+    else:
+        session.exec(delete(JobCandidateScore).where(JobCandidateScore.candidate_id.in_(candidate_ids)))
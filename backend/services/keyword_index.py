@@ -0,0 +1,159 @@
+import threading
+import numpy as np
+from backend.services.tokenizer import tokenize, normalize_term, build_vocabulary, PhraseMatcher
+from backend.services.taxonomy import taxonomy
+
+# Job-description terms that boost candidates mentioning them, with the word forms that count
+BOOST_TERMS = {
+    "management": ["management"],
+    "lead": ["lead", "leads", "leader", "leaders", "leadership", "leading"],
+    "certified": ["certified"],
+    "pmp": ["pmp"],
+    "agile": ["agile"],
+    "scrum": ["scrum"],
+    "master": ["master", "masters"],
+    "phd": ["phd", "ph.d"],
+}
+
+
+def keyword_text(resume_text: str, skills: str = None, soft_skills: str = None) -> str:
+    """Text a candidate is indexed under: the resume plus the stored skill lists."""
+    return " ".join(part for part in (resume_text, skills, soft_skills) if part)
+
+
+class KeywordIndex:
+    """
+    Inverted index from skill/boost terms to the ids of the candidates that mention them.
+    Only terms in the vocabulary are indexed, so memory grows with matches rather than with
+    every word of every resume. Keyword boosts and skill filters become set lookups instead
+    of scans over the resume texts.
+    """
+
+    def __init__(self, terms):
+        self.vocabulary = build_vocabulary(terms)
+        self.matcher = PhraseMatcher(self.vocabulary)
+        self._lock = threading.RLock()
+        self._postings = {}  # term -> set of candidate ids
+        self._doc_terms = {}  # candidate id -> frozenset of terms (needed to remove it again)
+        self._arrays = {}  # term -> sorted id array, rebuilt when the posting list changes
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def __contains__(self, candidate_id):
+        return candidate_id in self._doc_terms
+
+    def max_id(self) -> int:
+        with self._lock:
+            return max(self._doc_terms) if self._doc_terms else 0
+
+    def extract(self, text: str) -> set:
+        """Vocabulary terms that occur in the text (whole words only)."""
+        return self.matcher.match(tokenize(text))
+
+    def term(self, name: str):
+        """The indexed terms a user-supplied name stands for (e.g. "Node.js" -> ("node.js",))."""
+        phrase = normalize_term(name)
+        terms = self.vocabulary.get(phrase, ())
+        # "leadership" is a skill of its own as well as a form of the "lead" boost term
+        return (phrase,) if phrase in terms else terms
+
+    def add(self, candidate_id: int, text: str, skills=()):
+        """
+        Index (or re-index) a candidate. skills are the candidate's stored skill names, indexed
+        even when they are not in the vocabulary so skill filters match what the profile lists.
+        """
+        terms = set(self.extract(text))
+        for name in skills:
+            terms.update(self.term(name) or (normalize_term(name),))
+        terms = frozenset(terms)
+        with self._lock:
+            self._remove(candidate_id)
+            self._doc_terms[candidate_id] = terms
+            for term in terms:
+                self._postings.setdefault(term, set()).add(candidate_id)
+                self._arrays.pop(term, None)
+
+    def remove(self, candidate_id: int) -> bool:
+        with self._lock:
+            return self._remove(candidate_id)
+
+    def _remove(self, candidate_id: int) -> bool:
+        terms = self._doc_terms.pop(candidate_id, None)
+        if terms is None:
+            return False
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.discard(candidate_id)
+                if not posting:
+                    del self._postings[term]
+            self._arrays.pop(term, None)
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._postings = {}
+            self._doc_terms = {}
+            self._arrays = {}
+
+    def load(self, rows):
+        """Rebuild from (candidate_id, text) or (candidate_id, text, skills) rows."""
+        with self._lock:
+            self.clear()
+            for candidate_id, text, *skills in rows:
+                self.add(candidate_id, text, *skills)
+            self.loaded = True
+
+    def terms_for(self, candidate_id: int) -> frozenset:
+        return self._doc_terms.get(candidate_id, frozenset())
+
+    def postings(self, term: str) -> set:
+        with self._lock:
+            return set(self._postings.get(term, ()))
+
+    def postings_array(self, term: str) -> np.ndarray:
+        """Sorted ids for a term, for vectorized membership tests (np.isin)."""
+        with self._lock:
+            array = self._arrays.get(term)
+            if array is None:
+                array = np.fromiter(sorted(self._postings.get(term, ())), dtype=np.int64)
+                self._arrays[term] = array
+            return array
+
+    def candidates_with_all(self, names) -> set:
+        """
+        Ids of candidates matching every name: mentioned in the resume (vocabulary terms) or in
+        the candidate's stored skills (any name).
+        """
+        with self._lock:
+            postings = []
+            for name in names:
+                terms = self.term(name) or (normalize_term(name),)
+                # A name that maps to several terms matches any of them
+                matched = set()
+                for term in terms:
+                    matched |= self._postings.get(term, set())
+                postings.append(matched)
+            if not postings:
+                return set(self._doc_terms)
+            # Intersect from the shortest posting list
+            postings.sort(key=len)
+            result = set(postings[0])
+            for posting in postings[1:]:
+                result &= posting
+                if not result:
+                    break
+            return result
+
+
+def _index_terms() -> dict:
+    # Skills are indexed under their canonical name, whatever alias the resume uses
+    terms = {skill: list(aliases) for skill, aliases in taxonomy.aliases.items()}
+    for term, surfaces in BOOST_TERMS.items():
+        terms[term] = sorted(set(terms.get(term, []) + surfaces))
+    return terms
+
+# Shared instance used by the API process
+keyword_index = KeywordIndex(_index_terms())
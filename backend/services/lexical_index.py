@@ -0,0 +1,179 @@
+import math
+import os
+import threading
+from collections import Counter
+import numpy as np
+from backend.services.tokenizer import tokenize
+
+# How lexical (BM25) and semantic scores are combined in the ranking:
+#   weighted - (1 - HYBRID_LEXICAL_WEIGHT) * semantic + HYBRID_LEXICAL_WEIGHT * normalized BM25
+#   rrf      - reciprocal-rank fusion of the two rankings (HYBRID_RRF_K)
+#   none     - semantic score only
+HYBRID_FUSION = os.getenv("HYBRID_FUSION", "weighted")
+HYBRID_LEXICAL_WEIGHT = float(os.getenv("HYBRID_LEXICAL_WEIGHT", "0.3"))
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+
+# On pools of at least HYBRID_PREFILTER_MIN_POOL candidates only the HYBRID_PREFILTER_SIZE best
+# lexical matches are scored semantically (0 disables prefiltering)
+HYBRID_PREFILTER_SIZE = int(os.getenv("HYBRID_PREFILTER_SIZE", "5000"))
+HYBRID_PREFILTER_MIN_POOL = int(os.getenv("HYBRID_PREFILTER_MIN_POOL", "50000"))
+
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+# Query terms found in more than this share of documents carry almost no signal but have the
+# longest posting lists, so they are skipped
+BM25_MAX_DF_RATIO = float(os.getenv("BM25_MAX_DF_RATIO", "0.5"))
+
+STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being but by can could did do does
+for from had has have having he her his how i if in into is it its may more most must my no not
+of on or our out over she should so some such than that the their them then there these they
+this those to under up us very was we were what when where which while who will with within
+would you your
+""".split())
+
+
+def lexical_terms(text: str) -> list:
+    return [token for token in tokenize(text) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    In-memory BM25 index over candidate text (resume plus stored skill lists).
+    Postings are term -> {candidate id: term frequency}; per-term numpy arrays are built on
+    first use and dropped when the posting list changes, so queries are vectorized.
+    """
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B, max_df_ratio: float = BM25_MAX_DF_RATIO):
+        self.k1 = k1
+        self.b = b
+        self.max_df_ratio = max_df_ratio
+        self._lock = threading.RLock()
+        self._postings = {}  # term -> {candidate id: tf}
+        self._doc_len = {}  # candidate id -> number of terms
+        self._doc_terms = {}  # candidate id -> its distinct terms (needed to remove it again)
+        self._total_len = 0
+        self._arrays = {}  # term -> (ids, tfs, doc lengths)
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._doc_len)
+
+    def __contains__(self, candidate_id):
+        return candidate_id in self._doc_len
+
+    def max_id(self) -> int:
+        with self._lock:
+            return max(self._doc_len) if self._doc_len else 0
+
+    def add(self, candidate_id: int, text: str):
+        """Index (or re-index) a candidate."""
+        counts = Counter(lexical_terms(text))
+        with self._lock:
+            self._remove(candidate_id)
+            length = sum(counts.values())
+            self._doc_len[candidate_id] = length
+            self._doc_terms[candidate_id] = tuple(counts)
+            self._total_len += length
+            for term, tf in counts.items():
+                self._postings.setdefault(term, {})[candidate_id] = tf
+                self._arrays.pop(term, None)
+
+    def remove(self, candidate_id: int) -> bool:
+        with self._lock:
+            return self._remove(candidate_id)
+
+    def _remove(self, candidate_id: int) -> bool:
+        length = self._doc_len.pop(candidate_id, None)
+        if length is None:
+            return False
+        self._total_len -= length
+        for term in self._doc_terms.pop(candidate_id, ()):
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(candidate_id, None)
+                if not posting:
+                    del self._postings[term]
+            self._arrays.pop(term, None)
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._postings = {}
+            self._doc_len = {}
+            self._doc_terms = {}
+            self._total_len = 0
+            self._arrays = {}
+
+    def load(self, rows):
+        """Rebuild from (candidate_id, text) pairs."""
+        with self._lock:
+            self.clear()
+            for candidate_id, text in rows:
+                self.add(candidate_id, text)
+            self.loaded = True
+
+    def _term_arrays(self, term: str):
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            posting = self._postings.get(term, {})
+            ids = np.fromiter(posting.keys(), dtype=np.int64, count=len(posting))
+            tfs = np.fromiter(posting.values(), dtype=np.float32, count=len(posting))
+            lengths = np.fromiter((self._doc_len[cid] for cid in posting), dtype=np.float32, count=len(posting))
+            arrays = (ids, tfs, lengths)
+            self._arrays[term] = arrays
+        return arrays
+
+    def query_weights(self, text: str) -> tuple:
+        """
+        IDF weight of each informative term of a query, and the current average document length.
+        Together with bm25_score they score a single document without the index.
+        """
+        terms = set(lexical_terms(text))
+        with self._lock:
+            n = len(self._doc_len)
+            if n == 0:
+                return {}, 1.0
+            weights = {}
+            for term in terms:
+                df = len(self._postings.get(term, ()))
+                # Terms no candidate has yet are kept: candidates added later may match them
+                if df > self.max_df_ratio * n and n > 1:
+                    continue
+                weights[term] = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            return weights, self._total_len / n or 1.0
+
+    def score(self, text: str, weights: dict = None, avgdl: float = None) -> tuple:
+        """
+        BM25 scores of every candidate sharing at least one (informative) term with the text.
+        Returns (candidate_ids, scores) arrays, ids sorted ascending. weights and avgdl (from an
+        earlier query_weights call) score on those statistics instead of the current ones.
+        """
+        if weights is None:
+            weights, avgdl = self.query_weights(text)
+        id_parts, score_parts = [], []
+        with self._lock:
+            for term, idf in weights.items():
+                if term not in self._postings:
+                    continue
+                ids, tfs, lengths = self._term_arrays(term)
+                norm = self.k1 * (1 - self.b + self.b * lengths / avgdl)
+                id_parts.append(ids)
+                score_parts.append(idf * tfs * (self.k1 + 1) / (tfs + norm))
+        if not id_parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        ids, inverse = np.unique(np.concatenate(id_parts), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_parts)).astype(np.float32)
+        return ids, scores
+
+
+def bm25_score(weights: dict, avgdl: float, text: str, k1: float = BM25_K1, b: float = BM25_B) -> float:
+    """BM25 score of one document for query weights from BM25Index.query_weights."""
+    counts = Counter(lexical_terms(text))
+    length = sum(counts.values())
+    norm = k1 * (1 - b + b * length / (avgdl or 1.0))
+    return sum(idf * counts[term] * (k1 + 1) / (counts[term] + norm) for term, idf in weights.items() if term in counts)
+
+
+# Shared instance used by the API process
+lexical_index = BM25Index()
@@ -1,179 +1,307 @@
-import json
-import re
-from sentence_transformers import SentenceTransformer
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from backend.services.vector_store import top_k_indices
+from backend.services.vector_index import candidate_store
+from backend.services.keyword_index import keyword_index, BOOST_TERMS
+from backend.services.lexical_index import lexical_index, HYBRID_FUSION, HYBRID_LEXICAL_WEIGHT, HYBRID_RRF_K, HYBRID_PREFILTER_SIZE, HYBRID_PREFILTER_MIN_POOL
+from backend.services.embeddings import MicroBatcher
+from backend.services.embedding_backends import load_embedding_model, EMBEDDING_BACKEND
+from backend.services.executor import run_cpu, run_io, run_inference
+from backend.services.metrics import timer, record_stage, embedding_batch_size
+from backend.services.extractor import extract_resume_fields
 
-# Load local embedding model (small and fast)
-print("Loading local embedding model...")
-model = SentenceTransformer('all-MiniLM-L6-v2')
-print("Model loaded.")
+# Local embedding model (small and fast; a hub name or a local directory). It is loaded on first
+# use, or in the background at startup (see backend/services/warmup.py), so importing this module
+# stays cheap. EMBEDDING_BACKEND selects how it runs (see backend/services/embedding_backends.py).
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                print(f"Loading local embedding model ({EMBEDDING_BACKEND} backend)...")
+                model = load_embedding_model(EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND)
+                # Stored vectors and the index have a fixed size; a backend must not change it
+                dim = model.get_sentence_embedding_dimension()
+                if dim != candidate_store.dim:
+                    raise ValueError(f"Embedding model produces {dim}-dimensional vectors, the index stores {candidate_store.dim}")
+                _model = model
+                print("Model loaded.")
+    return _model
+
+def model_loaded() -> bool:
+    return _model is not None
+
+async def load_model():
+    """Load the model on the inference pool (off the event loop)."""
+    await run_inference(get_model)
 
 async def extract_resume_data(text: str) -> dict:
     """
     Heuristic/Regex based extraction since we don't have an LLM key.
+    Runs in the CPU process pool so large resumes don't block the event loop.
     """
-    data = {}
-    
-    # 1. Email
-    email_match = re.search(r'[\w\.-]+@[\w\.-]+\.\w+', text)
-    data["email"] = email_match.group(0) if email_match else None
-    
-    # 2. Phone
-    phone_match = re.search(r'(\+\d{1,2}\s)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}', text)
-    data["phone"] = phone_match.group(0) if phone_match else None
-    
-    # 3. Name (Skip headers like RESUME, CV, look for actual name patterns)
-    lines = [line.strip() for line in text.split('\n') if line.strip()]
-    skip_words = ["resume", "cv", "curriculum vitae", "personal details", "contact", "profile", "summary"]
-    
-    name = "Unknown"
-    for line in lines[:10]:  # Check first 10 lines
-        line_lower = line.lower()
-        # Skip lines that are just headers
-        if any(skip in line_lower for skip in skip_words):
-            continue
-        # Skip lines that look like section headers (all caps or have colons)
-        if line.isupper() and len(line) > 15:
-            continue
-        if ":" in line or "@" in line or "phone" in line_lower or "email" in line_lower:
-            continue
-        # Skip lines with URLs
-        if "http" in line_lower or "www" in line_lower or ".com" in line_lower:
-            continue
-        # This might be a name - should be 2-4 words, mostly letters
-        words = line.split()
-        if 1 <= len(words) <= 5 and all(w.replace('.', '').replace(',', '').isalpha() for w in words):
-            name = line.title()  # Capitalize properly
-            break
-    
-    data["name"] = name
-    
-    # 4. Skills (Keyword matching against a common list)
-    common_skills = ["python", "java", "react", "javascript", "typescript", "sql", "aws", "docker", "kubernetes", "html", "css", "node.js", "fastapi", "django", "flask", "c++", "go", "rust"]
-    found_skills = []
-    lower_text = text.lower()
-    for skill in common_skills:
-        if skill in lower_text:
-            found_skills.append(skill)
-    data["skills"] = found_skills
-    
-    # 5. Soft Skills
-    soft_skills_list = ["leadership", "communication", "teamwork", "problem solving", "time management", "adaptability", "project management", "agile", "scrum", "collaboration"]
-    found_soft_skills = []
-    for skill in soft_skills_list:
-        if skill in lower_text:
-            found_soft_skills.append(skill)
-    data["soft_skills"] = found_soft_skills
-
-    # 6. Robust Section Extraction with Synonyms
-    # We look for any of the keywords and take the next few lines
-    def extract_section(keywords, max_lines=15):
-        try:
-            start_idx = -1
-            # Try to find the first occurrence of ANY keyword
-            for kw in keywords:
-                idx = lower_text.find(kw)
-                if idx != -1:
-                    # If we found a keyword, check if it's likely a header (e.g., on its own line or followed by newline)
-                    # This is a simple heuristic: take the first one found that looks promising
-                    start_idx = idx
-                    break
-            
-            if start_idx == -1: return None
-            
-            # Find the "visual" start in original text
-            orig_start = start_idx
-            # Extract next N lines
-            lines = text[orig_start:].split('\n')[1:max_lines+1]
-            return "\n".join(lines).strip()
-        except:
-            return None
-
-    # Define Synonyms
-    project_keywords = ["projects", "personal projects", "academic projects", "portfolio", "key projects"]
-    cert_keywords = ["certifications", "courses", "licenses", "credentials", "training", "achievements", "certificates"]
-    exp_keywords = ["experience", "employment", "work history", "professional background", "work experience"]
-    
-    data["projects"] = extract_section(project_keywords)
-    data["certifications"] = extract_section(cert_keywords)
-    
-    # 7. Experience Summary (Try to extract actual section first, fallback to first 800 chars)
-    extracted_exp = extract_section(exp_keywords, max_lines=20)
-    if extracted_exp:
-        data["experience_summary"] = extracted_exp.replace("\n", " ") + "..."
-    else:
-        data["experience_summary"] = text[:800].replace("\n", " ") + "..."
-    
-    return data
+    with timer("extract"):
+        return await run_cpu(extract_resume_fields, text)
+
+class EmbeddingCache:
+    """
+    Bounded LRU cache of embeddings keyed by a hash of the normalized text.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text: str) -> str:
+        # The model is uncased, so case and whitespace differences give the same vector
+        normalized = " ".join(text.split()).lower()
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: list):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+embedding_cache = EmbeddingCache(int(os.getenv("EMBEDDING_CACHE_SIZE", "1024")))
+
+# Largest batch sent to the model, and how long a single request may wait for others to join it
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_MAX_WAIT_MS = float(os.getenv("EMBEDDING_MAX_WAIT_MS", "5"))
+
+def _encode_batch(texts: list, batch_size: int = EMBEDDING_BATCH_SIZE) -> list:
+    embedding_batch_size.observe(len(texts))
+    with timer("embed"):
+        # model.encode returns a numpy array, convert to lists
+        return get_model().encode(texts, batch_size=batch_size).tolist()
+
+embedding_batcher = MicroBatcher(_encode_batch, EMBEDDING_BATCH_SIZE, EMBEDDING_MAX_WAIT_MS, runner=run_inference)
 
 async def get_embedding(text: str) -> list[float]:
     """
     Generate embeddings locally using SentenceTransformers.
+    Repeated texts are served from the LRU cache without running the model, and concurrent
+    requests are merged into one batched model call.
     """
+    key = embedding_cache.key(text)
+    cached = embedding_cache.get(key)
+    if cached is not None:
+        return list(cached)
     try:
-        # model.encode returns a numpy array, convert to list
-        embedding = model.encode(text).tolist()
+        with timer("embed_wait"):
+            # Queueing for a batch plus the model call
+            embedding = await embedding_batcher.submit(text)
+        embedding_cache.put(key, embedding)
         return embedding
     except Exception as e:
         print(f"Error generating embedding: {e}")
         return []
 
-async def rank_candidates(job_description: str, candidates: list) -> list:
+async def encode_many(texts: list, batch_size: int = None) -> list:
+    """
+    Generate embeddings for many texts with batched model calls.
+    Returns one embedding per input text ([] where encoding failed).
+    """
+    batch_size = batch_size or EMBEDDING_BATCH_SIZE
+    results = [None] * len(texts)
+
+    # Serve cached texts and encode each distinct remaining text once
+    missing = {}
+    for i, text in enumerate(texts):
+        key = embedding_cache.key(text)
+        cached = embedding_cache.get(key)
+        if cached is not None:
+            results[i] = list(cached)
+        else:
+            missing.setdefault(key, []).append(i)
+
+    keys = list(missing)
+    for start in range(0, len(keys), batch_size):
+        chunk = keys[start:start + batch_size]
+        try:
+            vectors = await run_inference(_encode_batch, [texts[missing[key][0]] for key in chunk], batch_size)
+        except Exception as e:
+            print(f"Error generating embeddings for batch: {e}")
+            vectors = [[] for _ in chunk]
+        for key, vector in zip(chunk, vectors):
+            if vector:
+                embedding_cache.put(key, vector)
+            for i in missing[key]:
+                results[i] = list(vector)
+    return results
+
+def fuse_scores(sims, lexical_scores, fusion: str):
+    """
+    Combine semantic and lexical scores (numpy arrays, both 0-100) for the "weighted" and
+    "none" fusions. These depend only on the candidate itself, so materialized scores can
+    be extended one candidate at a time; rrf is computed in rank_candidates.
+    """
+    if fusion == "weighted":
+        return (1 - HYBRID_LEXICAL_WEIGHT) * sims + HYBRID_LEXICAL_WEIGHT * lexical_scores
+    return sims
+
+def boost_terms(job_description: str, keywords=None) -> list:
+    """Boost terms the job description asks for."""
+    keywords = keywords if keywords is not None else keyword_index
+    jd_terms = keywords.extract(job_description)
+    return [term for term in BOOST_TERMS if term in jd_terms]
+
+def match_reasoning(semantic: float, lexical: float, matched_terms: list, fusion: str) -> str:
+    reasoning = f"Semantic Match: {round(semantic, 1)}%."
+    if fusion != "none":
+        reasoning += f" Keyword Match: {round(lexical, 1)}%."
+    if matched_terms:
+        reasoning += f" Boosted for: {', '.join(matched_terms)}."
+    return reasoning
+
+async def rank_candidates(job_description: str, candidate_ids=None, top_k: int = None, min_score: float = None, index=None, query_embedding=None, keywords=None, lexical=None, fusion: str = None, lexical_max: float = None, lexical_stats: tuple = None) -> list:
     """
     Rank candidates based on cosine similarity of their embeddings.
     Since we don't have an LLM for reasoning, we'll generate a generic one.
     """
-    # candidates is a list of dicts: {"id": 1, "text": "...", "embedding": [...]}
-    # Note: In the main.py, we need to pass the actual embedding list, not just text.
-    
-    from sklearn.metrics.pairwise import cosine_similarity
-    import numpy as np
-    
-    if not candidates:
+    # candidate_ids limits the ranking to those candidates (None = every indexed candidate).
+    # Embeddings come from the shared vector index, BM25 scores from the lexical index and keyword
+    # boosts from the keyword index, so no resume text is read per request.
+    # fusion (HYBRID_FUSION by default) is how the lexical and semantic scores are combined.
+    # lexical_max fixes the raw BM25 score mapped to 100 (default: the best match in the whole pool),
+    # lexical_stats the BM25 query weights and avgdl (default: the lexical index's current ones).
+    # min_score is on the same 0-100 scale as the returned scores.
+    # Pass query_embedding (e.g. the stored Job.embedding) to skip encoding the description.
+    index = index if index is not None else candidate_store
+    keywords = keywords if keywords is not None else keyword_index
+    lexical = lexical if lexical is not None else lexical_index
+    fusion = fusion or HYBRID_FUSION
+    if fusion not in ("weighted", "rrf"):
+        fusion = "none"
+    if len(index) == 0 or (candidate_ids is not None and not candidate_ids):
         return []
+    allowed = np.fromiter(candidate_ids, dtype=np.int64) if candidate_ids is not None else None
 
-    # Generate JD embedding
-    jd_embedding = await get_embedding(job_description)
+    # Generate JD embedding unless the caller already has it
+    if query_embedding is not None and len(query_embedding) > 0:
+        jd_embedding = query_embedding
+    else:
+        jd_embedding = await get_embedding(job_description)
+    if len(jd_embedding) == 0:
+        return []
     
     # Extract key terms from JD for boosting (Naive approach)
     # We look for "management", "lead", "certification" in JD
-    jd_lower = job_description.lower()
-    boost_terms = ["management", "lead", "certified", "pmp", "agile", "scrum", "master", "phd"]
-    active_boost_terms = [term for term in boost_terms if term in jd_lower]
-    
+    active_boost_terms = boost_terms(job_description, keywords)
+
+    # 1. Lexical Score (BM25 over resume text and skills)
+    if fusion != "none":
+        with timer("rank_lexical"):
+            lex_ids, lex_scores = await run_io(lexical.score, job_description, *(lexical_stats or ()))
+        # Taken over the whole pool before any filtering (skills, probed lists, prefilter), so a
+        # candidate's lexical score is the same in every ranking of the job
+        pool_lexical_max = float(lex_scores.max()) if len(lex_scores) else 0.0
+        if allowed is not None:
+            keep = np.isin(lex_ids, allowed)
+            lex_ids, lex_scores = lex_ids[keep], lex_scores[keep]
+    else:
+        lex_ids, lex_scores = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        pool_lexical_max = 0.0
+
+    # 2. Semantic Score (Cosine Similarity) in one matrix-vector product over the index
+    # (the whole pool for exact search, the probed lists for IVF). On large pools only the best
+    # lexical matches are scored when prefiltering is enabled. Full listings and filtered rankings
+    # need every candidate, so approximate indexes score exactly then, and also whenever the
+    # probed lists hold fewer than top_k candidates.
+    prefilter = fusion != "none" and HYBRID_PREFILTER_SIZE > 0 and len(index) >= HYBRID_PREFILTER_MIN_POOL and len(lex_ids) > 0
+    with timer("rank_score"):
+        if prefilter:
+            shortlist = lex_ids[top_k_indices(lex_scores, HYBRID_PREFILTER_SIZE)]
+            ids, sims = await run_io(index.scores_for, jd_embedding, shortlist)
+        elif allowed is not None and len(allowed) * 10 < len(index):
+            # A small allowed set is cheaper to score directly than to filter out of the whole pool
+            ids, sims = await run_io(index.scores_for, jd_embedding, allowed)
+        else:
+            exact = top_k is None or allowed is not None
+            ids, sims = await run_io(index.scores, jd_embedding, exact)
+            if not exact and len(ids) < min(top_k, len(index)):
+                ids, sims = await run_io(index.scores, jd_embedding, True)
+            if allowed is not None and len(ids):
+                mask = np.isin(ids, allowed)
+                ids, sims = ids[mask], sims[mask]
+    if len(ids) == 0:
+        return []
+    sims = sims * 100
+    fuse_start = time.perf_counter()
+
+    # Lexical scores aligned with ids, scaled so the best lexical match in the whole pool is 100
+    lexical_scores = np.zeros(len(ids), dtype=np.float32)
+    if len(lex_ids):
+        pos = np.minimum(np.searchsorted(lex_ids, ids), len(lex_ids) - 1)
+        found = lex_ids[pos] == ids
+        lexical_scores[found] = lex_scores[pos[found]]
+        top = lexical_max if lexical_max is not None else pool_lexical_max
+        # A stored maximum of 0 (nothing matched when it was taken) leaves the lexical part out
+        lexical_scores = np.minimum(lexical_scores / top * 100, 100) if top > 0 else np.zeros_like(lexical_scores)
+
+    # 3. Fusion
+    if fusion == "rrf":
+        # Reciprocal-rank fusion, scaled so ranking first in both lists gives 100
+        sem_rank = np.empty(len(ids), dtype=np.float32)
+        sem_rank[np.argsort(-sims, kind="stable")] = np.arange(1, len(ids) + 1)
+        rrf = 1 / (HYBRID_RRF_K + sem_rank)
+        matched = lexical_scores > 0
+        if matched.any():
+            lex_rank = np.empty(len(ids), dtype=np.float32)
+            lex_rank[np.argsort(-lexical_scores, kind="stable")] = np.arange(1, len(ids) + 1)
+            rrf = rrf + np.where(matched, 1 / (HYBRID_RRF_K + lex_rank), 0)
+        base_scores = rrf * (HYBRID_RRF_K + 1) / 2 * 100
+    else:
+        base_scores = fuse_scores(sims, lexical_scores, fusion)
+
+    # 4. Keyword Boost
+    # If JD has "management" and Candidate has it, give +5 boost (posting-list lookups)
+    boosts = np.zeros(len(ids), dtype=np.float32)
+    for term in active_boost_terms:
+        boosts += 5 * np.isin(ids, keywords.postings_array(term))
+    final_scores = np.round(np.minimum(100, base_scores + boosts), 2)
+    if min_score is not None:
+        keep = final_scores >= min_score
+        ids, sims, lexical_scores, final_scores = ids[keep], sims[keep], lexical_scores[keep], final_scores[keep]
+    sort_start = time.perf_counter()
+    record_stage("rank_fuse", sort_start - fuse_start)
+
     ranked_results = []
-    
-    for cand in candidates:
-        cand_embedding = cand.get("embedding")
-        if not cand_embedding:
-            continue
-            
-        # 1. Semantic Score (Cosine Similarity)
-        score = cosine_similarity([jd_embedding], [cand_embedding])[0][0]
-        score_percent = score * 100
-        
-        # 2. Keyword Boost
-        # If JD has "management" and Candidate has it, give +5 boost
-        boost_score = 0
-        cand_text_lower = cand.get("text", "").lower()
-        matched_terms = []
-        for term in active_boost_terms:
-            if term in cand_text_lower:
-                boost_score += 5
-                matched_terms.append(term)
-        
-        final_score = min(100, score_percent + boost_score)
-        final_score = round(final_score, 2)
-        
-        reasoning = f"Semantic Match: {round(score_percent, 1)}%."
-        if matched_terms:
-            reasoning += f" Boosted for: {', '.join(matched_terms)}."
+    for i in top_k_indices(final_scores, top_k):
+        cand_id = int(ids[i])
+        matched_terms = [term for term in active_boost_terms if term in keywords.terms_for(cand_id)]
         
         ranked_results.append({
-            "candidate_id": cand['id'],
-            "score": final_score,
-            "reasoning": reasoning
+            "candidate_id": cand_id,
+            "score": round(float(final_scores[i]), 2),
+            "reasoning": match_reasoning(float(sims[i]), float(lexical_scores[i]), matched_terms, fusion)
         })
-            
-    # Sort by score
-    ranked_results.sort(key=lambda x: x['score'], reverse=True)
+    record_stage("rank_sort", time.perf_counter() - sort_start)
     return ranked_results
@@ -0,0 +1,129 @@
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# In-process timers and counters, exposed in the Prometheus text format at /metrics.
+# Values are per process: with several uvicorn workers or standalone queue workers each
+# process reports its own (scrape them individually).
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() != "false"
+# Requests carrying this header get a Server-Timing response header with their per-stage times
+PROFILE_HEADER = os.getenv("PROFILE_HEADER", "X-Profile")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+def _labels_text(labelnames: tuple, values: tuple, extra: str = "") -> str:
+    pairs = ['%s="%s"' % (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}  # label values -> count
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels_text(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                bounds = [str(bound) for bound in self.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, series[:len(self.buckets)] + [series[-1]]):
+                    labels = _labels_text(self.labelnames, key, 'le="%s"' % bound)
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                lines.append(f"{self.name}_sum{_labels_text(self.labelnames, key)} {series[-2]}")
+                lines.append(f"{self.name}_count{_labels_text(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+stage_seconds = Histogram("hirex_stage_seconds", "Time spent per processing stage.", ("stage",))
+embedding_batch_size = Histogram("hirex_embedding_batch_size", "Texts per embedding model call.", buckets=SIZE_BUCKETS)
+request_seconds = Histogram("hirex_request_seconds", "HTTP request latency by route.", ("method", "route"))
+requests_total = Counter("hirex_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+documents_total = Counter("hirex_documents_total", "Uploaded documents processed, by outcome.", ("status",))
+candidates_written_total = Counter("hirex_candidates_written_total", "Candidates inserted by the ingestion writer.")
+
+REGISTRY = [stage_seconds, embedding_batch_size, request_seconds, requests_total, documents_total, candidates_written_total]
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# Per-request profile (stage -> [seconds, calls]); set by the middleware for requests that ask for it.
+# Only stages timed on the event loop (around awaits) are attributed to the request.
+_profile = contextvars.ContextVar("hirex_profile", default=None)
+
+def start_profile():
+    profile = {}
+    return profile, _profile.set(profile)
+
+def stop_profile(token):
+    _profile.reset(token)
+
+def server_timing(profile: dict) -> str:
+    return ", ".join(f"{stage};dur={seconds * 1000:.2f};desc=\"{calls}x\"" for stage, (seconds, calls) in profile.items())
+
+def record_stage(stage: str, seconds: float):
+    stage_seconds.observe(seconds, stage=stage)
+    profile = _profile.get()
+    if profile is not None:
+        entry = profile.setdefault(stage, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+@contextmanager
+def timer(stage: str):
+    """Time a block into hirex_stage_seconds{stage} (and the request profile, if one is active)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
@@ -1,40 +1,161 @@
+import asyncio
+import os
+import time
 import pdfplumber
 import docx
 import io
+from collections import deque
 from fastapi import UploadFile, HTTPException
+from backend.services.executor import run_cpu
+from backend.services.metrics import timer
 
-async def extract_text_from_pdf(file_bytes: bytes) -> str:
-    text = ""
+# Limits for parsing uploaded documents. PDFs are read page by page: the first pages in one
+# task (which also learns the page count), the rest in chunks of PDF_PAGES_PER_TASK spread over
+# the CPU process pool, at most PDF_PARALLEL_TASKS at a time per document. Reading stops early
+# once PARSE_EARLY_STOP_CHARS characters are collected (plenty for extraction), after
+# PDF_MAX_PAGES pages, or when PARSE_TIMEOUT_SECONDS is up (whatever was read is kept).
+DOCUMENT_MAX_BYTES = int(os.getenv("DOCUMENT_MAX_BYTES", str(20 * 1024 * 1024)))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "30"))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "4"))
+PDF_PARALLEL_TASKS = int(os.getenv("PDF_PARALLEL_TASKS", "4"))
+PARSE_EARLY_STOP_CHARS = int(os.getenv("PARSE_EARLY_STOP_CHARS", "30000"))  # 0 = read every page
+PARSE_TIMEOUT_SECONDS = float(os.getenv("PARSE_TIMEOUT_SECONDS", "30"))
+
+# The read_* functions are blocking and run in the CPU process pool via the async wrappers.
+# A document source is either its bytes or the path of a file holding them (uploads are
+# spooled to disk), so workers open the file themselves instead of receiving a copy.
+
+def _open_source(source):
+    return io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
+def source_size(source) -> int:
+    return len(source) if isinstance(source, (bytes, bytearray)) else os.path.getsize(source)
+
+def read_pdf_pages(source, start: int, stop: int, deadline: float = None, max_chars: int = 0) -> tuple:
+    """
+    Text of pages [start, stop) and the document's page count. Stops before a page once the
+    deadline (time.time()) has passed or max_chars characters have been read.
+    """
+    parts = []
+    chars = 0
+    page_count = 0
     try:
-        with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
-            for page in pdf.pages:
+        with pdfplumber.open(_open_source(source)) as pdf:
+            page_count = len(pdf.pages)
+            for page in pdf.pages[start:stop]:
+                if (deadline is not None and time.time() > deadline) or (max_chars and chars >= max_chars):
+                    break
                 page_text = page.extract_text()
                 if page_text:
-                    text += page_text + "\n"
+                    parts.append(page_text + "\n")
+                    chars += len(page_text) + 1
+                # Drop the page's parsed objects; long documents otherwise keep every page in memory
+                page.close()
     except Exception as e:
         print(f"Error reading PDF: {e}")
         # Fallback or re-raise depending on strategy
-        return ""
-    return text
+    return "".join(parts), page_count
+
+def read_pdf_text(source) -> str:
+    """All pages in one call (no limits)."""
+    return read_pdf_pages(source, 0, None)[0]
 
-async def extract_text_from_docx(file_bytes: bytes) -> str:
-    text = ""
+def read_docx_text(source) -> str:
     try:
-        doc = docx.Document(io.BytesIO(file_bytes))
-        for para in doc.paragraphs:
-            text += para.text + "\n"
+        doc = docx.Document(_open_source(source))
+        return "".join(para.text + "\n" for para in doc.paragraphs)
     except Exception as e:
         print(f"Error reading DOCX: {e}")
         return ""
-    return text
 
-async def parse_resume(file: UploadFile) -> str:
-    content = await file.read()
-    filename = file.filename.lower()
-    
+def check_size(source, max_bytes: int = DOCUMENT_MAX_BYTES):
+    if max_bytes and source_size(source) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Document exceeds {max_bytes} bytes")
+
+async def extract_text_from_pdf(
+    source,
+    max_pages: int = PDF_MAX_PAGES,
+    pages_per_task: int = PDF_PAGES_PER_TASK,
+    parallel_tasks: int = PDF_PARALLEL_TASKS,
+    early_stop_chars: int = PARSE_EARLY_STOP_CHARS,
+    timeout: float = PARSE_TIMEOUT_SECONDS,
+) -> str:
+    check_size(source)
+    deadline = time.time() + timeout if timeout else None
+    pages_per_task = max(1, pages_per_task)
+    first_stop = min(pages_per_task, max_pages) if max_pages else pages_per_task
+
+    def remaining():
+        # A little grace so a worker that respects the deadline can hand back its partial text
+        return None if deadline is None else max(0.0, deadline - time.time()) + 1.0
+
+    try:
+        text, page_count = await asyncio.wait_for(
+            run_cpu(read_pdf_pages, source, 0, first_stop, deadline, early_stop_chars), remaining()
+        )
+    except asyncio.TimeoutError:
+        print(f"PDF parsing timed out after {timeout}s on the first pages.")
+        return ""
+    parts = [text]
+    chars = len(text)
+    last_page = min(page_count, max_pages) if max_pages else page_count
+    if (early_stop_chars and chars >= early_stop_chars) or first_stop >= last_page:
+        return text
+
+    # Remaining pages in parallel chunks, collected in page order so the early stop keeps a prefix
+    ranges = deque((start, min(start + pages_per_task, last_page)) for start in range(first_stop, last_page, pages_per_task))
+    running = deque()
+    try:
+        while ranges or running:
+            while ranges and len(running) < max(1, parallel_tasks):
+                start, stop = ranges.popleft()
+                running.append(asyncio.ensure_future(run_cpu(read_pdf_pages, source, start, stop, deadline)))
+            try:
+                chunk, _ = await asyncio.wait_for(running[0], remaining())
+            except asyncio.TimeoutError:
+                print(f"PDF parsing timed out after {timeout}s; keeping {len(parts)} of {len(parts) + len(running) + len(ranges)} page chunks.")
+                break
+            running.popleft()
+            parts.append(chunk)
+            chars += len(chunk)
+            if early_stop_chars and chars >= early_stop_chars:
+                break
+    finally:
+        for task in running:
+            task.cancel()
+    return "".join(parts)
+
+async def extract_text_from_docx(source, timeout: float = PARSE_TIMEOUT_SECONDS) -> str:
+    check_size(source)
+    try:
+        return await asyncio.wait_for(run_cpu(read_docx_text, source), timeout or None)
+    except asyncio.TimeoutError:
+        print(f"DOCX parsing timed out after {timeout}s.")
+        return ""
+
+def is_supported(filename: str) -> bool:
+    return filename.lower().endswith((".pdf", ".docx", ".doc"))
+
+async def parse_document(filename: str, content) -> str:
+    """Text of a PDF/DOCX document given as bytes or as the path of a spooled file."""
+    filename = filename.lower()
+
     if filename.endswith(".pdf"):
-        return await extract_text_from_pdf(content)
+        with timer("parse_pdf"):
+            return await extract_text_from_pdf(content)
     elif filename.endswith(".docx") or filename.endswith(".doc"):
-        return await extract_text_from_docx(content)
+        with timer("parse_docx"):
+            return await extract_text_from_docx(content)
     else:
         raise HTTPException(status_code=400, detail="Unsupported file format. Please upload PDF or DOCX.")
+
+async def parse_resume(file: UploadFile) -> str:
+    """Stream an upload to a temporary file (size and type checked) and parse it from there."""
+    from backend.services.uploads import UploadSpool
+
+    spool = UploadSpool()
+    try:
+        documents, _ = await spool.save(file)
+        return await parse_document(*documents[0]) if documents else ""
+    finally:
+        spool.close()
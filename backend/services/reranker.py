@@ -0,0 +1,143 @@
+import hashlib
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from backend.services.executor import run_inference
+
+# Second ranking stage: a cross-encoder scores (job description, resume) pairs for the top
+# RERANK_TOP_N first-stage results. Disabled unless RERANK_MODEL points at a local model directory.
+RERANK_MODEL = os.getenv("RERANK_MODEL", "")
+RERANK_TOP_N = int(os.getenv("RERANK_TOP_N", "50"))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "500"))
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "10000"))
+RERANK_MAX_CHARS = int(os.getenv("RERANK_MAX_CHARS", "2000"))  # the model truncates long inputs anyway
+
+
+class RerankCache:
+    """
+    LRU cache of cross-encoder scores keyed by (job_id, candidate_id).
+    Each entry remembers a fingerprint of the two texts it was computed from, so a changed
+    job or resume misses the cache; deleted candidates are dropped explicitly.
+    """
+
+    def __init__(self, maxsize: int = RERANK_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._items = OrderedDict()  # (job_id, candidate_id) -> (fingerprint, score)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(job_text: str, candidate_text: str) -> str:
+        digest = hashlib.sha1(job_text.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(candidate_text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, job_id: int, candidate_id: int, fingerprint: str):
+        with self._lock:
+            item = self._items.get((job_id, candidate_id))
+            if item is None or item[0] != fingerprint:
+                return None
+            self._items.move_to_end((job_id, candidate_id))
+            return item[1]
+
+    def put(self, job_id: int, candidate_id: int, fingerprint: str, score: float):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._items[(job_id, candidate_id)] = (fingerprint, score)
+            self._items.move_to_end((job_id, candidate_id))
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def invalidate_candidate(self, candidate_id: int):
+        with self._lock:
+            for key in [key for key in self._items if key[1] == candidate_id]:
+                del self._items[key]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+rerank_cache = RerankCache()
+
+_model = None
+_model_lock = threading.Lock()
+
+def rerank_enabled() -> bool:
+    return bool(RERANK_MODEL) and os.path.isdir(RERANK_MODEL)
+
+def _get_model():
+    global _model
+    with _model_lock:
+        if _model is None:
+            from sentence_transformers import CrossEncoder
+            print(f"Loading rerank model from {RERANK_MODEL}...")
+            _model = CrossEncoder(RERANK_MODEL)
+            print("Rerank model loaded.")
+        return _model
+
+def _predict(pairs: list, batch_size: int) -> list:
+    scores = _get_model().predict(pairs, batch_size=batch_size)
+    # Logits -> 0-100, the scale of the first-stage scores
+    return [100 / (1 + math.exp(-float(score))) for score in scores]
+
+
+async def rerank_candidates(job_id: int, job_description: str, ranked: list, candidate_texts: dict, top_n: int = RERANK_TOP_N, budget_ms: float = RERANK_BUDGET_MS, batch_size: int = RERANK_BATCH_SIZE) -> list:
+    """
+    Rescore the first top_n entries of a first-stage ranking (rank_candidates output) with the
+    cross-encoder and reorder them; the rest keep their order below. Cached pairs are free,
+    the others are scored in batches until budget_ms runs out, and whatever is left unscored
+    keeps its first-stage score and position after the reranked entries.
+    candidate_texts maps candidate id -> resume text for (at least) the top_n candidates.
+    """
+    if not ranked or top_n <= 0 or not rerank_enabled():
+        return ranked
+    deadline = time.monotonic() + budget_ms / 1000
+    head, tail = ranked[:top_n], ranked[top_n:]
+
+    scores = {}
+    pending = []  # (candidate_id, fingerprint, text)
+    for rank in head:
+        cand_id = rank["candidate_id"]
+        text = (candidate_texts.get(cand_id) or "")[:RERANK_MAX_CHARS]
+        fingerprint = rerank_cache.fingerprint(job_description, text)
+        cached = rerank_cache.get(job_id, cand_id, fingerprint)
+        if cached is not None:
+            scores[cand_id] = cached
+        else:
+            pending.append((cand_id, fingerprint, text))
+
+    for start in range(0, len(pending), batch_size):
+        if time.monotonic() >= deadline:
+            print(f"Rerank budget of {budget_ms}ms used up; {len(pending) - start} candidates keep their first-stage score.")
+            break
+        chunk = pending[start:start + batch_size]
+        try:
+            batch_scores = await run_inference(_predict, [(job_description, text) for _, _, text in chunk], batch_size)
+        except Exception as e:
+            print(f"Error reranking candidates: {e}")
+            break
+        for (cand_id, fingerprint, _), score in zip(chunk, batch_scores):
+            rerank_cache.put(job_id, cand_id, fingerprint, score)
+            scores[cand_id] = score
+
+    reranked, unscored = [], []
+    for rank in head:
+        score = scores.get(rank["candidate_id"])
+        if score is None:
+            unscored.append(rank)
+        else:
+            reranked.append({
+                **rank,
+                "score": round(score, 2),
+                "reasoning": f"{rank['reasoning']} Reranked: {round(score, 1)}% (first stage {rank['score']}).",
+            })
+    reranked.sort(key=lambda x: x["score"], reverse=True)
+    return reranked + unscored + tail
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from sqlalchemy import func, delete, update
+from sqlmodel import Session, select
+from backend.database import engine
+from backend.models import ParsedResume, encode_embedding, decode_embedding
+
+# Duplicate uploads of the same file skip parsing, extraction and embedding.
+# RESUME_DEDUP_MODE=merge returns the existing candidate instead of creating another row.
+RESUME_CACHE_ENABLED = os.getenv("RESUME_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+RESUME_CACHE_MAX_ENTRIES = int(os.getenv("RESUME_CACHE_MAX_ENTRIES", "10000"))
+RESUME_DEDUP_MODE = os.getenv("RESUME_DEDUP_MODE", "new")  # "new" or "merge"
+
+
+def content_hash(content) -> str:
+    """SHA-256 of a document given as bytes or as a file path (read in chunks)."""
+    if isinstance(content, (bytes, bytearray)):
+        return hashlib.sha256(content).hexdigest()
+    digest = hashlib.sha256()
+    with open(content, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResumeCache:
+    """
+    Lookups and writes against the ParsedResume table, with per-process hit/miss counters.
+    Entries beyond max_entries are evicted least-recently-used first.
+    """
+
+    def __init__(self, max_entries: int = RESUME_CACHE_MAX_ENTRIES, enabled: bool = RESUME_CACHE_ENABLED):
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, digest: str):
+        """Return {"text", "extracted_data", "embedding", "candidate_id"} for a cached file, else None."""
+        if not self.enabled:
+            return None
+        with Session(engine) as session:
+            entry = session.get(ParsedResume, digest)
+            embedding = decode_embedding(entry.embedding) if entry is not None else None
+            # Entries without an embedding (written before those were skipped) are parsed again
+            if entry is None or len(embedding) == 0:
+                with self._lock:
+                    self.misses += 1
+                return None
+            session.exec(
+                update(ParsedResume)
+                .where(ParsedResume.sha256 == digest)
+                .values(hits=ParsedResume.hits + 1, last_used_at=datetime.utcnow())
+            )
+            session.commit()
+            result = {
+                "text": entry.resume_text,
+                "extracted_data": json.loads(entry.extracted_data),
+                "embedding": embedding.tolist(),
+                "candidate_id": entry.candidate_id,
+            }
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def entry(self, digest: str, text: str, extracted_data: dict, embedding, candidate_id: int, size_bytes: int) -> ParsedResume:
+        """Build a cache row; the caller adds it to its own transaction."""
+        return ParsedResume(
+            sha256=digest,
+            resume_text=text,
+            extracted_data=json.dumps(extracted_data),
+            embedding=encode_embedding(embedding),
+            candidate_id=candidate_id,
+            size_bytes=size_bytes,
+        )
+
+    def link(self, session: Session, digest: str, candidate_id: int):
+        """Point a cached file at the candidate most recently created from it (caller's transaction)."""
+        session.exec(update(ParsedResume).where(ParsedResume.sha256 == digest).values(candidate_id=candidate_id))
+
+    def unlink(self, session: Session, candidate_ids: list = None):
+        """Forget deleted candidates (all when candidate_ids is None); the parsed data stays cached."""
+        statement = update(ParsedResume).values(candidate_id=None)
+        if candidate_ids is not None:
+            statement = statement.where(ParsedResume.candidate_id.in_(candidate_ids))
+        session.exec(statement)
+
+    def evict(self, session: Session) -> int:
+        """Delete the least recently used entries above max_entries (within the caller's transaction)."""
+        if self.max_entries <= 0:
+            return 0
+        count = session.exec(select(func.count(ParsedResume.sha256))).one()
+        excess = count - self.max_entries
+        if excess <= 0:
+            return 0
+        oldest = select(ParsedResume.sha256).order_by(ParsedResume.last_used_at).limit(excess)
+        session.exec(delete(ParsedResume).where(ParsedResume.sha256.in_(oldest)))
+        with self._lock:
+            self.evictions += excess
+        return excess
+
+    def stats(self) -> dict:
+        with Session(engine) as session:
+            entries, total_bytes = session.exec(
+                select(func.count(ParsedResume.sha256), func.coalesce(func.sum(ParsedResume.size_bytes), 0))
+            ).one()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "source_bytes": int(total_bytes),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+resume_cache = ResumeCache()
@@ -0,0 +1,292 @@
+import asyncio
+import os
+import shutil
+import socket
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+from backend.database import engine
+from backend.models import IngestBatch, IngestTask
+from backend.services.executor import run_io
+
+# Persistent ingestion queue stored in the application database. Uploaded bytes are spooled to
+# QUEUE_SPOOL_DIR; workers (in the API process or `python -m backend.worker`) claim tasks from it.
+QUEUE_SPOOL_DIR = os.getenv("QUEUE_SPOOL_DIR", "./hirex_queue")
+QUEUE_WORKERS = int(os.getenv("QUEUE_WORKERS", "1"))  # in-process workers started by the API
+QUEUE_CLAIM_BATCH = int(os.getenv("QUEUE_CLAIM_BATCH", "16"))
+QUEUE_POLL_INTERVAL = float(os.getenv("QUEUE_POLL_INTERVAL", "1.0"))
+QUEUE_MAX_ATTEMPTS = int(os.getenv("QUEUE_MAX_ATTEMPTS", "3"))
+QUEUE_RETRY_DELAY = float(os.getenv("QUEUE_RETRY_DELAY", "5"))
+QUEUE_LEASE_SECONDS = int(os.getenv("QUEUE_LEASE_SECONDS", "600"))
+
+
+def enqueue_upload(documents: list) -> tuple:
+    """
+    Spool (filename, bytes or file path) documents and queue one resume task per document.
+    Files given by path are moved into the spool. Returns (batch_id, total).
+    """
+    with Session(engine) as session:
+        batch = IngestBatch(kind="upload")
+        session.add(batch)
+        session.commit()
+        session.refresh(batch)
+
+        spool_dir = os.path.join(QUEUE_SPOOL_DIR, str(batch.id))
+        os.makedirs(spool_dir, exist_ok=True)
+        for filename, content in documents:
+            path = os.path.join(spool_dir, uuid.uuid4().hex)
+            if isinstance(content, (bytes, bytearray)):
+                with open(path, "wb") as f:
+                    f.write(content)
+            else:
+                shutil.move(content, path)
+            session.add(IngestTask(batch_id=batch.id, kind="resume", filename=filename, payload_path=path))
+        session.commit()
+        return batch.id, len(documents)
+
+def enqueue_job(kind: str, unique_key: str = None) -> int:
+    """
+    Queue a single maintenance task ("regenerate" or "seed"). Returns the batch id. With a
+    unique_key, a task with that key still pending or running is reused instead (e.g. every
+    uvicorn worker's warm-up asking for the seed).
+    """
+    with Session(engine) as session:
+        batch = IngestBatch(kind=kind)
+        session.add(batch)
+        session.flush()
+        session.add(IngestTask(batch_id=batch.id, kind=kind, unique_key=unique_key))
+        try:
+            session.commit()
+            return batch.id
+        except IntegrityError:
+            if unique_key is None:
+                raise
+            session.rollback()
+        existing = session.exec(select(IngestTask.batch_id).where(IngestTask.unique_key == unique_key)).first()
+        if existing is None:
+            # Finished in the meantime: queue a fresh one
+            return enqueue_job(kind, unique_key)
+        return existing
+
+
+def claim_tasks(worker_id: str, limit: int = QUEUE_CLAIM_BATCH) -> list:
+    """Atomically move up to `limit` due pending tasks to running for this worker."""
+    now = datetime.utcnow()
+    with Session(engine, expire_on_commit=False) as session:
+        due = session.exec(
+            select(IngestTask.id)
+            .where(IngestTask.status == "pending", IngestTask.available_at <= now)
+            .order_by(IngestTask.id)
+            .limit(limit)
+        ).all()
+        claimed = []
+        for task_id in due:
+            # Conditional update so two workers never claim the same task
+            result = session.exec(
+                update(IngestTask)
+                .where(IngestTask.id == task_id, IngestTask.status == "pending")
+                .values(status="running", worker=worker_id, attempts=IngestTask.attempts + 1, updated_at=now)
+            )
+            if result.rowcount == 1:
+                claimed.append(task_id)
+        session.commit()
+        if not claimed:
+            return []
+        return session.exec(select(IngestTask).where(IngestTask.id.in_(claimed)).order_by(IngestTask.id)).all()
+
+def _remove_payload(task: IngestTask):
+    if task.payload_path and os.path.exists(task.payload_path):
+        try:
+            os.remove(task.payload_path)
+        except OSError as e:
+            print(f"Error removing spooled file {task.payload_path}: {e}")
+
+def finish_task(task_id: int, succeeded: bool, detail: str = None, candidate_id: int = None, retryable: bool = True):
+    """Record a task outcome. Retryable failures go back to pending with exponential backoff."""
+    with Session(engine) as session:
+        task = session.get(IngestTask, task_id)
+        if task is None:
+            return
+        now = datetime.utcnow()
+        task.detail = detail
+        task.updated_at = now
+        if succeeded:
+            task.status = "succeeded"
+            task.candidate_id = candidate_id
+            task.unique_key = None
+            _remove_payload(task)
+        elif retryable and task.attempts < QUEUE_MAX_ATTEMPTS:
+            task.status = "pending"
+            task.available_at = now + timedelta(seconds=QUEUE_RETRY_DELAY * 2 ** (task.attempts - 1))
+        else:
+            task.status = "failed"
+            task.unique_key = None
+            _remove_payload(task)
+        session.add(task)
+        session.commit()
+
+def renew_leases(worker_id: str, task_ids: list):
+    """Mark this worker's running tasks as alive, so long tasks aren't mistaken for stale ones."""
+    with Session(engine) as session:
+        session.exec(
+            update(IngestTask)
+            .where(IngestTask.id.in_(task_ids), IngestTask.status == "running", IngestTask.worker == worker_id)
+            .values(updated_at=datetime.utcnow())
+        )
+        session.commit()
+
+async def _keep_leases(worker_id: str, task_ids: list, lease_seconds: int = QUEUE_LEASE_SECONDS):
+    # A few renewals per lease period, so one slow commit doesn't let the lease lapse
+    while True:
+        await asyncio.sleep(max(1.0, lease_seconds / 3))
+        try:
+            await run_io(renew_leases, worker_id, task_ids)
+        except Exception as e:
+            print(f"Queue worker {worker_id} could not renew its leases: {e}")
+
+def recover_stale_tasks(lease_seconds: int = QUEUE_LEASE_SECONDS) -> int:
+    """Requeue tasks left running by a worker that died (not renewed within the lease)."""
+    cutoff = datetime.utcnow() - timedelta(seconds=lease_seconds)
+    with Session(engine) as session:
+        result = session.exec(
+            update(IngestTask)
+            .where(IngestTask.status == "running", IngestTask.updated_at < cutoff)
+            .values(status="pending", available_at=datetime.utcnow())
+        )
+        session.commit()
+        return result.rowcount
+
+
+def batch_status(batch_id: int) -> dict:
+    with Session(engine) as session:
+        batch = session.get(IngestBatch, batch_id)
+        if batch is None:
+            return None
+        tasks = session.exec(select(IngestTask).where(IngestTask.batch_id == batch_id).order_by(IngestTask.id)).all()
+
+    counts = {"pending": 0, "running": 0, "succeeded": 0, "failed": 0}
+    for task in tasks:
+        counts[task.status] = counts.get(task.status, 0) + 1
+    if counts["pending"] or counts["running"]:
+        status = "running" if counts["running"] or counts["succeeded"] or counts["failed"] else "pending"
+    else:
+        status = "completed_with_errors" if counts["failed"] else "completed"
+
+    return {
+        "batch_id": batch.id,
+        "kind": batch.kind,
+        "status": status,
+        "created_at": batch.created_at,
+        "total": len(tasks),
+        **counts,
+        "tasks": [
+            {
+                "task_id": task.id,
+                "filename": task.filename,
+                "status": task.status,
+                "attempts": task.attempts,
+                "detail": task.detail,
+                "candidate_id": task.candidate_id,
+            }
+            for task in tasks
+        ],
+    }
+
+
+async def _process_resumes(tasks: list, update_indexes: bool = True):
+    from backend.services.ingestion import ingest_documents
+
+    documents = []
+    readable = []
+    for task in tasks:
+        # Parsers read the spooled file by path
+        if task.payload_path and os.path.isfile(task.payload_path):
+            documents.append((task.filename, task.payload_path))
+            readable.append(task)
+        else:
+            await run_io(finish_task, task.id, False, f"Spooled file unavailable: {task.payload_path}", retryable=False)
+
+    async for result in ingest_documents(documents, update_indexes=update_indexes):
+        task = readable[result["index"]]
+        if result["status"] == "success":
+            await run_io(finish_task, task.id, True, candidate_id=result["candidate_id"])
+        else:
+            await run_io(finish_task, task.id, False, result.get("detail"), retryable=result.get("retryable", True))
+
+async def _process_job(task: IngestTask):
+    from backend.services.candidates import seed_fake_data, regenerate_missing_embeddings
+
+    try:
+        with Session(engine) as session:
+            if task.kind == "regenerate":
+                updated_count = await regenerate_missing_embeddings(session)
+                detail = f"Regenerated embeddings for {updated_count} candidates"
+            elif task.kind == "seed":
+                await seed_fake_data(session)
+                detail = "Database seeded"
+            else:
+                await run_io(finish_task, task.id, False, f"Unknown task kind: {task.kind}", retryable=False)
+                return
+        await run_io(finish_task, task.id, True, detail)
+    except Exception as e:
+        print(f"Error running {task.kind} task {task.id}: {e}")
+        await run_io(finish_task, task.id, False, str(e))
+
+async def run_worker(worker_id: str = None, stop: asyncio.Event = None, poll_interval: float = QUEUE_POLL_INTERVAL, update_indexes: bool = True):
+    """
+    Claim and process queued tasks until `stop` is set. Standalone workers pass
+    update_indexes=False: they never rank, so they don't keep in-memory indexes of what they write.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    stop = stop or asyncio.Event()
+    while not stop.is_set():
+        try:
+            tasks = await run_io(claim_tasks, worker_id)
+        except Exception as e:
+            print(f"Queue worker {worker_id} could not claim tasks: {e}")
+            tasks = []
+        if not tasks:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        # Renew the claim while the tasks run (regenerating embeddings can outlast the lease)
+        heartbeat = asyncio.create_task(_keep_leases(worker_id, [task.id for task in tasks]))
+        try:
+            resumes = [task for task in tasks if task.kind == "resume"]
+            if resumes:
+                await _process_resumes(resumes, update_indexes)
+            for task in tasks:
+                if task.kind != "resume":
+                    await _process_job(task)
+        finally:
+            heartbeat.cancel()
+
+
+_workers = []
+_stop = None
+
+def start_queue_workers(count: int = QUEUE_WORKERS):
+    """Start in-process queue workers on the running event loop."""
+    global _stop
+    if count <= 0 or _workers:
+        return
+    _stop = asyncio.Event()
+    recover_stale_tasks()
+    for i in range(count):
+        _workers.append(asyncio.create_task(run_worker(f"api-{os.getpid()}-{i}", _stop)))
+
+async def stop_queue_workers(grace_seconds: float = 5.0):
+    """Let workers finish their current tasks, then cancel (unfinished tasks are recovered later)."""
+    if _stop is not None:
+        _stop.set()
+    if _workers:
+        await asyncio.wait(_workers, timeout=grace_seconds)
+    for worker in _workers:
+        worker.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
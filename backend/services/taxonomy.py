@@ -0,0 +1,83 @@
+import json
+import os
+import re
+from backend.services.tokenizer import tokenize, build_vocabulary, PhraseMatcher
+
+# Skills, soft skills (each with aliases) and section-header synonyms used by the extractor
+SKILL_TAXONOMY_PATH = os.getenv(
+    "SKILL_TAXONOMY_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "skill_taxonomy.json"),
+)
+
+
+class Taxonomy:
+    """
+    A skill taxonomy compiled for single-pass matching.
+    Skill aliases become one phrase table (PhraseMatcher), so matching cost depends on the
+    text length, not on the number of skills. Section synonyms are compiled into one regex
+    that finds all header candidates in one scan.
+    """
+
+    def __init__(self, skills: dict, soft_skills: dict = None, sections: dict = None):
+        # dict order is the order skills are reported in
+        self.skills = list(skills)
+        self.soft_skills = list(soft_skills or {})
+        self.sections = {name: list(keywords) for name, keywords in (sections or {}).items()}
+
+        self.aliases = {}  # canonical skill -> surface forms (itself included)
+        for table in (skills, soft_skills or {}):
+            for skill, aliases in table.items():
+                self.aliases[skill] = [skill] + [a for a in (aliases or []) if a != skill]
+        self.matcher = PhraseMatcher(build_vocabulary(self.aliases))
+        self._order = {skill: i for i, skill in enumerate(self.aliases)}
+        self._soft = set(self.soft_skills)
+
+        keywords = sorted({kw.lower() for kws in self.sections.values() for kw in kws}, key=len, reverse=True)
+        # Keywords that are prefixes of a longer keyword also occur wherever the longer one matches
+        self._prefixes = {kw: [other for other in keywords if other != kw and kw.startswith(other)] for kw in keywords}
+        # Lookahead so overlapping keywords ("work experience" / "experience") are all seen
+        self._section_pattern = re.compile("(?=(" + "|".join(re.escape(kw) for kw in keywords) + "))") if keywords else None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Taxonomy":
+        def table(value):
+            # Plain lists are accepted for entries without aliases
+            return {item: [] for item in value} if isinstance(value, list) else dict(value or {})
+        return cls(table(data.get("skills")), table(data.get("soft_skills")), data.get("sections"))
+
+    def match(self, text: str) -> set:
+        """Canonical skills and soft skills mentioned in the text (whole words only)."""
+        return self.matcher.match(tokenize(text))
+
+    def extract_skills(self, text: str) -> tuple:
+        """(skills, soft_skills) found in the text, in taxonomy order."""
+        found = sorted(self.match(text), key=self._order.__getitem__)
+        return [s for s in found if s not in self._soft], [s for s in found if s in self._soft]
+
+    def section_starts(self, lower_text: str) -> dict:
+        """
+        Offset of each section in the lowercased text: for every section, the first occurrence of
+        the first of its synonyms that occurs at all (synonyms are listed in priority order).
+        """
+        if self._section_pattern is None:
+            return {}
+        first_seen = {}
+        for m in self._section_pattern.finditer(lower_text):
+            kw = m.group(1)
+            for found in [kw] + self._prefixes[kw]:
+                first_seen.setdefault(found, m.start())
+        starts = {}
+        for name, keywords in self.sections.items():
+            for kw in keywords:
+                if kw.lower() in first_seen:
+                    starts[name] = first_seen[kw.lower()]
+                    break
+        return starts
+
+
+def load_taxonomy(path: str = SKILL_TAXONOMY_PATH) -> Taxonomy:
+    with open(path, "r", encoding="utf-8") as f:
+        return Taxonomy.from_dict(json.load(f))
+
+# Loaded once per process (the extractor also runs in the CPU worker processes)
+taxonomy = load_taxonomy()
@@ -0,0 +1,56 @@
+import re
+
+# Lowercase words, keeping the symbols that belong to tech names (c++, c#, node.js).
+# A trailing full stop is not part of the token, so "Python." still gives "python".
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+
+
+def tokenize(text: str) -> list:
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+def normalize_term(term: str) -> str:
+    """Canonical form of a (possibly multi-word) term: its tokens joined by single spaces."""
+    return " ".join(tokenize(term))
+
+def build_vocabulary(terms) -> dict:
+    """
+    Phrase lookup table for PhraseMatcher. terms is an iterable of terms or a dict of
+    term -> list of surface forms (e.g. "lead" -> ["lead", "leader", "leadership"]).
+    Returns normalized phrase -> tuple of terms it stands for.
+    """
+    vocabulary = {}
+    items = terms.items() if isinstance(terms, dict) else ((term, [term]) for term in terms)
+    for term, surfaces in items:
+        for surface in surfaces:
+            phrase = normalize_term(surface)
+            if phrase and term not in vocabulary.get(phrase, ()):
+                vocabulary[phrase] = vocabulary.get(phrase, ()) + (term,)
+    return vocabulary
+
+class PhraseMatcher:
+    """
+    Finds the terms of a vocabulary (see build_vocabulary) in tokenized text in a single pass:
+    each token is a dict lookup, and longer n-grams are only built from tokens that start a
+    multi-word phrase. Cost depends on the text length, not on the vocabulary size, and
+    matches are whole words (so "go" does not match inside "good").
+    """
+
+    def __init__(self, vocabulary: dict):
+        self.vocabulary = vocabulary
+        self.max_words = max((phrase.count(" ") + 1 for phrase in vocabulary), default=1)
+        self.starts = frozenset(phrase.split(" ", 1)[0] for phrase in vocabulary if " " in phrase)
+
+    def match(self, tokens: list) -> set:
+        vocabulary, starts = self.vocabulary, self.starts
+        found = set()
+        n = len(tokens)
+        for i, token in enumerate(tokens):
+            terms = vocabulary.get(token)
+            if terms:
+                found.update(terms)
+            if token in starts:
+                for size in range(2, min(self.max_words, n - i) + 1):
+                    terms = vocabulary.get(" ".join(tokens[i:i + size]))
+                    if terms:
+                        found.update(terms)
+        return found
@@ -0,0 +1,164 @@
+import os
+import shutil
+import tempfile
+import uuid
+import zipfile
+from fastapi import HTTPException, UploadFile
+from backend.services.parser import is_supported, DOCUMENT_MAX_BYTES
+from backend.services.executor import run_io
+
+# Uploads are streamed into a per-request temporary directory, UPLOAD_CHUNK_BYTES at a time, and
+# parsed from there by path, so a request holds about one chunk in memory however many or however
+# large its files are. Every document (an uploaded file or a ZIP entry) may be at most
+# DOCUMENT_MAX_BYTES. A request body may be at most UPLOAD_MAX_REQUEST_BYTES (checked against
+# Content-Length before it is read, then while it streams in), and so may the documents
+# extracted from it. File types are checked by their leading bytes, not just the extension.
+UPLOAD_MAX_REQUEST_BYTES = int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", str(100 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+UPLOAD_TMP_DIR = os.getenv("UPLOAD_TMP_DIR") or None  # default: the system temp directory
+UPLOAD_PATHS = ("/api/v1/upload", "/api/v1/upload/stream", "/api/v1/batches")
+
+_ZIP_MAGIC = (b"PK\x03\x04", b"PK\x05\x06")  # local file header, empty archive
+_OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"  # legacy Word .doc
+
+
+class RequestTooLarge(HTTPException):
+    """The request as a whole is over its byte limit (not just one of its files)."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(status_code=413, detail=f"Upload exceeds {max_bytes} bytes per request")
+
+
+def check_file_type(filename: str, head: bytes):
+    """Raise unless the first bytes of a file match its extension."""
+    name = filename.lower()
+    if name.endswith(".pdf"):
+        # Readers accept a little junk before the header
+        matches = b"%PDF-" in head[:1024]
+    elif name.endswith((".docx", ".doc", ".zip")):
+        if head.startswith(_OLE_MAGIC):
+            raise HTTPException(status_code=415, detail=f"{filename} is a legacy Word document; please save it as DOCX")
+        matches = head.startswith(_ZIP_MAGIC)
+    else:
+        raise HTTPException(status_code=400, detail="Unsupported file format. Please upload PDF or DOCX.")
+    if not matches:
+        raise HTTPException(status_code=415, detail=f"Contents of {filename} do not match its file type")
+
+
+class UploadSpool:
+    """
+    Temporary directory holding one request's uploads. save() streams an UploadFile into it and
+    returns (filename, path) documents, expanding ZIP archives; close() removes everything.
+    """
+
+    def __init__(self, max_request_bytes: int = UPLOAD_MAX_REQUEST_BYTES, max_file_bytes: int = DOCUMENT_MAX_BYTES):
+        self.directory = tempfile.mkdtemp(prefix="hirex-upload-", dir=UPLOAD_TMP_DIR)
+        self.max_request_bytes = max_request_bytes
+        self.max_file_bytes = max_file_bytes
+        self.document_bytes = 0
+
+    def _new_path(self) -> str:
+        return os.path.join(self.directory, uuid.uuid4().hex)
+
+    def _count(self, filename: str, size: int, added: int):
+        if self.max_file_bytes and size > self.max_file_bytes:
+            raise HTTPException(status_code=413, detail=f"{filename} exceeds {self.max_file_bytes} bytes")
+        self.document_bytes += added
+        if self.max_request_bytes and self.document_bytes > self.max_request_bytes:
+            raise RequestTooLarge(self.max_request_bytes)
+
+    async def save(self, file: UploadFile) -> tuple:
+        """Spool one upload. Returns (documents, errors); errors are per ZIP entry."""
+        is_zip = file.filename.lower().endswith(".zip")
+        path = self._new_path()
+        size = 0
+        try:
+            with open(path, "wb") as out:
+                while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+                    if size == 0:
+                        check_file_type(file.filename, chunk)
+                    size += len(chunk)
+                    # An archive is bounded by the request limit; its entries are counted once extracted
+                    if not is_zip:
+                        self._count(file.filename, size, len(chunk))
+                    await run_io(out.write, chunk)
+            if size == 0:
+                raise HTTPException(status_code=400, detail=f"{file.filename} is empty")
+        except BaseException:
+            os.remove(path)
+            raise
+        if is_zip:
+            return await run_io(self._expand_zip, file.filename, path)
+        return [(file.filename, path)], []
+
+    def _expand_zip(self, filename: str, path: str) -> tuple:
+        """Extract the PDF/DOCX entries of a spooled archive (as "archive.zip/entry.pdf") in chunks."""
+        documents, errors = [], []
+        try:
+            with zipfile.ZipFile(path) as archive:
+                for info in archive.infolist():
+                    name = info.filename
+                    if info.is_dir() or name.startswith("__MACOSX/") or not is_supported(name):
+                        continue
+                    entry_name = f"{filename}/{name}"
+                    entry_path = self._new_path()
+                    size = 0
+                    try:
+                        # Sizes in the archive directory can't be trusted, so the copy itself is bounded
+                        with archive.open(info) as src, open(entry_path, "wb") as out:
+                            while chunk := src.read(UPLOAD_CHUNK_BYTES):
+                                if size == 0:
+                                    check_file_type(entry_name, chunk)
+                                size += len(chunk)
+                                self._count(entry_name, size, len(chunk))
+                                out.write(chunk)
+                        documents.append((entry_name, entry_path))
+                    except RequestTooLarge:
+                        raise
+                    except Exception as e:
+                        os.remove(entry_path)
+                        detail = e.detail if isinstance(e, HTTPException) else str(e)
+                        errors.append({"filename": entry_name, "status": "error", "detail": detail})
+        finally:
+            os.remove(path)
+        return documents, errors
+
+    def close(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class UploadLimitMiddleware:
+    """
+    Rejects upload requests with bodies over max_bytes (413): up front when Content-Length says
+    so, otherwise as soon as the streamed body goes past the limit.
+    """
+
+    def __init__(self, app, max_bytes: int = UPLOAD_MAX_REQUEST_BYTES, paths: tuple = UPLOAD_PATHS):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.max_bytes or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        length = dict(scope["headers"]).get(b"content-length", b"")
+        if length.isdigit() and int(length) > self.max_bytes:
+            detail = RequestTooLarge(self.max_bytes).detail.encode()
+            await send({"type": "http.response.start", "status": 413, "headers": [(b"content-type", b"application/json")]})
+            await send({"type": "http.response.body", "body": b'{"detail":"' + detail + b'"}'})
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Raised while the form is parsed; FastAPI turns it into the 413 response
+                    raise RequestTooLarge(self.max_bytes)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,774 @@
+import os
+import threading
+from contextlib import contextmanager
+import numpy as np
+from sqlalchemy import text, bindparam
+from backend.models import decode_embedding
+from backend.services.vector_store import EmbeddingMatrix, top_k_indices, top_k_batch
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, so one process per store directory
+    fcntl = None
+
+# Index selection (VECTOR_INDEX=exact|ivf|mmap|pgvector) and where the index is persisted between restarts
+VECTOR_INDEX = os.getenv("VECTOR_INDEX", "ivf")
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", "./hirex_index.npz")
+
+# Below this many vectors the IVF index just does an exact scan
+IVF_MIN_TRAIN = int(os.getenv("IVF_MIN_TRAIN", "20000"))
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "0"))  # 0 = pick from the number of lists
+
+# VECTOR_INDEX=mmap: the shared embedding file and when tombstoned rows are compacted away
+EMBEDDING_STORE_DIR = os.getenv("EMBEDDING_STORE_DIR", "./hirex_embeddings")
+EMBEDDING_STORE_COMPACT_RATIO = float(os.getenv("EMBEDDING_STORE_COMPACT_RATIO", "0.25"))
+
+# pgvector: how many nearest candidates an approximate (HNSW) query returns (at most 1000)
+PGVECTOR_SEARCH_LIMIT = int(os.getenv("PGVECTOR_SEARCH_LIMIT", "1000"))
+
+
+class ExactIndex(EmbeddingMatrix):
+    """
+    Brute-force index: every query is scored against every stored vector.
+    Also the fallback for the approximate indexes.
+    """
+
+    kind = "exact"
+
+    def rebuild(self):
+        pass
+
+    def save(self, path: str = VECTOR_INDEX_PATH):
+        with self._lock:
+            n = self._size
+            state = {
+                "kind": np.array(self.kind),
+                "ids": self._ids[:n],
+                "matrix": self._matrix[:n],
+            }
+            state.update(self._extra_state())
+        # Per-process temp file: every uvicorn worker saves on shutdown
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, **state)
+        os.replace(tmp_path, path)
+
+    def load_file(self, path: str = VECTOR_INDEX_PATH, expected_ids=None) -> bool:
+        """
+        Restore a persisted index. When expected_ids is given the file is only used if it
+        holds exactly those ids, so a stale file never serves deleted or missing candidates.
+        """
+        if not os.path.exists(path):
+            return False
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if str(data["kind"]) != self.kind or data["matrix"].shape[1:] != (self.dim,):
+                    return False
+                ids = data["ids"].astype(np.int64)
+                if expected_ids is not None and set(ids.tolist()) != set(expected_ids):
+                    return False
+                matrix = data["matrix"].astype(np.float32)
+                extra = {key: data[key] for key in data.files if key not in ("kind", "ids", "matrix")}
+        except Exception as e:
+            print(f"Error reading vector index {path}: {e}")
+            return False
+
+        with self._lock:
+            self._matrix = matrix
+            self._ids = ids
+            self._size = len(ids)
+            self._positions = {int(cid): row for row, cid in enumerate(ids)}
+            self._restore_extra_state(extra)
+            self.loaded = True
+        return True
+
+    def _extra_state(self) -> dict:
+        return {}
+
+    def _restore_extra_state(self, extra: dict):
+        pass
+
+
+class IVFIndex(ExactIndex):
+    """
+    Inverted-file index: vectors are clustered with spherical k-means and a query only scores
+    the rows in the nprobe lists whose centroids are closest to it.
+    Pools smaller than IVF_MIN_TRAIN are served exactly.
+
+    Once the pool crosses IVF_MIN_TRAIN or doubles, upsert() retrains in a background thread on
+    a copy of the rows. Until the new centroids are swapped in, queries use the old lists, and
+    rows added or changed since the copy (list -1) are always scored.
+    """
+
+    kind = "ivf"
+
+    def __init__(self, dim: int = 384, min_train: int = IVF_MIN_TRAIN, nprobe: int = IVF_NPROBE):
+        super().__init__(dim)
+        self.min_train = min_train
+        self.nprobe = nprobe
+        self._assign = np.zeros(0, dtype=np.int32)  # row -> list id, aligned with the matrix
+        self._centroids = None
+        self._trained_size = 0
+        self._generation = 0  # bumped by clear() and rebuild() so a stale background retrain is dropped
+        self._retraining = None  # generation of the retrain in progress
+        self._changed = set()  # ids upserted while it runs
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    def _grow(self, needed: int):
+        super()._grow(needed)
+        if self._assign.shape[0] < self._matrix.shape[0]:
+            assign = np.zeros(self._matrix.shape[0], dtype=np.int32)
+            keep = min(self._size, self._assign.shape[0])
+            assign[:keep] = self._assign[:keep]
+            self._assign = assign
+
+    def _nearest_lists(self, vectors: np.ndarray, centroids: np.ndarray = None, chunk: int = 65536) -> np.ndarray:
+        centroids = self._centroids if centroids is None else centroids
+        out = np.empty(vectors.shape[0], dtype=np.int32)
+        for start in range(0, vectors.shape[0], chunk):
+            block = vectors[start:start + chunk]
+            out[start:start + chunk] = np.argmax(block @ centroids.T, axis=1)
+        return out
+
+    def upsert(self, candidate_id: int, embedding) -> bool:
+        with self._lock:
+            if not super().upsert(candidate_id, embedding):
+                return False
+            row = self._positions[candidate_id]
+            if self._retraining is not None:
+                # Scanned exactly until the retrained lists are swapped in
+                self._assign[row] = -1
+                self._changed.add(candidate_id)
+            elif self.trained:
+                self._assign[row] = self._nearest_lists(self._matrix[row:row + 1])[0]
+                # Lists drift out of balance as the pool grows, so retrain once it has doubled
+                if self._size >= 2 * self._trained_size:
+                    self._start_retrain()
+            elif self._size >= self.min_train:
+                self._start_retrain()
+        return True
+
+    def _start_retrain(self):
+        """Train new lists on a copy of the current rows in a background thread (lock held)."""
+        n = self._size
+        ids = self._ids[:n].copy()
+        data = self._matrix[:n].copy()
+        self._retraining = self._generation
+        self._changed = set()
+        threading.Thread(target=self._retrain, args=(ids, data, self._generation), daemon=True).start()
+
+    def _retrain(self, ids: np.ndarray, data: np.ndarray, generation: int):
+        try:
+            centroids = self._train(data)
+            assign = self._nearest_lists(data, centroids)
+            with self._lock:
+                if generation != self._generation:
+                    return
+                # Map the trained assignments onto the current rows; rows added or changed since
+                # the copy are assigned with the new centroids here
+                n = self._size
+                current = self._ids[:n]
+                order = np.argsort(ids)
+                pos = np.minimum(np.searchsorted(ids[order], current), len(ids) - 1)
+                found = ids[order][pos] == current
+                if self._changed:
+                    found &= ~np.isin(current, np.fromiter(self._changed, dtype=np.int64))
+                new_assign = np.zeros(self._matrix.shape[0], dtype=np.int32)
+                new_assign[:n][found] = assign[order][pos[found]]
+                stale = np.flatnonzero(~found)
+                if len(stale):
+                    new_assign[stale] = self._nearest_lists(self._matrix[stale], centroids)
+                self._centroids = centroids
+                self._assign = new_assign
+                self._trained_size = len(ids)
+        except Exception as e:
+            print(f"Error retraining IVF index: {e}")
+        finally:
+            with self._lock:
+                if self._retraining == generation:
+                    self._retraining = None
+                    self._changed = set()
+
+    def remove(self, candidate_id: int) -> bool:
+        with self._lock:
+            row = self._positions.get(candidate_id)
+            if row is None:
+                return False
+            # The base class swaps the last row into the hole; keep list ids in step
+            self._assign[row] = self._assign[self._size - 1]
+            return super().remove(candidate_id)
+
+    def clear(self):
+        with self._lock:
+            super().clear()
+            self._assign = np.zeros(0, dtype=np.int32)
+            self._centroids = None
+            self._trained_size = 0
+            self._generation += 1
+            self._retraining = None
+
+    def load(self, rows):
+        super().load(rows)
+        self.rebuild()
+
+    @staticmethod
+    def _train(data: np.ndarray, iterations: int = 10, seed: int = 0) -> np.ndarray:
+        """Centroids of the rows in data by spherical k-means (on a sample)."""
+        n = data.shape[0]
+        nlist = int(min(4096, n, max(1, 4 * np.sqrt(n))))
+        rng = np.random.default_rng(seed)
+        sample = data[rng.choice(n, min(n, nlist * 64), replace=False)]
+        centroids = sample[rng.choice(sample.shape[0], nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            order = np.argsort(assign, kind="stable")
+            present, starts = np.unique(assign[order], return_index=True)
+            sums = np.zeros_like(centroids)
+            sums[present] = np.add.reduceat(sample[order], starts, axis=0)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            filled = norms[:, 0] > 0
+            # Empty lists keep their previous centroid
+            centroids[filled] = sums[filled] / norms[filled]
+        return centroids.astype(np.float32)
+
+    def rebuild(self, iterations: int = 10, seed: int = 0):
+        """(Re)train the centroids and reassign every row, blocking (used when loading)."""
+        with self._lock:
+            self._generation += 1
+            self._retraining = None
+            n = self._size
+            if n < self.min_train:
+                self._centroids = None
+                self._assign = np.zeros(self._matrix.shape[0], dtype=np.int32)
+                self._trained_size = 0
+                return
+            data = self._matrix[:n]
+            self._centroids = self._train(data, iterations, seed)
+            self._assign = np.zeros(self._matrix.shape[0], dtype=np.int32)
+            self._assign[:n] = self._nearest_lists(data)
+            self._trained_size = n
+
+    def scores(self, query, exact: bool = False) -> tuple:
+        if exact or not self.trained:
+            return super().scores(query)
+        q = self._normalize(query)
+        if q.shape[0] != self.dim:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        with self._lock:
+            n = self._size
+            nlist = self._centroids.shape[0]
+            nprobe = self.nprobe or max(8, nlist // 10)
+            probe = np.argsort(-(self._centroids @ q))[:nprobe]
+            # One extra slot, always set, for rows awaiting assignment (list -1)
+            probed = np.zeros(nlist + 1, dtype=bool)
+            probed[probe] = True
+            probed[-1] = True
+            rows = np.flatnonzero(probed[self._assign[:n]])
+            ids = self._ids[rows]
+            sims = self._matrix[rows] @ q
+        return ids, sims
+
+    def search(self, query, top_k: int = None, min_score: float = None, exact: bool = False) -> list:
+        results = super().search(query, top_k=top_k, min_score=min_score, exact=exact)
+        # Too few rows in the probed lists: answer exactly rather than return a short list
+        if not exact and self.trained and top_k is not None and len(results) < min(top_k, self._size):
+            results = super().search(query, top_k=top_k, min_score=min_score, exact=True)
+        return results
+
+    def _extra_state(self) -> dict:
+        if not self.trained:
+            return {}
+        return {
+            "centroids": self._centroids,
+            "assign": self._assign[:self._size],
+            "trained_size": np.array(self._trained_size),
+        }
+
+    def _restore_extra_state(self, extra: dict):
+        if "centroids" in extra:
+            self._centroids = extra["centroids"].astype(np.float32)
+            self._assign = extra["assign"].astype(np.int32)
+            self._trained_size = int(extra["trained_size"])
+        else:
+            self._centroids = None
+            self._assign = np.zeros(self._size, dtype=np.int32)
+            self._trained_size = 0
+            if self._size >= self.min_train:
+                self.rebuild()
+
+
+class MmapIndex(ExactIndex):
+    """
+    Exact index over an embedding file shared by every process on the host (e.g. uvicorn
+    --workers): each process maps it read-only, so the vectors are held once in the page cache
+    instead of once per worker. Under EMBEDDING_STORE_DIR, per epoch: vectors.<epoch> (normalized
+    float32 rows), ids.<epoch> (candidate id per row) and dead.<epoch> (one tombstone byte per
+    row); meta holds the dimension, epoch, row count and a generation counter.
+
+    Every change (upload, delete, regenerate, full load) goes through the same writer path: take
+    the exclusive file lock, append rows or set tombstones, bump the generation. Replacing a
+    vector appends a row and tombstones the old one. Readers compare the generation before each
+    query and only map the rows added since. Once more than EMBEDDING_STORE_COMPACT_RATIO of the
+    rows are dead, the live rows are rewritten into a new epoch.
+    """
+
+    kind = "mmap"
+
+    def __init__(self, dim: int = 384, directory: str = EMBEDDING_STORE_DIR, compact_ratio: float = EMBEDDING_STORE_COMPACT_RATIO):
+        super().__init__(dim)
+        self.directory = directory
+        self.compact_ratio = compact_ratio
+        self._meta = None
+        self._epoch = -1
+        self._generation = -1
+        self._rows = 0
+        self._clear_view()
+
+    def _clear_view(self):
+        self._vectors = np.zeros((0, self.dim), dtype=np.float32)
+        self._row_ids = np.zeros(0, dtype=np.int64)
+        self._alive = np.zeros(0, dtype=bool)  # snapshot of the tombstones at the last refresh
+        self._live = np.zeros(0, dtype=np.int64)
+        self._sorted_ids = np.zeros(0, dtype=np.int64)  # every mapped row's id, sorted (dead rows included)
+        self._sorted_rows = np.zeros(0, dtype=np.int64)
+        self._size = 0
+        self._max_id = 0  # None: compute on demand
+
+    def _path(self, name: str, epoch: int = None) -> str:
+        return os.path.join(self.directory, name if epoch is None else f"{name}.{epoch}")
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool = True):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path("lock"), "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_meta(self):
+        """(dim, epoch, rows, generation), or None while the store does not exist."""
+        if self._meta is None:
+            if not os.path.exists(self._path("meta")):
+                return None
+            self._meta = np.memmap(self._path("meta"), dtype=np.int64, mode="r", shape=(4,))
+        return tuple(int(value) for value in self._meta)
+
+    def _write_meta(self, dim: int, epoch: int, rows: int, generation: int):
+        # Updated in place, so readers' existing mappings see the new values
+        mode = "r+b" if os.path.exists(self._path("meta")) else "wb"
+        with open(self._path("meta"), mode) as f:
+            f.write(np.asarray([dim, epoch, rows, generation], dtype=np.int64).tobytes())
+
+    def _open(self, name: str, epoch: int, dtype, shape: tuple):
+        if shape[0] == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(self._path(name, epoch), dtype=dtype, mode="r", shape=shape)
+
+    def _map(self, dim: int, epoch: int, rows: int, generation: int):
+        """Point the view at the given state; only rows added since the last call are indexed anew."""
+        if dim != self.dim:
+            # Written for another model; looks empty until load() rewrites it
+            self._clear_view()
+            self._epoch, self._rows, self._generation = epoch, 0, generation
+            return
+        appended_from = self._rows if epoch == self._epoch and rows >= self._rows else 0
+        if appended_from == 0:
+            self._sorted_ids = np.zeros(0, dtype=np.int64)
+            self._sorted_rows = np.zeros(0, dtype=np.int64)
+        self._vectors = self._open("vectors", epoch, np.float32, (rows, self.dim))
+        self._row_ids = self._open("ids", epoch, np.int64, (rows,))
+        self._alive = np.asarray(self._open("dead", epoch, np.uint8, (rows,))) == 0
+        self._live = np.flatnonzero(self._alive)
+        new_ids = np.asarray(self._row_ids[appended_from:])
+        order = np.argsort(new_ids, kind="stable")
+        if len(self._sorted_ids) and len(new_ids) and new_ids[order[0]] < self._sorted_ids[-1]:
+            # Ids out of order (re-added candidates): sort everything again
+            self._sorted_rows = np.argsort(np.asarray(self._row_ids), kind="stable")
+            self._sorted_ids = np.asarray(self._row_ids)[self._sorted_rows]
+        else:
+            self._sorted_ids = np.concatenate([self._sorted_ids, new_ids[order]])
+            self._sorted_rows = np.concatenate([self._sorted_rows, order + appended_from])
+        self._size = len(self._live)
+        self._max_id = None
+        self._epoch, self._rows, self._generation = epoch, rows, generation
+
+    def refresh(self):
+        """Map changes made by any process since the last call (one memory read when nothing changed)."""
+        meta = self._read_meta()
+        if meta is None or meta[3] == self._generation:
+            return
+        with self._lock, self._file_lock(exclusive=False):
+            self._map(*self._read_meta())
+
+    def _row_of(self, candidate_id: int):
+        start, stop = np.searchsorted(self._sorted_ids, [candidate_id, candidate_id + 1])
+        rows = self._sorted_rows[start:stop]
+        rows = rows[self._alive[rows]]
+        return int(rows[-1]) if len(rows) else None
+
+    # Writer path: callers hold self._lock and the exclusive file lock
+
+    def _begin_write(self) -> tuple:
+        meta = self._read_meta()
+        if meta is None or meta[0] != self.dim:
+            self._write_epoch(meta[1] + 1 if meta else 0, meta[3] + 1 if meta else 1, [])
+            meta = self._read_meta()
+        self._map(*meta)
+        return meta
+
+    def _write_epoch(self, epoch: int, generation: int, blocks, previous: int = None):
+        """Write (ids, vectors) blocks as a fresh epoch, switch to it and drop the older files."""
+        rows = 0
+        with open(self._path("vectors", epoch), "wb") as vectors, open(self._path("ids", epoch), "wb") as ids:
+            for block_ids, block_vectors in blocks:
+                vectors.write(np.ascontiguousarray(block_vectors, dtype=np.float32).tobytes())
+                ids.write(np.asarray(block_ids, dtype=np.int64).tobytes())
+                rows += len(block_ids)
+        with open(self._path("dead", epoch), "wb") as dead:
+            dead.write(bytes(rows))
+        self._write_meta(self.dim, epoch, rows, generation)
+        # Processes still mapping the old files keep reading them until their next refresh
+        for name in os.listdir(self.directory):
+            prefix, _, suffix = name.partition(".")
+            if prefix in ("vectors", "ids", "dead") and suffix.isdigit() and int(suffix) != epoch:
+                os.remove(os.path.join(self.directory, name))
+
+    def _append(self, meta: tuple, candidate_ids: list, vectors: np.ndarray):
+        dim, epoch, rows, generation = meta
+        # Written at the offset of the last committed row, so a crashed write leaves no gap
+        for name, data, itemsize in (
+            ("vectors", np.ascontiguousarray(vectors, dtype=np.float32).tobytes(), 4 * dim),
+            ("ids", np.asarray(candidate_ids, dtype=np.int64).tobytes(), 8),
+            ("dead", bytes(len(candidate_ids)), 1),
+        ):
+            with open(self._path(name, epoch), "r+b") as f:
+                f.seek(rows * itemsize)
+                f.write(data)
+                f.truncate()
+        self._write_meta(dim, epoch, rows + len(candidate_ids), generation + 1)
+
+    def _kill(self, meta: tuple, rows: list, bump: bool = True):
+        dim, epoch, count, generation = meta
+        with open(self._path("dead", epoch), "r+b") as f:
+            for row in rows:
+                f.seek(row)
+                f.write(b"\x01")
+        if bump:
+            self._write_meta(dim, epoch, count, generation + 1)
+
+    def _live_blocks(self, chunk: int = 65536):
+        for start in range(0, len(self._live), chunk):
+            rows = self._live[start:start + chunk]
+            yield self._row_ids[rows], self._vectors[rows]
+
+    def _end_write(self, compact: bool = False):
+        meta = self._read_meta()
+        self._map(*meta)
+        dead = self._rows - self._size
+        if dead and (compact or (self._rows >= 1024 and dead > self.compact_ratio * self._rows)):
+            self._write_epoch(meta[1] + 1, meta[3] + 1, self._live_blocks())
+            self._map(*self._read_meta())
+
+    def upsert(self, candidate_id: int, embedding) -> bool:
+        if embedding is None or len(embedding) != self.dim:
+            self.remove(candidate_id)
+            return False
+        vec = self._normalize(embedding)
+        with self._lock, self._file_lock():
+            meta = self._begin_write()
+            row = self._row_of(candidate_id)
+            if row is not None and np.array_equal(self._vectors[row], vec):
+                # Already written (e.g. by the process that ingested it)
+                return True
+            if row is not None:
+                self._kill(meta, [row], bump=False)
+            self._append(meta, [candidate_id], vec.reshape(1, -1))
+            self._end_write()
+        return True
+
+    def remove(self, candidate_id: int) -> bool:
+        with self._lock, self._file_lock():
+            meta = self._begin_write()
+            row = self._row_of(candidate_id)
+            if row is None:
+                return False
+            self._kill(meta, [row])
+            self._end_write()
+        return True
+
+    def clear(self):
+        with self._lock, self._file_lock():
+            meta = self._begin_write()
+            self._write_epoch(meta[1] + 1, meta[3] + 1, [])
+            self._end_write()
+
+    def load(self, rows):
+        """Rewrite the store from (candidate_id, embedding) pairs, unless it already holds exactly those ids."""
+        ids, matrix = self._decode_rows(rows)
+        ids = np.asarray(ids, dtype=np.int64)
+        with self._lock, self._file_lock():
+            meta = self._begin_write()
+            # Another worker may have just rewritten it
+            if self._size != len(ids) or not np.array_equal(np.unique(self._row_ids[self._live]), np.unique(ids)):
+                self._write_epoch(meta[1] + 1, meta[3] + 1, [(ids, matrix)])
+            self._end_write()
+            self.loaded = True
+
+    def rebuild(self):
+        """Compact away tombstoned rows."""
+        with self._lock, self._file_lock():
+            self._begin_write()
+            self._end_write(compact=True)
+
+    def save(self, path: str = None):
+        pass  # every write is already on disk
+
+    def load_file(self, path: str = None, expected_ids=None) -> bool:
+        self.refresh()
+        with self._lock:
+            if self._read_meta() is None or self._read_meta()[0] != self.dim:
+                return False
+            if expected_ids is not None and set(np.asarray(self._row_ids)[self._live].tolist()) != set(expected_ids):
+                return False
+            self.loaded = True
+        return True
+
+    def __len__(self):
+        self.refresh()
+        return self._size
+
+    def __contains__(self, candidate_id):
+        self.refresh()
+        with self._lock:
+            return self._row_of(int(candidate_id)) is not None
+
+    def max_id(self) -> int:
+        self.refresh()
+        with self._lock:
+            if self._max_id is None:
+                self._max_id = int(np.asarray(self._row_ids)[self._live].max()) if self._size else 0
+            return self._max_id
+
+    def scores(self, query, exact: bool = False) -> tuple:
+        self.refresh()
+        q = self._normalize(query)
+        with self._lock:
+            if self._size == 0 or q.shape[0] != self.dim:
+                return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+            sims = np.asarray(self._vectors @ q)
+            if self._size < self._rows:
+                return np.asarray(self._row_ids)[self._live], sims[self._live]
+            return np.array(self._row_ids), sims
+
+    def scores_for(self, query, candidate_ids) -> tuple:
+        self.refresh()
+        q = self._normalize(query)
+        with self._lock:
+            found = [(cid, self._row_of(cid)) for cid in map(int, candidate_ids)]
+            found = [(cid, row) for cid, row in found if row is not None]
+            if not found or q.shape[0] != self.dim:
+                return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+            rows = np.asarray([row for _, row in found], dtype=np.int64)
+            return np.asarray([cid for cid, _ in found], dtype=np.int64), np.asarray(self._vectors[rows] @ q)
+
+    def search_many(self, queries: list, top_k: int, chunk: int = 16384) -> list:
+        self.refresh()
+        results = [[] for _ in queries]
+        valid = [i for i, query in enumerate(queries) if query is not None and len(query) == self.dim]
+        if not valid or top_k <= 0:
+            return results
+        q = np.stack([self._normalize(queries[i]) for i in valid])
+        with self._lock:
+            alive = self._alive if self._size < self._rows else None
+            rows, sims = top_k_batch(q, self._vectors, top_k, chunk, valid=alive)
+            ids = np.asarray(self._row_ids)[rows] if rows.size else rows
+        for i, row_ids, row_sims in zip(valid, ids, sims):
+            results[i] = [(int(cid), float(sim)) for cid, sim in zip(row_ids, row_sims)]
+        return results
+
+
+class PgVectorIndex:
+    """
+    Candidate vectors kept in Postgres (pgvector) instead of process memory, with similarity
+    computed by the database. Vectors live in a candidate.embedding_vec column next to the
+    binary embedding; sync() fills it for rows written by any process, so the ingestion paths
+    stay unchanged. Approximate queries use an HNSW index and, like the IVF index, return the
+    PGVECTOR_SEARCH_LIMIT nearest candidates rather than the whole pool.
+    """
+
+    kind = "pgvector"
+
+    def __init__(self, dim: int = 384, search_limit: int = PGVECTOR_SEARCH_LIMIT):
+        self.dim = dim
+        # hnsw.ef_search caps how many rows an HNSW scan can return (at most 1000)
+        self.search_limit = max(1, min(search_limit, 1000))
+        self._size = 0
+        self._max_id = 0
+        self.loaded = False
+
+    def __len__(self):
+        return self._size
+
+    def max_id(self) -> int:
+        return self._max_id
+
+    @staticmethod
+    def _literal(vector) -> str:
+        return "[" + ",".join(repr(float(x)) for x in np.asarray(vector, dtype=np.float32).reshape(-1)) + "]"
+
+    def create_schema(self):
+        from backend.database import engine
+        if engine.dialect.name != "postgresql":
+            raise RuntimeError("VECTOR_INDEX=pgvector needs a PostgreSQL DATABASE_URL")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+            conn.execute(text(f"ALTER TABLE candidate ADD COLUMN IF NOT EXISTS embedding_vec vector({self.dim})"))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_candidate_embedding_vec ON candidate "
+                "USING hnsw (embedding_vec vector_cosine_ops)"
+            ))
+            # Lets sync() find rows whose vector column still has to be filled without a scan
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_candidate_embedding_vec_missing ON candidate (id) "
+                "WHERE embedding_vec IS NULL"
+            ))
+
+    def sync(self, session, chunk: int = 1000) -> int:
+        """Fill the vector column for rows that have an embedding but no vector yet, then refresh the counts."""
+        filled = 0
+        while True:
+            rows = session.execute(text(
+                "SELECT id, embedding FROM candidate WHERE embedding_vec IS NULL "
+                "AND length(embedding) > 0 ORDER BY id LIMIT :chunk"
+            ), {"chunk": chunk}).all()
+            updates = []
+            for candidate_id, embedding in rows:
+                vector = decode_embedding(embedding)
+                if vector.size == self.dim:
+                    updates.append({"id": candidate_id, "vec": self._literal(vector)})
+            if updates:
+                session.execute(text("UPDATE candidate SET embedding_vec = CAST(:vec AS vector) WHERE id = :id"), updates)
+            session.commit()
+            filled += len(updates)
+            # Rows with a wrongly sized embedding stay NULL; stop instead of reading them again
+            if len(rows) < chunk or not updates:
+                break
+        count, max_id = session.execute(text(
+            "SELECT count(*), max(id) FROM candidate WHERE embedding_vec IS NOT NULL"
+        )).one()
+        self._size, self._max_id = int(count), int(max_id or 0)
+        self.loaded = True
+        return filled
+
+    def upsert(self, candidate_id: int, embedding) -> bool:
+        from backend.database import engine
+        if embedding is None or len(embedding) != self.dim:
+            return False
+        with engine.begin() as conn:
+            conn.execute(
+                text("UPDATE candidate SET embedding_vec = CAST(:vec AS vector) WHERE id = :id"),
+                {"id": candidate_id, "vec": self._literal(embedding)},
+            )
+        # The count is refreshed by the next sync()
+        return True
+
+    def remove(self, candidate_id: int) -> bool:
+        # The row itself is deleted by the caller; the count is refreshed by the next sync()
+        return True
+
+    def clear(self):
+        self._size = 0
+        self._max_id = 0
+
+    def load(self, rows):
+        from sqlmodel import Session
+        from backend.database import engine
+        with Session(engine) as session:
+            self.sync(session)
+
+    def load_file(self, path: str = None, expected_ids=None) -> bool:
+        return False
+
+    def save(self, path: str = None):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def _query(self, sql: str, params: dict, approximate: bool) -> tuple:
+        from backend.database import engine
+        with engine.begin() as conn:
+            if approximate:
+                conn.execute(text(f"SET LOCAL hnsw.ef_search = {self.search_limit}"))
+            rows = conn.execute(text(sql), params).all()
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        sims = np.fromiter((row[1] for row in rows), dtype=np.float32, count=len(rows))
+        return ids, sims
+
+    def scores(self, query, exact: bool = False) -> tuple:
+        """Cosine similarity of the nearest search_limit candidates (every candidate when exact)."""
+        if len(query) != self.dim:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        params = {"q": self._literal(query)}
+        if exact:
+            sql = "SELECT id, 1 - (embedding_vec <=> CAST(:q AS vector)) FROM candidate WHERE embedding_vec IS NOT NULL"
+            return self._query(sql, params, approximate=False)
+        params["limit"] = self.search_limit
+        sql = (
+            "SELECT id, 1 - (embedding_vec <=> CAST(:q AS vector)) FROM candidate WHERE embedding_vec IS NOT NULL "
+            "ORDER BY embedding_vec <=> CAST(:q AS vector) LIMIT :limit"
+        )
+        return self._query(sql, params, approximate=True)
+
+    def scores_for(self, query, candidate_ids) -> tuple:
+        ids = [int(cid) for cid in candidate_ids]
+        if not ids or len(query) != self.dim:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        sql = text(
+            "SELECT id, 1 - (embedding_vec <=> CAST(:q AS vector)) FROM candidate "
+            "WHERE embedding_vec IS NOT NULL AND id IN :ids"
+        ).bindparams(bindparam("ids", expanding=True))
+        from backend.database import engine
+        with engine.connect() as conn:
+            rows = conn.execute(sql, {"q": self._literal(query), "ids": ids}).all()
+        return (
+            np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows)),
+            np.fromiter((row[1] for row in rows), dtype=np.float32, count=len(rows)),
+        )
+
+    def search_many(self, queries: list, top_k: int, chunk: int = None) -> list:
+        """Top_k for each query; the database does the work, one query at a time."""
+        return [self.search(query, top_k=top_k) if query is not None and len(query) == self.dim else [] for query in queries]
+
+    def search(self, query, top_k: int = None, min_score: float = None, exact: bool = False) -> list:
+        ids, sims = self.scores(query, exact=exact or (top_k or 0) > self.search_limit)
+        if min_score is not None:
+            keep = sims >= min_score
+            ids, sims = ids[keep], sims[keep]
+        order = top_k_indices(sims, top_k)
+        return [(int(ids[i]), float(sims[i])) for i in order]
+
+
+INDEX_TYPES = {
+    "exact": ExactIndex,
+    "ivf": IVFIndex,
+    "mmap": MmapIndex,
+    "pgvector": PgVectorIndex,
+}
+
+def create_index(kind: str = VECTOR_INDEX, dim: int = 384):
+    index_cls = INDEX_TYPES.get(kind)
+    if index_cls is None:
+        print(f"Unknown VECTOR_INDEX '{kind}', falling back to exact search.")
+        index_cls = ExactIndex
+    return index_cls(dim=dim)
+
+
+# Shared instance used by the API process
+candidate_store = create_index()
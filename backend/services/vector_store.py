@@ -0,0 +1,226 @@
+import threading
+import numpy as np
+from backend.models import decode_embedding
+
+class EmbeddingMatrix:
+    """
+    Process-wide matrix of pre-normalized float32 candidate embeddings keyed by candidate id.
+    Rows are L2-normalized on insert so a dot product with a normalized query is the cosine similarity.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self._lock = threading.RLock()
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._size = 0
+        self._positions = {}  # candidate id -> row
+        self.loaded = False
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, candidate_id):
+        return candidate_id in self._positions
+
+    def max_id(self) -> int:
+        with self._lock:
+            return int(self._ids[:self._size].max()) if self._size else 0
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vec = np.asarray(vector, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vec)
+        if norm > 0:
+            vec = vec / norm
+        return vec
+
+    def _grow(self, needed: int):
+        capacity = self._matrix.shape[0]
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2, 64)
+        matrix = np.zeros((new_capacity, self.dim), dtype=np.float32)
+        ids = np.zeros(new_capacity, dtype=np.int64)
+        matrix[:self._size] = self._matrix[:self._size]
+        ids[:self._size] = self._ids[:self._size]
+        self._matrix = matrix
+        self._ids = ids
+
+    def upsert(self, candidate_id: int, embedding) -> bool:
+        """
+        Insert or replace a candidate's vector. Empty or wrongly sized embeddings are ignored
+        (and drop any previous vector for that id).
+        """
+        if embedding is None or len(embedding) != self.dim:
+            self.remove(candidate_id)
+            return False
+        vec = self._normalize(embedding)
+        with self._lock:
+            row = self._positions.get(candidate_id)
+            if row is None:
+                self._grow(self._size + 1)
+                row = self._size
+                self._size += 1
+                self._positions[candidate_id] = row
+                self._ids[row] = candidate_id
+            self._matrix[row] = vec
+        return True
+
+    def remove(self, candidate_id: int) -> bool:
+        with self._lock:
+            row = self._positions.pop(candidate_id, None)
+            if row is None:
+                return False
+            last = self._size - 1
+            if row != last:
+                # Swap the last row into the hole to keep the matrix dense
+                moved_id = int(self._ids[last])
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = moved_id
+                self._positions[moved_id] = row
+            self._size = last
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._matrix = np.zeros((0, self.dim), dtype=np.float32)
+            self._ids = np.zeros(0, dtype=np.int64)
+            self._size = 0
+            self._positions = {}
+
+    def load(self, rows):
+        """
+        Rebuild the matrix from (candidate_id, embedding) pairs.
+        Embeddings may be lists, arrays or the binary column values stored in the database.
+        """
+        ids, matrix = self._decode_rows(rows)
+        with self._lock:
+            self._matrix = matrix
+            self._ids = np.asarray(ids, dtype=np.int64)
+            self._size = len(ids)
+            self._positions = {cid: row for row, cid in enumerate(ids)}
+            self.loaded = True
+
+    def _decode_rows(self, rows) -> tuple:
+        """(ids, normalized matrix) of the (candidate_id, embedding) pairs with a vector of this dimension."""
+        ids = []
+        vectors = []
+        for candidate_id, embedding in rows:
+            if isinstance(embedding, (bytes, str)):
+                embedding = decode_embedding(embedding)
+            if embedding is None or len(embedding) != self.dim:
+                continue
+            ids.append(candidate_id)
+            vectors.append(embedding)
+
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), self.dim)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        return ids, matrix
+
+    def scores(self, query, exact: bool = False) -> tuple:
+        """
+        Cosine similarity of the query against every stored candidate in one matrix-vector product.
+        Returns (candidate_ids, scores) arrays aligned by row.
+        """
+        q = self._normalize(query)
+        with self._lock:
+            n = self._size
+            if n == 0 or q.shape[0] != self.dim:
+                return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+            ids = self._ids[:n].copy()
+            sims = self._matrix[:n] @ q
+        return ids, sims
+
+    def scores_for(self, query, candidate_ids) -> tuple:
+        """
+        Exact cosine similarity for just the given candidates (e.g. a prefiltered subset).
+        Ids without a stored vector are left out. Returns (candidate_ids, scores).
+        """
+        q = self._normalize(query)
+        with self._lock:
+            rows = [self._positions[cid] for cid in map(int, candidate_ids) if cid in self._positions]
+            if not rows or q.shape[0] != self.dim:
+                return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+            rows = np.asarray(rows, dtype=np.int64)
+            ids = self._ids[rows]
+            sims = self._matrix[rows] @ q
+        return ids, sims
+
+    def search_many(self, queries: list, top_k: int, chunk: int = 16384) -> list:
+        """
+        Exact top_k [(candidate_id, score)] for each of several queries, computed as one
+        matrix-matrix product per block of `chunk` stored rows (see top_k_batch).
+        Queries that are empty or wrongly sized get an empty list.
+        """
+        results = [[] for _ in queries]
+        valid = [i for i, query in enumerate(queries) if query is not None and len(query) == self.dim]
+        if not valid or top_k <= 0:
+            return results
+        q = np.stack([self._normalize(queries[i]) for i in valid])
+        with self._lock:
+            rows, sims = top_k_batch(q, self._matrix[:self._size], top_k, chunk)
+            ids = self._ids[rows]
+        for i, row_ids, row_sims in zip(valid, ids, sims):
+            results[i] = [(int(cid), float(sim)) for cid, sim in zip(row_ids, row_sims)]
+        return results
+
+    def search(self, query, top_k: int = None, min_score: float = None, exact: bool = False) -> list:
+        """
+        Return [(candidate_id, score)] sorted by descending cosine similarity,
+        limited to top_k and to scores of at least min_score.
+        """
+        ids, sims = self.scores(query, exact=exact)
+        if min_score is not None:
+            keep = sims >= min_score
+            ids, sims = ids[keep], sims[keep]
+        order = top_k_indices(sims, top_k)
+        return [(int(ids[i]), float(sims[i])) for i in order]
+
+
+def top_k_indices(scores: np.ndarray, top_k: int = None) -> np.ndarray:
+    """
+    Indices of the top_k largest scores in descending order, using argpartition so only
+    the selected slice is fully sorted.
+    """
+    n = scores.shape[0]
+    if top_k is None or top_k >= n:
+        return np.argsort(-scores, kind="stable")
+    if top_k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    part = np.argpartition(-scores, top_k - 1)[:top_k]
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+def top_k_batch(queries: np.ndarray, matrix: np.ndarray, top_k: int, chunk: int = 16384, valid: np.ndarray = None) -> tuple:
+    """
+    The top_k rows of `matrix` for every row of `queries` (both L2-normalized). Scores are one
+    matrix-matrix product per block of `chunk` matrix rows whose best entries are merged into a
+    running top_k, so memory stays at len(queries) x chunk scores however large the matrix is.
+    `valid` (a boolean mask over the matrix rows) leaves rows out.
+    Returns (rows, scores) arrays of shape (len(queries), min(top_k, valid rows)), best first.
+    """
+    k = max(0, min(top_k, matrix.shape[0] if valid is None else int(np.count_nonzero(valid))))
+    best_rows = np.zeros((queries.shape[0], 0), dtype=np.int64)
+    best_scores = np.zeros((queries.shape[0], 0), dtype=np.float32)
+    if k == 0:
+        return best_rows, best_scores
+    chunk = max(chunk, k)
+    for start in range(0, matrix.shape[0], chunk):
+        block = queries @ matrix[start:start + chunk].T
+        if valid is not None:
+            block[:, ~valid[start:start + chunk]] = -np.inf
+        if block.shape[1] > k:
+            part = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        else:
+            part = np.broadcast_to(np.arange(block.shape[1]), block.shape)
+        best_rows = np.concatenate([best_rows, part + start], axis=1)
+        best_scores = np.concatenate([best_scores, np.take_along_axis(block, part, axis=1)], axis=1)
+        if best_rows.shape[1] > k:
+            keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+            best_rows = np.take_along_axis(best_rows, keep, axis=1)
+            best_scores = np.take_along_axis(best_scores, keep, axis=1)
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    return np.take_along_axis(best_rows, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
@@ -0,0 +1,87 @@
+import asyncio
+import os
+import time
+from sqlmodel import Session
+from backend.database import engine
+from backend.services.llm import load_model, model_loaded
+from backend.services.candidates import load_candidate_store, load_text_indexes, dummy_candidates_missing
+from backend.services.task_queue import enqueue_job
+from backend.services.executor import run_io
+
+# Startup only creates the tables and starts the queue workers; the embedding model and the
+# in-memory indexes are loaded by a background task so the server accepts requests right away.
+# /health answers as soon as the process is up, /ready once warm-up has finished.
+MODEL_PRELOAD = os.getenv("MODEL_PRELOAD", "true").lower() != "false"
+
+_state = {"model": "pending", "indexes": "pending", "error": None, "seconds": None}
+_indexes_ready = None
+_task = None
+
+
+async def _load_model():
+    try:
+        await load_model()
+        _state["model"] = "ready"
+    except Exception as e:
+        print(f"Error loading embedding model: {e}")
+        _state["model"] = "error"
+        _state["error"] = str(e)
+
+def _load_indexes():
+    with Session(engine) as session:
+        load_candidate_store(session)
+        load_text_indexes(session)
+        # Indexed lookup of the dummy emails instead of reading every candidate
+        return dummy_candidates_missing(session)
+
+async def _warm_up():
+    started = time.perf_counter()
+    model_task = asyncio.create_task(_load_model()) if MODEL_PRELOAD else None
+    try:
+        if await run_io(_load_indexes):
+            # Keyed, so several uvicorn workers warming up together queue one seed
+            batch_id = await run_io(enqueue_job, "seed", "seed")
+            print(f"Dummy candidates missing; seeding queued (batch {batch_id}).")
+        _state["indexes"] = "ready"
+    except Exception as e:
+        print(f"Error loading indexes: {e}")
+        _state["indexes"] = "error"
+        _state["error"] = str(e)
+    finally:
+        _indexes_ready.set()
+    if model_task is not None:
+        await model_task
+    _state["seconds"] = round(time.perf_counter() - started, 3)
+    print(f"Warm-up finished in {_state['seconds']}s.")
+
+def start_warmup():
+    """Start the background warm-up (call once from the startup hook)."""
+    global _task, _indexes_ready
+    _indexes_ready = asyncio.Event()
+    _task = asyncio.create_task(_warm_up())
+
+async def stop_warmup():
+    if _task is not None and not _task.done():
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+
+async def wait_for_indexes():
+    """Block until the first index load has finished, so requests don't trigger a second full load."""
+    if _indexes_ready is not None:
+        await _indexes_ready.wait()
+
+def readiness() -> dict:
+    model = "ready" if model_loaded() else _state["model"]
+    if not MODEL_PRELOAD and model == "pending":
+        model = "lazy"  # loaded by the first request that needs it
+    ready = _state["indexes"] == "ready" and model in ("ready", "lazy")
+    return {
+        "ready": ready,
+        "model": model,
+        "indexes": _state["indexes"],
+        "warmup_seconds": _state["seconds"],
+        "error": _state["error"],
+    }
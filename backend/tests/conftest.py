@@ -0,0 +1,4 @@
+import os
+
+# Keep tests off the database configured in backend/.env (load_dotenv does not override this)
+os.environ.setdefault("DATABASE_URL", "sqlite://")
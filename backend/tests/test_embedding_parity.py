@@ -0,0 +1,50 @@
+"""
+Every EMBEDDING_BACKEND must produce vectors that agree with the fp32 torch reference, so a
+deployment can switch backends without re-embedding the pool. Tolerances (per text):
+
+    cosine(backend vector, torch vector) >= EMBEDDING_PARITY_MIN_COSINE (default 0.98)
+    share of the torch top-10 neighbours found >= EMBEDDING_PARITY_MIN_OVERLAP (default 0.8)
+
+Needs sentence-transformers and the model (EMBEDDING_MODEL, downloaded or a local directory);
+the ONNX backends also need onnxruntime. Missing pieces skip the tests.
+"""
+import os
+import numpy as np
+import pytest
+
+MIN_COSINE = float(os.getenv("EMBEDDING_PARITY_MIN_COSINE", "0.98"))
+MIN_OVERLAP = float(os.getenv("EMBEDDING_PARITY_MIN_OVERLAP", "0.8"))
+TOP_K = 10
+
+
+def _load(backend: str):
+    from backend.services.embedding_backends import load_embedding_model
+    from backend.services.llm import EMBEDDING_MODEL_NAME
+    try:
+        return load_embedding_model(EMBEDDING_MODEL_NAME, backend)
+    except (ImportError, OSError) as e:
+        pytest.skip(f"{backend} backend unavailable: {e}")
+
+@pytest.fixture(scope="module")
+def corpus():
+    pytest.importorskip("sentence_transformers")
+    from backend.benchmarks.embedding_backends import synthetic_texts
+    return synthetic_texts(200, 120)
+
+@pytest.fixture(scope="module")
+def reference(corpus):
+    from backend.benchmarks.embedding_backends import encode
+    vectors, _ = encode(_load("torch"), corpus, 32)
+    return vectors
+
+@pytest.mark.parametrize("backend", ["torch-int8", "onnx", "onnx-int8"])
+def test_backend_matches_torch(backend, corpus, reference):
+    from backend.benchmarks.embedding_backends import encode, top_k_overlap
+    if backend.startswith("onnx"):
+        pytest.importorskip("onnxruntime")
+    vectors, _ = encode(_load(backend), corpus, 32)
+    assert vectors.shape == reference.shape
+    cosines = np.sum(vectors * reference, axis=1)
+    assert cosines.min() >= MIN_COSINE, f"{backend}: min cosine {cosines.min():.4f} (mean {cosines.mean():.4f})"
+    overlap = top_k_overlap(reference, vectors, queries=50, top_k=TOP_K)
+    assert overlap >= MIN_OVERLAP, f"{backend}: top-{TOP_K} overlap {overlap:.3f}"
@@ -0,0 +1,42 @@
+"""
+Standalone ingestion worker. Run as many as needed next to the API (set QUEUE_WORKERS=0 on the
+API to leave all queue work to them):
+
+    PYTHONPATH=<full-path-to-HireX-folder> python -m backend.worker
+"""
+import asyncio
+import signal
+from backend.database import init_db
+from backend.services.executor import shutdown_executors
+from backend.services.task_queue import run_worker, recover_stale_tasks
+
+
+async def main():
+    init_db()
+    recovered = recover_stale_tasks()
+    if recovered:
+        print(f"Requeued {recovered} stale tasks.")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            # Windows: fall back to KeyboardInterrupt
+            pass
+
+    print("Queue worker started.")
+    try:
+        # This process never ranks, so the API loads what it writes from the database
+        await run_worker(stop=stop, update_indexes=False)
+    finally:
+        shutdown_executors()
+        print("Queue worker stopped.")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
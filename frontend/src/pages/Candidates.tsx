@@ -75,6 +75,9 @@ const Candidates = () => {
   const [uploadDialogOpen, setUploadDialogOpen] = useState(false);
   const [candidates, setCandidates] = useState<Candidate[]>([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<number | null>(null);
+  const [totalCount, setTotalCount] = useState(0);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   const jobId = location.state?.jobId;
   const jobTitle = location.state?.jobTitle;
@@ -92,9 +95,11 @@ const Candidates = () => {
         const mapped = data.map((item: any) => mapBackendCandidate(item.candidate, item.match_score, item.reasoning));
         setCandidates(mapped);
       } else {
-        data = await api.getAllCandidates();
-        const mapped = data.map((item: any) => mapBackendCandidate(item));
-        setCandidates(mapped);
+        // First page only; more are fetched with "Load more"
+        const [page, count] = await Promise.all([api.getCandidatesPage(), api.getCandidateCount()]);
+        setCandidates(page.items.map((item: any) => mapBackendCandidate(item)));
+        setNextCursor(page.next_cursor);
+        setTotalCount(count);
       }
     } catch (error) {
       console.error("Error fetching candidates:", error);
@@ -104,6 +109,21 @@ const Candidates = () => {
     }
   };
 
+  const loadMoreCandidates = async () => {
+    if (nextCursor === null) return;
+    setLoadingMore(true);
+    try {
+      const page = await api.getCandidatesPage(nextCursor);
+      setCandidates(prev => [...prev, ...page.items.map((item: any) => mapBackendCandidate(item))]);
+      setNextCursor(page.next_cursor);
+    } catch (error) {
+      console.error("Error fetching candidates:", error);
+      toast.error("Failed to fetch candidates");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleDeleteCandidate = async (id: number) => {
     if (window.confirm("Are you sure you want to delete this candidate?")) {
       try {
@@ -111,6 +131,7 @@ const Candidates = () => {
         // Update the candidates list
         const updatedCandidates = candidates.filter(c => c.id !== id);
         setCandidates(updatedCandidates);
+        setTotalCount(count => Math.max(0, count - 1));
         toast.success("Candidate deleted successfully");
 
         // If we're on a job-specific view, refresh the candidates
@@ -130,6 +151,8 @@ const Candidates = () => {
       try {
         await api.deleteAllCandidates();
         setCandidates([]);
+        setNextCursor(null);
+        setTotalCount(0);
         toast.success("All candidates deleted successfully");
       } catch (error: any) {
         console.error("Delete all error:", error);
@@ -286,7 +309,7 @@ const Candidates = () => {
               </p>
             </div>
             <div className="flex items-center gap-2 px-4 py-2 border border-border rounded-lg bg-card">
-              <span className="text-foreground font-medium">{filteredCandidates.length}</span>
+              <span className="text-foreground font-medium">{jobId || searchQuery ? filteredCandidates.length : totalCount}</span>
               <span className="text-muted-foreground">Candidates</span>
             </div>
           </div>
@@ -500,6 +523,15 @@ const Candidates = () => {
             })}
           </div>
         )}
+
+        {!loading && !jobId && nextCursor !== null && (
+          <div className="flex justify-center pt-6">
+            <Button variant="outline" onClick={loadMoreCandidates} disabled={loadingMore} className="flex items-center gap-2">
+              {loadingMore && <Loader2 className="w-4 h-4 animate-spin" strokeWidth={1.5} />}
+              Load more ({candidates.length} of {totalCount})
+            </Button>
+          </div>
+        )}
       </main>
     </div>
   );
@@ -8,6 +8,7 @@ import {
 } from "lucide-react";
 import { cn } from "@/lib/utils";
 import Header from "@/components/Header";
+import { api } from "@/services/api";
 
 const Dashboard = () => {
   const [candidateCount, setCandidateCount] = useState(0);
@@ -15,9 +16,8 @@ const Dashboard = () => {
 
   useEffect(() => {
     // Fetch real data from backend
-    fetch("http://localhost:8002/api/v1/candidates")
-      .then(res => res.json())
-      .then(data => setCandidateCount(data.length))
+    api.getCandidateCount()
+      .then(count => setCandidateCount(count))
       .catch(err => console.log(err));
 
     // For now we don't have a jobs list endpoint, showing 0
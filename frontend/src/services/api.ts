@@ -33,9 +33,17 @@ export const api = {
         return response.data;
     },
 
-    getAllCandidates: async () => {
-        const response = await axios.get(`${API_URL}/candidates`);
-        return response.data;
+    getCandidatesPage: async (cursor: number | null = null, limit: number = 50) => {
+        // Keyset pagination: pass the previous page's next_cursor (null on the last page)
+        const response = await axios.get(`${API_URL}/candidates`, {
+            params: { limit, ...(cursor !== null ? { cursor } : {}) },
+        });
+        return response.data as { items: any[]; next_cursor: number | null };
+    },
+
+    getCandidateCount: async () => {
+        const response = await axios.get(`${API_URL}/candidates/count`);
+        return response.data.count;
     },
 
     deleteAllCandidates: async () => {